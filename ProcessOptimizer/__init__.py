@@ -27,6 +27,7 @@ from .optimizer import forest_minimize
 from .optimizer import gbrt_minimize
 from .optimizer import gp_minimize
 from .optimizer import Optimizer
+from .optimizer import AsyncOptimizer
 from .searchcv import BayesSearchCV
 from .space import Categorical, Integer, Space, space_factory, Real
 from .utils import dump
@@ -55,6 +56,7 @@ __all__ = (
     "forest_minimize",
     "gbrt_minimize",
     "Optimizer",
+    "AsyncOptimizer",
     "dump",
     "load",
     "cook_estimator",
@@ -1,6 +1,7 @@
 import numpy as np
 import warnings
 
+from scipy.linalg import solve_triangular
 from scipy.stats import norm
 
 
@@ -76,8 +77,14 @@ def _gaussian_acquisition(X, model, y_opt=None, acq_func="LCB",
             # d(inv_t) = inv_t * grad(g)
             # d(inv_t) = inv_t * (-mu_grad + std * std_grad)
             if return_grad:
-                acq_grad *= inv_t
-                acq_grad += acq_vals * (-mu_grad + std*std_grad)
+                # One row of gradients per sample, also for a single sample
+                grad_shape = acq_grad.shape
+                n_samples = len(acq_vals)
+                acq_grad = acq_grad.reshape(n_samples, -1) * inv_t[:, np.newaxis]
+                acq_grad += acq_vals[:, np.newaxis] * (
+                    -mu_grad.reshape(n_samples, -1)
+                    + std[:, np.newaxis] * std_grad.reshape(n_samples, -1))
+                acq_grad = acq_grad.reshape(grad_shape)
 
     else:
         raise ValueError("Acquisition function not implemented.")
@@ -87,6 +94,94 @@ def _gaussian_acquisition(X, model, y_opt=None, acq_func="LCB",
     return acq_vals
 
 
+def _gaussian_acquisition_from_posterior(mu, std, y_opt=None, acq_func="LCB",
+                                         acq_func_kwargs=None):
+    """
+    Acquisition values computed from a given predictive mean and standard
+    deviation, so that several acquisition functions can share a single
+    prediction of the model. Like `_gaussian_acquisition`, the returned
+    values should be minimised.
+
+    The per second acquisition functions are not supported, as they need
+    the prediction of the time model as well.
+    """
+    if acq_func_kwargs is None:
+        acq_func_kwargs = dict()
+    xi = acq_func_kwargs.get("xi", 0.01)
+    kappa = acq_func_kwargs.get("kappa", 1.96)
+
+    if acq_func == "LCB":
+        return _lcb(mu, std, kappa)
+    elif acq_func == "EI":
+        return -_ei(mu, std, y_opt, xi)
+    elif acq_func == "PI":
+        return -_pi(mu, std, y_opt, xi)
+    else:
+        raise ValueError("Acquisition function not implemented.")
+
+
+def _acquisition_lower_bound(mu, max_std, y_opt=None, acq_func="LCB",
+                             acq_func_kwargs=None):
+    """
+    Lower bound of the values of `_gaussian_acquisition_from_posterior`
+    for a predictive mean `mu` and any standard deviation between 0 and
+    `max_std`.
+
+    With `max_std` an upper bound of the predictive standard deviation,
+    e.g. the prior standard deviation of a Gaussian process, points whose
+    lower bound is larger than the value of another point can be discarded
+    before their standard deviation is computed.
+    """
+    if acq_func_kwargs is None:
+        acq_func_kwargs = dict()
+    xi = acq_func_kwargs.get("xi", 0.01)
+    kappa = acq_func_kwargs.get("kappa", 1.96)
+
+    if acq_func == "LCB":
+        # Decreasing in std, unless kappa is negative
+        if kappa != "inf" and kappa < 0:
+            return _lcb(mu, np.zeros_like(mu), kappa)
+        return _lcb(mu, max_std, kappa)
+    elif acq_func == "EI":
+        # The expected improvement increases with std
+        return -_ei(mu, max_std, y_opt, xi)
+    elif acq_func == "PI":
+        # The probability of improvement tends to 1 as std goes to 0 if the
+        # mean is an improvement, and otherwise increases with std
+        return np.where(
+            y_opt - xi - mu > 0, -1.0, -_pi(mu, max_std, y_opt, xi))
+    else:
+        raise ValueError("Acquisition function not implemented.")
+
+
+def _lcb(mu, std, kappa):
+    if kappa == "inf":
+        return -std
+    return mu - kappa * std
+
+
+def _pi(mu, std, y_opt, xi):
+    values = np.zeros_like(mu)
+    mask = std > 0
+    improve = y_opt - xi - mu[mask]
+    scaled = improve / std[mask]
+    values[mask] = norm.cdf(scaled)
+    return values
+
+
+def _ei(mu, std, y_opt, xi):
+    values = np.zeros_like(mu)
+    mask = std > 0
+    improve = y_opt - xi - mu[mask]
+    scaled = improve / std[mask]
+    cdf = norm.cdf(scaled)
+    pdf = norm.pdf(scaled)
+    exploit = improve * cdf
+    explore = std[mask] * pdf
+    values[mask] = exploit + explore
+    return values
+
+
 def gaussian_lcb(X, model, kappa=1.96, return_grad=False):
     """
     Use the lower confidence bound to estimate the acquisition
@@ -115,8 +210,7 @@ def gaussian_lcb(X, model, kappa=1.96, return_grad=False):
         Useless if ``method`` is set to "LCB".
 
     * `return_grad`: [boolean, optional]:
-        Whether or not to return the grad. Implemented only for the case where
-        ``X`` is a single sample.
+        Whether or not to return the grad.
 
     Returns
     -------
@@ -141,9 +235,7 @@ def gaussian_lcb(X, model, kappa=1.96, return_grad=False):
 
         else:
             mu, std = model.predict(X, return_std=True)
-            if kappa == "inf":
-                return -std
-            return mu - kappa * std
+            return _lcb(mu, std, kappa)
 
 
 def gaussian_pi(X, model, y_opt=0.0, xi=0.01, return_grad=False):
@@ -183,8 +275,7 @@ def gaussian_pi(X, model, y_opt=0.0, xi=0.01, return_grad=False):
         values. Useful only when ``method`` is set to "EI"
 
     * `return_grad`: [boolean, optional]:
-        Whether or not to return the grad. Implemented only for the case where
-        ``X`` is a single sample.
+        Whether or not to return the grad.
 
     Returns
     -------
@@ -209,22 +300,21 @@ def gaussian_pi(X, model, y_opt=0.0, xi=0.01, return_grad=False):
                          "(N,) vector?"
                          .format(mu.ndim, std.ndim))
 
-    values = np.zeros_like(mu)
-    mask = std > 0
-    improve = y_opt - xi - mu[mask]
-    scaled = improve / std[mask]
-    values[mask] = norm.cdf(scaled)
+    values = _pi(mu, std, y_opt, xi)
 
     if return_grad:
-        if not np.all(mask):
-            return values, np.zeros_like(std_grad)
+        grad_shape, positive, std, improve, mu_grad, std_grad = (
+            _gradient_rows(mu, std, mu_grad, std_grad, y_opt, xi))
+        scaled = improve / std
 
         # Substitute (y_opt - xi - mu) / sigma = t and apply chain rule.
         # improve_grad is the gradient of t wrt x.
         improve_grad = -mu_grad * std - std_grad * improve
         improve_grad /= std**2
 
-        return values, improve_grad * norm.pdf(scaled)
+        grad = improve_grad * norm.pdf(scaled)
+        grad[~positive] = 0.0
+        return values, grad.reshape(grad_shape)
 
     return values
 
@@ -265,8 +355,7 @@ def gaussian_ei(X, model, y_opt=0.0, xi=0.01, return_grad=False):
         values. Useful only when ``method`` is set to "EI"
 
     * `return_grad`: [boolean, optional]:
-        Whether or not to return the grad. Implemented only for the case where
-        ``X`` is a single sample.
+        Whether or not to return the grad.
 
     Returns
     -------
@@ -292,19 +381,14 @@ def gaussian_ei(X, model, y_opt=0.0, xi=0.01, return_grad=False):
                          "(N,) vector?"
                          .format(mu.ndim, std.ndim))
 
-    values = np.zeros_like(mu)
-    mask = std > 0
-    improve = y_opt - xi - mu[mask]
-    scaled = improve / std[mask]
-    cdf = norm.cdf(scaled)
-    pdf = norm.pdf(scaled)
-    exploit = improve * cdf
-    explore = std[mask] * pdf
-    values[mask] = exploit + explore
+    values = _ei(mu, std, y_opt, xi)
 
     if return_grad:
-        if not np.all(mask):
-            return values, np.zeros_like(std_grad)
+        grad_shape, positive, std, improve, mu_grad, std_grad = (
+            _gradient_rows(mu, std, mu_grad, std_grad, y_opt, xi))
+        scaled = improve / std
+        cdf = norm.cdf(scaled)
+        pdf = norm.pdf(scaled)
 
         # Substitute (y_opt - xi - mu) / sigma = t and apply chain rule.
         # improve_grad is the gradient of t wrt x.
@@ -316,6 +400,138 @@ def gaussian_ei(X, model, y_opt=0.0, xi=0.01, return_grad=False):
         explore_grad = std_grad * pdf + pdf_grad
 
         grad = exploit_grad + explore_grad
-        return values, grad
+        grad[~positive] = 0.0
+        return values, grad.reshape(grad_shape)
 
     return values
+
+
+def _gradient_rows(mu, std, mu_grad, std_grad, y_opt, xi):
+    """Return the quantities of the gradients of PI and EI with one row per
+    sample, also for a single sample, whose gradients have shape
+    (n_features,).
+
+    The gradient is zero where the std is zero. There the std is replaced by
+    1 to avoid dividing by zero."""
+    n_samples = len(mu)
+    positive = std > 0
+    std = np.where(positive, std, 1.0)[:, np.newaxis]
+    improve = (y_opt - xi - mu)[:, np.newaxis]
+    return (
+        std_grad.shape, positive, std, improve,
+        mu_grad.reshape(n_samples, -1), std_grad.reshape(n_samples, -1))
+
+
+def gaussian_batch_acquisition_1D(X, model, y_opt=None, acq_func="qEI",
+                                  base_samples=None, acq_func_kwargs=None,
+                                  return_grad=True):
+    """
+    A wrapper around the batch acquisition function that is called by
+    fmin_l_bfgs_b.
+
+    The points of the batch are flattened into a single 1-D input, and the
+    gradient is flattened accordingly.
+    """
+    base_samples = np.asarray(base_samples)
+    X = np.reshape(X, (base_samples.shape[1], -1))
+    func_and_grad = _gaussian_batch_acquisition(
+        X, model, y_opt, acq_func=acq_func, base_samples=base_samples,
+        acq_func_kwargs=acq_func_kwargs, return_grad=return_grad)
+    if return_grad:
+        return func_and_grad[0], func_and_grad[1].ravel()
+    return func_and_grad
+
+
+def _gaussian_batch_acquisition(X, model, y_opt=None, acq_func="qEI",
+                                base_samples=None, return_grad=False,
+                                acq_func_kwargs=None):
+    """
+    Monte-Carlo estimate of the acquisition value of a batch of points.
+
+    The joint posterior of the model at the points `X` is sampled using the
+    fixed standard normal `base_samples`, shape=(n_samples, n_points), so
+    that the estimate is a deterministic and differentiable function of `X`.
+    Like `_gaussian_acquisition`, the returned value should be minimised.
+
+    - `"qEI"` is the negated expected improvement of the best point of the
+      batch over `y_opt`.
+    - `"qLCB"` is the expected minimum over the batch of
+      ``mu - kappa * sqrt(pi / 2) * |f - mu|``, which reduces to the lower
+      confidence bound for a single point.
+
+    The gradient requires a GaussianProcessRegressor with a stationary
+    kernel.
+    """
+    X = np.asarray(X)
+    if X.ndim != 2:
+        raise ValueError("X is {}-dimensional, however,"
+                         " it must be 2-dimensional.".format(X.ndim))
+
+    if acq_func_kwargs is None:
+        acq_func_kwargs = dict()
+    xi = acq_func_kwargs.get("xi", 0.01)
+    kappa = acq_func_kwargs.get("kappa", 1.96)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        mu, cov = model.predict(X, return_cov=True)
+    L = _jittered_cholesky(cov)
+    # Deviations of the posterior samples from the mean,
+    # shape=(n_samples, n_points)
+    deviations = base_samples @ L.T
+    n_samples = base_samples.shape[0]
+    rows = np.arange(n_samples)
+
+    # value_grad is the gradient of the value with respect to the samples
+    value_grad = np.zeros_like(deviations)
+    if acq_func == "qEI":
+        improve = y_opt - xi - (mu + deviations)
+        best = np.argmax(improve, axis=1)
+        best_improve = improve[rows, best]
+        value = -np.mean(np.maximum(best_improve, 0.0))
+        improving = best_improve > 0
+        value_grad[rows[improving], best[improving]] = 1.0 / n_samples
+        deviations_grad = value_grad
+    elif acq_func == "qLCB":
+        scale = kappa * np.sqrt(np.pi / 2)
+        bounds = mu - scale * np.abs(deviations)
+        best = np.argmin(bounds, axis=1)
+        value = np.mean(bounds[rows, best])
+        value_grad[rows, best] = 1.0 / n_samples
+        deviations_grad = -value_grad * scale * np.sign(deviations)
+    else:
+        raise ValueError("Batch acquisition function not implemented.")
+
+    if not return_grad:
+        return value
+
+    mu_grad = value_grad.sum(axis=0)
+    L_grad = np.tril(deviations_grad.T @ base_samples)
+    cov_grad = _cholesky_backward(L, L_grad)
+    return value, model.joint_posterior_gradient(X, mu_grad, cov_grad)
+
+
+def _jittered_cholesky(cov, max_tries=6):
+    """Cholesky factor of a covariance matrix, adding increasing jitter to
+    the diagonal if it is not numerically positive definite."""
+    jitter = 1e-10 * max(np.mean(np.diag(cov)), 1e-10)
+    for _ in range(max_tries):
+        try:
+            return np.linalg.cholesky(cov + jitter * np.eye(cov.shape[0]))
+        except np.linalg.LinAlgError:
+            jitter *= 10
+    return np.linalg.cholesky(cov + jitter * np.eye(cov.shape[0]))
+
+
+def _cholesky_backward(L, L_grad):
+    """Gradient with respect to a symmetric matrix given the gradient with
+    respect to its lower Cholesky factor `L`.
+
+    See Murray, "Differentiation of the Cholesky decomposition" (2016).
+    """
+    P = np.tril(L.T @ L_grad)
+    P[np.diag_indices_from(P)] *= 0.5
+    # S = L^-T P L^-1
+    S = solve_triangular(L, P, lower=True, trans="T")
+    S = solve_triangular(L, S.T, lower=True, trans="T").T
+    return 0.5 * (S + S.T)
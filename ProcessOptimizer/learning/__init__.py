@@ -4,6 +4,7 @@ from .cook_estimator import cook_estimator
 from .forest import RandomForestRegressor
 from .forest import ExtraTreesRegressor
 from .gaussian_process import GaussianProcessRegressor
+from .gaussian_process import SparseGaussianProcessRegressor
 from .gbrt import GradientBoostingQuantileRegressor
 from .has_gradients import has_gradients
 from .use_named_args import use_named_args
@@ -14,6 +15,7 @@ __all__ = (
     "ExtraTreesRegressor",
     "GradientBoostingQuantileRegressor",
     "GaussianProcessRegressor",
+    "SparseGaussianProcessRegressor",
     "has_gradients",
     "use_named_args",
 )
@@ -4,6 +4,7 @@ from sklearn.ensemble import GradientBoostingRegressor
 
 from .forest import ExtraTreesRegressor
 from .gaussian_process import GaussianProcessRegressor
+from .gaussian_process import SparseGaussianProcessRegressor
 from .gbrt import GradientBoostingQuantileRegressor
 from .forest import RandomForestRegressor
 from .gaussian_process.kernels import ConstantKernel
@@ -28,14 +29,15 @@ def cook_estimator(
 
     Parameters
     ----------
-    * `base_estimator` ["GP", "RF", "ET", "GBRT", "DUMMY"
+    * `base_estimator` ["GP", "SGP", "RF", "ET", "GBRT", "DUMMY"
                         or sklearn regressor, default="GP"]:
         Should inherit from `sklearn.base.RegressorMixin`.
         In addition the `predict` method should have an optional `return_std`
         argument, which returns `std(Y | x)`` along with `E[Y | x]`.
         If base_estimator is one of ["GP", "RF", "ET", "GBRT", "DUMMY"], a
         surrogate model corresponding to the relevant `X_minimize` function
-        is created.
+        is created. "SGP" creates a `SparseGaussianProcessRegressor` with the
+        same kernel as "GP", for large numbers of observations.
 
     * `space` [Space instance]:
         Has to be provided if the base_estimator is a gaussian process.
@@ -50,16 +52,16 @@ def cook_estimator(
 
     if isinstance(base_estimator, str):
         base_estimator = base_estimator.upper()
-        if base_estimator not in ["GP", "ET", "RF", "GBRT", "DUMMY"]:
+        if base_estimator not in ["GP", "SGP", "ET", "RF", "GBRT", "DUMMY"]:
             raise ValueError(
                 "Valid strings for the base_estimator parameter "
-                "are: 'RF', 'ET', 'GP', 'GBRT' or 'DUMMY' not "
+                "are: 'RF', 'ET', 'GP', 'SGP', 'GBRT' or 'DUMMY' not "
                 "%s." % base_estimator
             )
     elif not is_regressor(base_estimator):
         raise ValueError("base_estimator has to be a regressor.")
 
-    if base_estimator == "GP":
+    if base_estimator in ["GP", "SGP"]:
         if space is not None:
             space = Space(space)
             space = Space(normalize_dimensions(space.dimensions))
@@ -94,7 +96,11 @@ def cook_estimator(
                 nu=2.5,
             )
 
-        base_estimator = GaussianProcessRegressor(
+        if base_estimator == "SGP":
+            gp_class = SparseGaussianProcessRegressor
+        else:
+            gp_class = GaussianProcessRegressor
+        base_estimator = gp_class(
             kernel=cov_amplitude * other_kernel,
             normalize_y=True,
             noise="gaussian",
@@ -1,9 +1,10 @@
 import numpy as np
 from sklearn.ensemble import RandomForestRegressor as _sk_RandomForestRegressor
 from sklearn.ensemble import ExtraTreesRegressor as _sk_ExtraTreesRegressor
+from sklearn.utils import check_random_state
 
 
-def _return_std(X, trees, predictions, min_variance):
+def _return_std(X, trees, predictions, min_variance, dtype=np.float64):
     """
     Returns `std(Y | X)`.
 
@@ -23,6 +24,12 @@ def _return_std(X, trees, predictions, min_variance):
         Prediction of each data point as returned by RandomForestRegressor
         or ExtraTreesRegressor.
 
+    * `min_variance` [float]:
+        Minimum variance of the leaves.
+
+    * `dtype` [np.float64 or np.float32, default=np.float64]:
+        Precision in which the variances are accumulated.
+
     Returns
     -------
     * `std` [array-like, shape=(n_samples,)]:
@@ -30,10 +37,13 @@ def _return_std(X, trees, predictions, min_variance):
         is set to "squared_error", then `std[i] ~= std(y | X[i])`.
     """
     # This derives std(y | x) as described in 4.3.2 of arXiv:1211.0906
-    std = np.zeros(len(X))
+    std = np.zeros(len(X), dtype=dtype)
+    predictions = np.asarray(predictions, dtype=dtype)
 
     for tree in trees:
-        var_tree = tree.tree_.impurity[tree.apply(X)]
+        # The leaves give both the variance and the mean of each tree
+        leaves = tree.apply(X)
+        var_tree = tree.tree_.impurity[leaves].astype(dtype)
 
         # This rounding off is done in accordance with the
         # adjustment done in section 4.3.3
@@ -41,16 +51,28 @@ def _return_std(X, trees, predictions, min_variance):
         # for cases such as leaves with 1 sample in which there
         # is zero variance.
         var_tree[var_tree < min_variance] = min_variance
-        mean_tree = tree.predict(X)
-        std += var_tree + mean_tree ** 2
+        mean_tree = tree.tree_.value[leaves, 0, 0].astype(dtype)
+        # Var(E[Y | Tree]) around the predictions rather than as
+        # E[E[Y | Tree]^2] - predictions^2, which cancels badly in single
+        # precision
+        mean_tree -= predictions
+        var_tree += mean_tree ** 2
+        std += var_tree
 
     std /= len(trees)
-    std -= predictions ** 2.0
-    std[std < 0.0] = 0.0
     std = std ** 0.5
     return std
 
 
+def _sample_marginal(forest, X, n_samples, random_state):
+    """Draw `n_samples` samples from the predictive distribution of
+    `forest` at each point of `X` independently."""
+    rng = check_random_state(random_state)
+    mean, std = forest.predict(X, return_std=True)
+    return rng.normal(
+        mean[:, np.newaxis], std[:, np.newaxis], size=(len(mean), n_samples))
+
+
 class RandomForestRegressor(_sk_RandomForestRegressor):
     """
     RandomForestRegressor that supports conditional std computation.
@@ -203,7 +225,7 @@ class RandomForestRegressor(_sk_RandomForestRegressor):
             n_jobs=n_jobs, random_state=random_state,
             verbose=verbose, warm_start=warm_start)
 
-    def predict(self, X, return_std=False):
+    def predict(self, X, return_std=False, dtype=np.float64):
         """Predict continuous output for X.
 
         Parameters
@@ -214,6 +236,10 @@ class RandomForestRegressor(_sk_RandomForestRegressor):
         return_std : boolean
             Whether or not to return the standard deviation.
 
+        dtype : np.float64 or np.float32, default=np.float64
+            Precision in which the standard deviation is computed.
+            np.float32 is faster and uses less memory for many samples.
+
         Returns
         -------
         predictions : array-like of shape = (n_samples,)
@@ -231,10 +257,36 @@ class RandomForestRegressor(_sk_RandomForestRegressor):
                 raise ValueError(
                     "Expected impurity to be 'squared_error', got %s instead"
                     % self.criterion)
-            std = _return_std(X, self.estimators_, mean, self.min_variance)
+            # Validated once, rather than by every tree
+            X = self._validate_X_predict(X)
+            std = _return_std(
+                X, self.estimators_, mean, self.min_variance, dtype)
             return mean, std
         return mean
 
+    def sample_marginal(self, X, n_samples=1, random_state=0):
+        """Draw samples from the predictive distribution at each point of X
+        independently, normally distributed with the mean and standard
+        deviation returned by `predict`.
+
+        Parameters
+        ----------
+        X : array-like of shape=(n_samples_X, n_features)
+            Input data.
+
+        n_samples : int, default=1
+            The number of samples drawn at each point.
+
+        random_state : int, RandomState instance or None, default=0
+            Determines the random number generation to draw the samples.
+
+        Returns
+        -------
+        y_samples : array-like of shape=(n_samples_X, n_samples)
+            Values of `n_samples` samples drawn at each point.
+        """
+        return _sample_marginal(self, X, n_samples, random_state)
+
 
 class ExtraTreesRegressor(_sk_ExtraTreesRegressor):
     """
@@ -388,7 +440,7 @@ class ExtraTreesRegressor(_sk_ExtraTreesRegressor):
             n_jobs=n_jobs, random_state=random_state,
             verbose=verbose, warm_start=warm_start)
 
-    def predict(self, X, return_std=False):
+    def predict(self, X, return_std=False, dtype=np.float64):
         """
         Predict continuous output for X.
 
@@ -400,6 +452,10 @@ class ExtraTreesRegressor(_sk_ExtraTreesRegressor):
         return_std : boolean
             Whether or not to return the standard deviation.
 
+        dtype : np.float64 or np.float32, default=np.float64
+            Precision in which the standard deviation is computed.
+            np.float32 is faster and uses less memory for many samples.
+
         Returns
         -------
         predictions : array-like of shape=(n_samples,)
@@ -417,7 +473,33 @@ class ExtraTreesRegressor(_sk_ExtraTreesRegressor):
                 raise ValueError(
                     "Expected impurity to be 'squared_error', got %s instead"
                     % self.criterion)
-            std = _return_std(X, self.estimators_, mean, self.min_variance)
+            # Validated once, rather than by every tree
+            X = self._validate_X_predict(X)
+            std = _return_std(
+                X, self.estimators_, mean, self.min_variance, dtype)
             return mean, std
 
         return mean
+
+    def sample_marginal(self, X, n_samples=1, random_state=0):
+        """Draw samples from the predictive distribution at each point of X
+        independently, normally distributed with the mean and standard
+        deviation returned by `predict`.
+
+        Parameters
+        ----------
+        X : array-like of shape=(n_samples_X, n_features)
+            Input data.
+
+        n_samples : int, default=1
+            The number of samples drawn at each point.
+
+        random_state : int, RandomState instance or None, default=0
+            Determines the random number generation to draw the samples.
+
+        Returns
+        -------
+        y_samples : array-like of shape=(n_samples_X, n_samples)
+            Values of `n_samples` samples drawn at each point.
+        """
+        return _sample_marginal(self, X, n_samples, random_state)
@@ -1,3 +1,4 @@
 from .gpr import GaussianProcessRegressor
+from .sgpr import SparseGaussianProcessRegressor
 
-__all__ = ("GaussianProcessRegressor")
+__all__ = ("GaussianProcessRegressor", "SparseGaussianProcessRegressor")
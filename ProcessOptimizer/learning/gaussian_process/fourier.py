@@ -0,0 +1,183 @@
+import numpy as np
+
+from scipy.linalg import cho_solve
+from scipy.linalg import cholesky
+from scipy.linalg import solve_triangular
+
+from sklearn.utils import check_array
+from sklearn.utils import check_random_state
+
+from .kernels import ConstantKernel
+from .kernels import Matern
+from .kernels import Product
+from .kernels import RBF
+from .kernels import Sum
+from .kernels import WhiteKernel
+
+
+class FourierFeatureSamples(object):
+    """Functions drawn from the posterior of a Gaussian process, approximated
+    by a Bayesian linear model on random Fourier features of its kernel.
+
+    The j-th function is
+    ``f_j(x) = y_mean + y_std * cos(x @ omega + offset) @ weights[:, j]``.
+    Evaluating all functions costs O(n_features * (n_dims + n_samples)) per
+    point, regardless of the number of training points, and the gradients
+    are exact.
+
+    Use `GaussianProcessRegressor.sample_functions` to draw the functions.
+
+    Parameters
+    ----------
+    * `omega` [array, shape=(n_dims, n_features)]:
+        The frequencies of the features, divided by the length scales.
+
+    * `offset` [array, shape=(n_features,)]:
+        The phases of the features.
+
+    * `weights` [array, shape=(n_features, n_samples)]:
+        The weights of the features in each function, including the scale
+        of the features.
+
+    * `y_mean` [float, default=0.0]:
+        The mean added to the functions.
+
+    * `y_std` [float, default=1.0]:
+        The factor the functions are scaled by.
+    """
+
+    def __init__(self, omega, offset, weights, y_mean=0.0, y_std=1.0):
+        self.omega = omega
+        self.offset = offset
+        self.weights = weights
+        self.y_mean = y_mean
+        self.y_std = y_std
+
+    @property
+    def n_samples(self):
+        return self.weights.shape[1]
+
+    def __call__(self, X, return_grad=False):
+        """Evaluate the functions at `X`.
+
+        Parameters
+        ----------
+        * `X` [array-like, shape=(n_points, n_dims)]:
+            The points at which the functions are evaluated.
+
+        * `return_grad` [bool, default=False]:
+            Whether to return the gradients of the functions.
+
+        Returns
+        -------
+        * `values` [array, shape=(n_points, n_samples)]:
+            The value of each function at each point.
+
+        * `grad` [array, shape=(n_points, n_samples, n_dims)]:
+            The gradient of each function at each point. Only returned when
+            `return_grad` is True.
+        """
+        X = check_array(X)
+        Z = X @ self.omega + self.offset
+        values = self.y_std * (np.cos(Z) @ self.weights) + self.y_mean
+        if not return_grad:
+            return values
+        grad = -self.y_std * np.einsum(
+            "nm,mq,dm->nqd", np.sin(Z), self.weights, self.omega,
+            optimize=True)
+        return values, grad
+
+
+def fourier_feature_samples(X, y, kernel, noise, n_samples=1,
+                            n_features=1000, y_mean=0.0, y_std=1.0,
+                            random_state=None):
+    """Draw functions from the posterior of a Gaussian process with random
+    Fourier features of its kernel.
+
+    The frequencies of the features are drawn from the spectral density of
+    the kernel: a normal distribution for the RBF kernel, and a Student-t
+    distribution with ``2 nu`` degrees of freedom for the Matern kernel.
+    All functions share the features, and the weights of each function are
+    drawn independently from their posterior given the observations.
+
+    Parameters
+    ----------
+    * `X` [array, shape=(n_train, n_dims)]:
+        The training points.
+
+    * `y` [array, shape=(n_train,)]:
+        The training targets, as seen by the kernel, i.e. normalised.
+
+    * `kernel` [kernel object]:
+        A Matern or RBF kernel, optionally multiplied by a ConstantKernel
+        and added to a WhiteKernel, which is ignored.
+
+    * `noise` [float or array, shape=(n_train,)]:
+        The variance of the observational noise of the targets.
+
+    * `n_samples` [int, default=1]:
+        The number of functions drawn.
+
+    * `n_features` [int, default=1000]:
+        The number of random Fourier features.
+
+    * `y_mean`, `y_std` [float, default=0.0, 1.0]:
+        The normalisation of the targets, which is undone by the functions.
+
+    * `random_state` [int, RandomState instance or None, default=None]:
+        Determines the random number generation to draw the features and
+        the weights.
+
+    Returns
+    -------
+    * `samples` [FourierFeatureSamples]:
+        The drawn functions.
+    """
+    amplitude, length_scale, nu = _spectral_parameters(kernel)
+    rng = check_random_state(random_state)
+    n_dims = X.shape[1]
+
+    omega = rng.normal(size=(n_dims, n_features))
+    if np.isfinite(nu):
+        omega *= np.sqrt(2 * nu / rng.chisquare(2 * nu, size=n_features))
+    omega /= np.broadcast_to(length_scale, (n_dims,))[:, np.newaxis]
+    offset = rng.uniform(0, 2 * np.pi, size=n_features)
+    scale = np.sqrt(2 * amplitude / n_features)
+
+    # The posterior of the weights has precision
+    # A = Phi^T N^-1 Phi + I and mean A^-1 Phi^T N^-1 y
+    Phi = scale * np.cos(X @ omega + offset)
+    noise = np.broadcast_to(np.asarray(noise, dtype=float), (X.shape[0],))
+    Phi_scaled = Phi / noise[:, np.newaxis]
+    A = Phi.T @ Phi_scaled
+    A[np.diag_indices_from(A)] += 1.0
+    L = cholesky(A, lower=True, check_finite=False)
+    mean = cho_solve((L, True), Phi_scaled.T @ y, check_finite=False)
+    weights = mean[:, np.newaxis] + solve_triangular(
+        L.T, rng.normal(size=(n_features, n_samples)), lower=False,
+        check_finite=False)
+    return FourierFeatureSamples(
+        omega, offset, scale * weights, y_mean=y_mean, y_std=y_std)
+
+
+def _spectral_parameters(kernel):
+    """Return the amplitude, length scale and nu of a (scaled) Matern or RBF
+    kernel. The nu of the RBF kernel is infinite."""
+    if isinstance(kernel, Sum):
+        if isinstance(kernel.k2, WhiteKernel):
+            return _spectral_parameters(kernel.k1)
+        if isinstance(kernel.k1, WhiteKernel):
+            return _spectral_parameters(kernel.k2)
+    elif isinstance(kernel, Product):
+        for constant, other in [(kernel.k1, kernel.k2),
+                                (kernel.k2, kernel.k1)]:
+            if isinstance(constant, ConstantKernel):
+                amplitude, length_scale, nu = _spectral_parameters(other)
+                return constant.constant_value * amplitude, length_scale, nu
+    elif isinstance(kernel, Matern):
+        return 1.0, kernel.length_scale, kernel.nu
+    elif isinstance(kernel, RBF):
+        return 1.0, kernel.length_scale, np.inf
+    raise ValueError(
+        "Random Fourier features require a Matern or RBF kernel, "
+        "optionally scaled by a ConstantKernel, got %s" % kernel)
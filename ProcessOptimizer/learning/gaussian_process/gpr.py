@@ -1,8 +1,15 @@
 import numpy as np
 import warnings
+from copy import copy
+from copy import deepcopy
+
+from joblib import Parallel
+from joblib import delayed
 
 from scipy.linalg import cho_solve
+from scipy.linalg import cholesky
 from scipy.linalg import solve_triangular
+from scipy.linalg.lapack import dpotri
 
 import sklearn
 from sklearn.gaussian_process import (
@@ -10,13 +17,19 @@ from sklearn.gaussian_process import (
     as sk_GaussianProcessRegressor
 )
 from sklearn.utils import check_array
+from sklearn.utils import check_random_state
+from sklearn.utils import gen_batches
+from sklearn.utils import get_chunk_n_rows
 
 from sklearn.preprocessing._data import _handle_zeros_in_scale
 
+from .fourier import fourier_feature_samples
 from .kernels import ConstantKernel
 from .kernels import Sum
 from .kernels import RBF
 from .kernels import WhiteKernel
+from .kernels import _cache_squared_differences
+from .kernels import _gradient_contraction
 
 GPR_CHOLESKY_LOWER = True
 
@@ -55,6 +68,8 @@ class GaussianProcessRegressor(sk_GaussianProcessRegressor):
        * allows prediction without prior fitting (based on the GP prior);
        * provides an additional method sample_y(X), which evaluates samples
          drawn from the GPR (prior or posterior) at given inputs;
+       * provides sample_marginal(X), which draws samples at each input
+         independently, without the joint covariance;
        * exposes a method log_marginal_likelihood(theta), which can be used
          externally for other ways of selecting hyperparameters, e.g., via
          Markov chain Monte Carlo.
@@ -136,6 +151,18 @@ class GaussianProcessRegressor(sk_GaussianProcessRegressor):
     * `noise_level_bounds` [tuple[float, float], optional (default: (1e-5,1e5))]:
         Sets the bounds for the noise level when noise is set to "gaussian". 
 
+    * `n_jobs` [int or None, optional (default: None)]:
+        Number of threads used to run the optimizer restarts, and the
+        batches of large predictions, in parallel. None means 1, and -1
+        means using all processors. The result is the same as with a single
+        thread.
+
+    * `working_memory` [int or None, optional (default: None)]:
+        The memory in MiB that `predict` may use for the kernel between the
+        query points and the training points. Larger sets of query points
+        are predicted in batches. If None, the `working_memory` of
+        ``sklearn.get_config()`` is used.
+
     Attributes
     ----------
     * `X_train_` [array-like, shape = (n_samples, n_features)]:
@@ -151,6 +178,10 @@ class GaussianProcessRegressor(sk_GaussianProcessRegressor):
     * `L_` [array-like, shape = (n_samples, n_samples)]:
         Lower-triangular Cholesky decomposition of the kernel in ``X_train_``
 
+    * `K_inv_` [array-like, shape = (n_samples, n_samples)]:
+        Inverse of the kernel in ``X_train_``, computed from ``L_`` on first
+        access
+
     * `alpha_` [array-like, shape = (n_samples,)]:
         Dual coefficients of training data points in kernel space
 
@@ -160,13 +191,21 @@ class GaussianProcessRegressor(sk_GaussianProcessRegressor):
     * `noise_` [float]:
         Estimate of the gaussian noise. Useful only when noise is set to
         "gaussian".
+
+    * `theta_` [array-like, shape = (n_kernel_params,)]:
+        The log-transformed hyperparameters found by the fit, including the
+        noise level that is set to zero in ``kernel_`` after fitting. Can be
+        passed to `warm_fit` to start a later fit from these values.
     """
     def __init__(self, kernel=None, alpha=1e-10,
                  optimizer="fmin_l_bfgs_b", n_restarts_optimizer=0,
                  normalize_y=False, copy_X_train=True, random_state=None,
-                 noise=None, noise_level_bounds=(1e-5, 1e5)):
+                 noise=None, noise_level_bounds=(1e-5, 1e5), n_jobs=None,
+                 working_memory=None):
         self.noise = noise
         self.noise_level_bounds = noise_level_bounds
+        self.n_jobs = n_jobs
+        self.working_memory = working_memory
         super(GaussianProcessRegressor, self).__init__(
             kernel=kernel, alpha=alpha, optimizer=optimizer,
             n_restarts_optimizer=n_restarts_optimizer,
@@ -189,6 +228,232 @@ class GaussianProcessRegressor(sk_GaussianProcessRegressor):
         * `self`:
             Returns an instance of self.
         """
+        return self._fit(X, y)
+
+    def warm_fit(self, X, y, theta, optimize=True):
+        """Fit Gaussian process regression model starting from `theta`.
+
+        The hyperparameters are initialised at `theta`, typically the
+        `theta_` of a previous fit on a subset of the same data. If
+        `optimize` is False the hyperparameters are kept fixed at `theta`,
+        so that the fit reduces to a Cholesky factorisation of the kernel.
+        Otherwise the first optimizer run starts from `theta` and the
+        remaining `n_restarts_optimizer` runs start from random values as in
+        `fit`.
+
+        Parameters
+        ----------
+        * `X` [array-like, shape = (n_samples, n_features)]:
+            Training data
+
+        * `y` [array-like, shape = (n_samples, [n_output_dims])]:
+            Target values
+
+        * `theta` [array-like, shape = (n_kernel_params,)]:
+            Log-transformed hyperparameters to start from, including the
+            noise level if `noise` is set.
+
+        * `optimize` [bool, default: True]:
+            Whether to optimise the hyperparameters starting from `theta`.
+
+        Returns
+        -------
+        * `self`:
+            Returns an instance of self.
+        """
+        return self._fit(X, y, theta=theta, optimize=optimize)
+
+    @property
+    def K_inv_(self):
+        """The inverse of the kernel matrix of the training data.
+
+        It is computed from `L_` on first access and cached until `L_`
+        changes. Prefer ``cho_solve((L_, True), b)`` over products with the
+        inverse.
+        """
+        cache = self.__dict__.get("_K_inv_cache")
+        if cache is None or cache[0] is not self.L_:
+            L_inv = solve_triangular(self.L_.T, np.eye(self.L_.shape[0]))
+            cache = (self.L_, L_inv.dot(L_inv.T))
+            self._K_inv_cache = cache
+        return cache[1]
+
+    @K_inv_.setter
+    def K_inv_(self, value):
+        self._K_inv_cache = (self.L_, value)
+
+    def condition_on(self, X, y):
+        """Return a copy of the model conditioned on additional observations.
+
+        The hyperparameters, and the normalisation of `y`, are kept fixed,
+        so instead of refitting the model the Cholesky factor `L_` is
+        extended by one row per new observation. This costs O(n^2) per
+        observation, compared to the repeated O(n^3) factorisations of a
+        fit. It is useful for "fantasy" observations, e.g. the lies of the
+        constant liar strategy.
+
+        The returned model shares the kernel with this model, which is not
+        modified.
+
+        Parameters
+        ----------
+        * `X` [array-like, shape = (n_new_samples, n_features)]:
+            Points at which to condition the model.
+
+        * `y` [array-like, shape = (n_new_samples, [n_output_dims])]:
+            Target values at `X`.
+
+        Returns
+        -------
+        * `model` [GaussianProcessRegressor]:
+            The conditioned model.
+        """
+        if not hasattr(self, "X_train_"):
+            raise ValueError("The model has to be fitted before conditioning.")
+        if np.iterable(self.alpha):
+            raise ValueError(
+                "Conditioning on new observations requires a scalar alpha.")
+        X = check_array(X)
+        y = np.asarray(y, dtype=float).reshape(
+            (X.shape[0],) + self.y_train_.shape[1:])
+        y = (y - self.y_train_mean_) / self.y_train_std_
+
+        # The WhiteKernel in `kernel_` may have been zeroed, so the noise
+        # that was on the diagonal during fitting is added explicitly
+        noise = (self.noise_ or 0.0) - self._white_noise_level()
+        K_cross = self.kernel_(self.X_train_, X)
+        K_new = self.kernel_(X)
+        K_new[np.diag_indices_from(K_new)] += noise + self.alpha
+
+        # Block Cholesky update:
+        # [[L, 0], [L_cross^T, L_new]] with L_new L_new^T the Schur complement
+        L_cross = solve_triangular(
+            self.L_, K_cross, lower=GPR_CHOLESKY_LOWER, check_finite=False)
+        L_new = cholesky(
+            K_new - L_cross.T @ L_cross, lower=True, check_finite=False)
+        n, m = self.L_.shape[0], X.shape[0]
+        L = np.zeros((n + m, n + m))
+        L[:n, :n] = self.L_
+        L[n:, :n] = L_cross.T
+        L[n:, n:] = L_new
+
+        model = copy(self)
+        model.X_train_ = np.vstack([self.X_train_, X])
+        model.y_train_ = np.concatenate([self.y_train_, y])
+        model.L_ = L
+        model.alpha_ = cho_solve(
+            (L, GPR_CHOLESKY_LOWER), model.y_train_, check_finite=False)
+        log_likelihood_dims = (
+            -0.5 * np.sum(model.y_train_ * model.alpha_, axis=0)
+            - np.log(np.diag(L)).sum()
+            - (n + m) / 2 * np.log(2 * np.pi)
+        )
+        model.log_marginal_likelihood_value_ = np.sum(log_likelihood_dims)
+        return model
+
+    def output_models(self):
+        """Return a model for each output of a model fitted to several
+        outputs.
+
+        All outputs share the hyperparameters, and fitting a single model to
+        all of them costs one hyperparameter optimisation and one Cholesky
+        factorisation, with all `alpha_` vectors found by one solve. The
+        returned single-output models share the training points and the
+        factorisation with this model, and only have their own `alpha_` and
+        normalisation of `y`.
+
+        Returns
+        -------
+        * `models` [list of GaussianProcessRegressor]:
+            A model for each output, predicting as this model does for that
+            output. The `log_marginal_likelihood_value_` of each model is
+            that of its output.
+        """
+        if not hasattr(self, "X_train_"):
+            raise ValueError("The model has to be fitted first.")
+        if self.y_train_.ndim != 2:
+            raise ValueError("The model has been fitted to a single output.")
+        n_outputs = self.y_train_.shape[1]
+        y_train_mean = np.broadcast_to(self.y_train_mean_, (n_outputs,))
+        y_train_std = np.broadcast_to(self.y_train_std_, (n_outputs,))
+        log_likelihood_dims = self._log_likelihood_dims()
+
+        models = []
+        for i in range(n_outputs):
+            model = copy(self)
+            # The kernel is not shared, as adding the observational noise
+            # modifies it
+            model.kernel_ = deepcopy(self.kernel_)
+            model.y_train_ = self.y_train_[:, i]
+            model.alpha_ = self.alpha_[:, i]
+            model.y_train_mean_ = y_train_mean[i:i + 1].copy()
+            model.y_train_std_ = y_train_std[i:i + 1].copy()
+            model.log_marginal_likelihood_value_ = log_likelihood_dims[i]
+            models.append(model)
+        return models
+
+    def _log_likelihood_dims(self):
+        """Return the log-marginal-likelihood of each output."""
+        return (
+            -0.5 * np.sum(self.y_train_ * self.alpha_, axis=0)
+            - np.log(np.diag(self.L_)).sum()
+            - self.L_.shape[0] / 2 * np.log(2 * np.pi)
+        )
+
+    def log_marginal_likelihood(self, theta=None, eval_gradient=False,
+                                clone_kernel=True):
+        """Return the log-marginal likelihood of `theta` for the training
+        data, and optionally its gradient with respect to `theta`.
+
+        Same as in sklearn, but the gradient is computed with ``K^-1`` from
+        the Cholesky factor, and contracted with the gradient of the kernel
+        without forming the gradient for the kernels that support it. This
+        is considerably cheaper for large training sets and anisotropic
+        kernels.
+        """
+        if theta is None or not eval_gradient:
+            return super(GaussianProcessRegressor, self).log_marginal_likelihood(
+                theta, eval_gradient, clone_kernel=clone_kernel)
+
+        if clone_kernel:
+            kernel = self.kernel_.clone_with_theta(theta)
+        else:
+            kernel = self.kernel_
+            kernel.theta = theta
+        K = kernel(self.X_train_)
+
+        # Alg. 2.1, page 19, line 2 -> L = cholesky(K + sigma^2 I)
+        K[np.diag_indices_from(K)] += self.alpha
+        try:
+            L = cholesky(K, lower=GPR_CHOLESKY_LOWER, check_finite=False)
+        except np.linalg.LinAlgError:
+            return -np.inf, np.zeros_like(theta)
+
+        y_train = self.y_train_
+        if y_train.ndim == 1:
+            y_train = y_train[:, np.newaxis]
+        # Alg 2.1, page 19, line 3 -> alpha = L^T \ (L \ y)
+        alpha = cho_solve((L, GPR_CHOLESKY_LOWER), y_train, check_finite=False)
+        # Alg 2.1, page 19, line 7, summed over the outputs
+        log_likelihood = (
+            -0.5 * np.sum(y_train * alpha)
+            - y_train.shape[1] * np.log(np.diag(L)).sum()
+            - y_train.shape[1] * K.shape[0] / 2 * np.log(2 * np.pi)
+        )
+
+        # Eq. 5.9, p. 114: 0.5 * trace((alpha . alpha^T - K^-1) . K_gradient),
+        # summed over the outputs. dpotri only fills the lower triangle of
+        # K^-1, the upper triangle of L is zero.
+        K_inv, info = dpotri(L, lower=1)
+        if info != 0:
+            return -np.inf, np.zeros_like(theta)
+        K_inv += np.tril(K_inv, -1).T
+        inner_term = alpha @ alpha.T - y_train.shape[1] * K_inv
+        log_likelihood_gradient = 0.5 * _gradient_contraction(
+            kernel, self.X_train_, inner_term)
+        return log_likelihood, log_likelihood_gradient
+
+    def _fit(self, X, y, theta=None, optimize=True):
         if isinstance(self.noise, str) and self.noise != "gaussian":
             raise ValueError("expected noise to be 'gaussian', got %s"
                              % self.noise)
@@ -202,9 +467,28 @@ class GaussianProcessRegressor(sk_GaussianProcessRegressor):
             self.kernel = self.kernel + WhiteKernel(
                 noise_level=self.noise, noise_level_bounds="fixed"
             )
-        super(GaussianProcessRegressor, self).fit(X, y)
+        if theta is not None:
+            self.kernel = self.kernel.clone_with_theta(theta)
+
+        optimizer = self.optimizer
+        if not optimize:
+            self.optimizer = None
+        try:
+            with _cache_squared_differences() as cache:
+                if (
+                    self.optimizer is not None
+                    and self.n_restarts_optimizer > 0
+                    and self.n_jobs not in (None, 1)
+                ):
+                    self._fit_parallel_restarts(X, y, cache)
+                else:
+                    super(GaussianProcessRegressor, self).fit(X, y)
+        finally:
+            self.optimizer = optimizer
 
+        self.theta_ = np.copy(self.kernel_.theta)
         self.noise_ = None
+        self.__dict__.pop("_cast_cache", None)
 
         if self.noise:
             # The noise component of this kernel should be set to zero
@@ -229,10 +513,6 @@ class GaussianProcessRegressor(sk_GaussianProcessRegressor):
                     self.kernel_.set_params(
                         **{white_param: WhiteKernel(noise_level=0.0)})
 
-        # Precompute arrays needed at prediction
-        L_inv = solve_triangular(self.L_.T, np.eye(self.L_.shape[0]))
-        self.K_inv_ = L_inv.dot(L_inv.T)
-
         if int(sklearn.__version__[0]) == 0: # If on version 0.24.2
             self.y_train_mean_ = self._y_train_mean
             self.y_train_std_ = self._y_train_std
@@ -248,8 +528,142 @@ class GaussianProcessRegressor(sk_GaussianProcessRegressor):
 
         return self
 
+    def _fit_parallel_restarts(self, X, y, cache=None):
+        """Fit as sklearn does, but with the optimizer runs from the initial
+        and the `n_restarts_optimizer` random hyperparameters run in
+        parallel threads, which share the cache of squared differences
+        `cache` of the fit."""
+        optimizer = self.optimizer
+        kernel = self.kernel
+        # Fit with the initial hyperparameters to set up the training data
+        # and draw the random starting points as sklearn would
+        self.optimizer = None
+        try:
+            super(GaussianProcessRegressor, self).fit(X, y)
+        finally:
+            self.optimizer = optimizer
+        if self.kernel_.n_dims == 0:
+            return
+
+        bounds = self.kernel_.bounds
+        if not np.isfinite(bounds).all():
+            raise ValueError(
+                "Multiple optimizer restarts (n_restarts_optimizer>0) "
+                "requires that all bounds are finite.")
+        initial_thetas = [self.kernel_.theta] + [
+            self._rng.uniform(bounds[:, 0], bounds[:, 1])
+            for _ in range(self.n_restarts_optimizer)
+        ]
+
+        # The kernel is cloned in each evaluation, so that the threads do
+        # not share it. They share the cache of the squared differences of
+        # this fit.
+        def obj_func(theta, eval_gradient=True):
+            with _cache_squared_differences(cache):
+                if eval_gradient:
+                    lml, grad = self.log_marginal_likelihood(
+                        theta, eval_gradient=True)
+                    return -lml, -grad
+                return -self.log_marginal_likelihood(theta)
+
+        optima = Parallel(n_jobs=self.n_jobs, prefer="threads")(
+            delayed(self._constrained_optimization)(obj_func, theta, bounds)
+            for theta in initial_thetas
+        )
+        lml_values = [lml for _, lml in optima]
+        theta = optima[np.argmin(lml_values)][0]
+
+        # Refit with the best hyperparameters
+        self.kernel = kernel.clone_with_theta(theta)
+        self.optimizer = None
+        try:
+            super(GaussianProcessRegressor, self).fit(X, y)
+        finally:
+            self.optimizer = optimizer
+            self.kernel = kernel
+        self.kernel_._check_bounds_params()
+
+    def _posterior_points(self):
+        """Return the points X_p in which the posterior is expressed, i.e.
+        ``y_mean = K(X, X_p) alpha_``. These are the training points."""
+        return self.X_train_
+
+    def _posterior_solve(self, K):
+        """Return ``K^-1 K`` for the kernel matrix K of the training
+        points."""
+        return cho_solve((self.L_, GPR_CHOLESKY_LOWER), K, check_finite=False)
+
+    def _cast(self, name, dtype):
+        """Return the array attribute `name` in `dtype`.
+
+        The cast copy is cached until the attribute changes, so that a
+        single-precision prediction does not copy the Cholesky factor for
+        every batch of query points."""
+        array = getattr(self, name)
+        if array.dtype == dtype:
+            return array
+        cache = self.__dict__.get("_cast_cache", {})
+        cached = cache.get(name)
+        if cached is None or cached[0] is not array or cached[1].dtype != dtype:
+            cached = (array, array.astype(dtype))
+            # A new dict, as copies of the model share the old one
+            self._cast_cache = dict(cache, **{name: cached})
+        return cached[1]
+
+    def _cross_kernel(self, X, dtype=np.float64):
+        """Return the kernel between `X` and the posterior points in
+        `dtype`.
+
+        The kernels are evaluated in double precision, so in single
+        precision the kernel is evaluated in chunks of rows that are written
+        into the result, and no double-precision copy of the whole kernel is
+        held."""
+        X_p = self._posterior_points()
+        if dtype == np.float64:
+            return self.kernel_(X, X_p)
+        K_trans = np.empty((X.shape[0], X_p.shape[0]), dtype=dtype)
+        # About 8 MB of double-precision kernel per chunk
+        chunk_size = max(1, 2 ** 20 // X_p.shape[0])
+        for batch in gen_batches(X.shape[0], chunk_size):
+            K_trans[batch] = self.kernel_(X[batch], X_p)
+        return K_trans
+
+    def _explained_cov(self, K_trans, diag=False):
+        """Return the reduction of the prior covariance at the query points
+        by the observations, ``K_trans K^-1 K_trans^T``, or its diagonal."""
+        # Alg 2.1, page 19, line 5 -> v = L \ K(X_test, X_train)^T
+        V = solve_triangular(
+            self._cast("L_", K_trans.dtype),
+            K_trans.T,
+            lower=GPR_CHOLESKY_LOWER,
+            check_finite=False
+        )
+        if diag:
+            # Use einsum to avoid explicitly forming the large matrix
+            # V^T @ V just to extract its diagonal afterward.
+            return np.einsum("ij,ji->i", V.T, V)
+        # Alg 2.1, page 19, line 6 -> K(X_test, X_test) - v^T. v
+        return V.T @ V
+
+    def _white_noise_level(self, kernel=None):
+        """Return the noise level of the WhiteKernel currently in `kernel_`,
+        or in `kernel` if given.
+
+        This is zero after fitting, and `noise_` after the observational
+        noise has been added back to the kernel.
+        """
+        if kernel is None:
+            kernel = self.kernel_
+        if isinstance(kernel, WhiteKernel):
+            return kernel.noise_level
+        white_present, white_param = _param_for_white_kernel_in_Sum(kernel)
+        if white_present:
+            return kernel.get_params()[white_param].noise_level
+        return 0.0
+
     def predict(self, X, return_std=False, return_cov=False,
-                return_mean_grad=False, return_std_grad=False):
+                return_mean_grad=False, return_std_grad=False,
+                return_noisy_std=False, dtype=np.float64):
         """
         Predict output for X.
 
@@ -258,6 +672,12 @@ class GaussianProcessRegressor(sk_GaussianProcessRegressor):
         the gradient of the mean and the standard-deviation with respect to X
         can be optionally provided.
 
+        With return_noisy_std=True the standard deviation of both the
+        latent function and of noisy observations are returned. Both are
+        computed from the same kernel evaluations, using the fitted noise
+        level `noise_`, regardless of whether the observational noise has
+        been added to `kernel_`.
+
         Parameters
         ----------
         * `X` [array-like, shape = (n_samples, n_features)]:
@@ -273,11 +693,22 @@ class GaussianProcessRegressor(sk_GaussianProcessRegressor):
 
         * `return_mean_grad` [bool, default: False]:
             Whether or not to return the gradient of the mean.
-            Only valid when X is a single point.
 
         * `return_std_grad` [bool, default: False]:
             Whether or not to return the gradient of the std.
-            Only valid when X is a single point.
+
+        * `return_noisy_std` [bool, default: False]:
+            If True, `y_std` is the standard deviation of the latent function
+            without observational noise, and the standard deviation of noisy
+            observations is returned after it. Requires return_std=True.
+
+        * `dtype` [np.float64 or np.float32, default: np.float64]:
+            The precision of the kernel between the query points and the
+            training points, and of the products and solves with it.
+            np.float32 halves the memory and speeds up the solves for many
+            training points, at the cost of accuracy, which is mostly useful
+            to rank many query points. When gradients are requested the
+            prediction is made in double precision.
 
         Returns
         -------
@@ -288,15 +719,21 @@ class GaussianProcessRegressor(sk_GaussianProcessRegressor):
             Standard deviation of predictive distribution at query points.
             Only returned when return_std is True.
 
+        * `y_noisy_std` [array, shape = (n_samples,), optional]:
+            Standard deviation of noisy observations at query points.
+            Only returned when return_noisy_std is True.
+
         * `y_cov` [array, shape = (n_samples, n_samples), optional]:
             Covariance of joint predictive distribution a query points.
             Only returned when return_cov is True.
 
         * `y_mean_grad` [shape = (n_samples, n_features)]:
-            The gradient of the predicted mean
+            The gradient of the predicted mean at each query point. When X
+            is a single point the shape is (n_features,).
 
         * `y_std_grad` [shape = (n_samples, n_features)]:
-            The gradient of the predicted std.
+            The gradient of the predicted std at each query point. When X
+            is a single point the shape is (n_features,).
         """
         if return_std and return_cov:
             raise RuntimeError(
@@ -308,9 +745,25 @@ class GaussianProcessRegressor(sk_GaussianProcessRegressor):
                 "Not returning std_gradient without returning "
                 "the std.")
 
+        if return_noisy_std and not return_std:
+            raise ValueError(
+                "Not returning noisy std without returning "
+                "the std.")
+
         X = check_array(X)
-        if X.shape[0] != 1 and (return_mean_grad or return_std_grad):
-            raise ValueError("Not implemented for n_samples > 1")
+        if return_mean_grad or return_std_grad:
+            # The gradient of the std divides by the std, which loses too
+            # much accuracy in single precision
+            dtype = np.float64
+
+        if hasattr(self, "X_train_") and not return_cov:
+            batches = self._predict_batches(X, return_mean_grad, dtype)
+            if len(batches) > 1:
+                return self._predict_in_batches(
+                    X, batches, return_std=return_std,
+                    return_mean_grad=return_mean_grad,
+                    return_std_grad=return_std_grad,
+                    return_noisy_std=return_noisy_std, dtype=dtype)
 
         if not hasattr(self, "X_train_"):  # Not fit; predict based on GP prior
             y_mean = np.zeros(X.shape[0])
@@ -319,13 +772,17 @@ class GaussianProcessRegressor(sk_GaussianProcessRegressor):
                 return y_mean, y_cov
             elif return_std:
                 y_var = self.kernel.diag(X)
+                if return_noisy_std:
+                    # No noise has been estimated without fitting
+                    return y_mean, np.sqrt(y_var), np.sqrt(y_var)
                 return y_mean, np.sqrt(y_var)
             else:
                 return y_mean
 
         else:  # Predict based on GP posterior
-            K_trans = self.kernel_(X, self.X_train_)
-            y_mean = K_trans @ self.alpha_    # Line 4 (y_mean = f_star)
+            K_trans = self._cross_kernel(X, dtype)
+            # Line 4 (y_mean = f_star)
+            y_mean = K_trans @ self.alpha_.astype(dtype, copy=False)
             # undo normalisation
             y_mean = self.y_train_std_ * y_mean + self.y_train_mean_
             #self.y_train_mean_ deviates from pure sklearn implementation.
@@ -335,17 +792,8 @@ class GaussianProcessRegressor(sk_GaussianProcessRegressor):
             if y_mean.ndim > 1 and y_mean.shape[1] == 1:
                 y_mean = np.squeeze(y_mean, axis=1)
 
-            # Alg 2.1, page 19, line 5 -> v = L \ K(X_test, X_train)^T
-            V = solve_triangular(
-                self.L_,
-                K_trans.T,
-                lower=GPR_CHOLESKY_LOWER,
-                check_finite=False
-            )
-
             if return_cov:
-                # Alg 2.1, page 19, line 6 -> K(X_test, X_test) - v^T. v
-                y_cov = self.kernel_(X) - V.T @ V
+                y_cov = self.kernel_(X) - self._explained_cov(K_trans)
 
                 # undo normalisation
                 y_cov = np.outer(y_cov, self.y_train_std_**2).reshape(
@@ -360,10 +808,12 @@ class GaussianProcessRegressor(sk_GaussianProcessRegressor):
 
             elif return_std:
                 # Compute variance of predictive distribution
-                # Use einsum to avoid explicitly forming the large matrix
-                # V^T @ V just to extract its diagonal afterward.
-                y_var = self.kernel_.diag(X)
-                y_var -= np.einsum("ij,ji->i", V.T, V)
+                y_var = self.kernel_.diag(X).astype(dtype, copy=False)
+                y_var -= self._explained_cov(K_trans, diag=True)
+                if return_noisy_std:
+                    # The WhiteKernel only contributes to the diagonal, so
+                    # K_trans is the same with and without noise
+                    y_var -= self._white_noise_level()
 
                 # Check if any of the variances is negative because of
                 # numerical issues. If yes: set the variance to 0.
@@ -375,6 +825,9 @@ class GaussianProcessRegressor(sk_GaussianProcessRegressor):
                     )
                     y_var[y_var_negative] = 0.0
 
+                if return_noisy_std:
+                    y_noisy_var = y_var + (self.noise_ or 0.0)
+
                 # undo normalisation
                 y_var = np.outer(y_var, self.y_train_std_**2).reshape(
                     *y_var.shape, -1
@@ -386,28 +839,293 @@ class GaussianProcessRegressor(sk_GaussianProcessRegressor):
                 
                 y_std = np.sqrt(y_var)
 
+                if return_noisy_std:
+                    y_noisy_var = np.outer(
+                        y_noisy_var, self.y_train_std_**2
+                    ).reshape(*y_noisy_var.shape, -1)
+                    if y_noisy_var.shape[1] == 1:
+                        y_noisy_var = np.squeeze(y_noisy_var, axis=1)
+                    y_noisy_std = np.sqrt(y_noisy_var)
+
             if return_mean_grad:
-                grad = self.kernel_.gradient_x(X[0], self.X_train_)
-                grad_mean = np.dot(grad.T, self.alpha_)
+                # size = (n_samples, n_train_samples, n_features)
+                grad = self.kernel_.gradient_x(X, self._posterior_points())
+                grad_mean = np.tensordot(grad, self.alpha_, axes=(1, 0))
                 # undo normalisation
                 grad_mean = grad_mean * self.y_train_std_
+                if X.shape[0] == 1:
+                    grad_mean = grad_mean[0]
 
                 if return_std_grad:
-                    grad_std = np.zeros(X.shape[1])
-                    if not np.allclose(y_std, grad_std):
-                        grad_std = -np.dot(K_trans,
-                                           np.dot(self.K_inv_, grad))[0] / y_std
+                    grad_std = np.zeros(X.shape)
+                    nonzero = ~np.isclose(y_std, 0.0)
+                    if np.any(nonzero):
+                        # K^-1 K(X_train, X), one column per query point
+                        K_inv_K_trans = self._posterior_solve(
+                            K_trans[nonzero].T)
+                        grad_std[nonzero] = -np.einsum(
+                            "ji,ijk->ik", K_inv_K_trans, grad[nonzero])
+                        grad_std[nonzero] /= y_std[nonzero, np.newaxis]
                         # undo normalisation
                         grad_std = grad_std * self.y_train_std_**2
+                    if X.shape[0] == 1:
+                        grad_std = grad_std[0]
+                    if return_noisy_std:
+                        return y_mean, y_std, y_noisy_std, grad_mean, grad_std
                     return y_mean, y_std, grad_mean, grad_std
 
-                if return_std:
+                if return_noisy_std:
+                    return y_mean, y_std, y_noisy_std, grad_mean
+                elif return_std:
                     return y_mean, y_std, grad_mean
                 else:
                     return y_mean, grad_mean
 
             else:
-                if return_std:
+                if return_noisy_std:
+                    return y_mean, y_std, y_noisy_std
+                elif return_std:
                     return y_mean, y_std
                 else:
                     return y_mean
+
+    def sample_marginal(self, X, n_samples=1, random_state=0):
+        """Draw samples from the predictive distribution at each point of
+        `X` independently.
+
+        Unlike `sample_y`, which draws from the joint distribution of all
+        points with the full predictive covariance, this only needs the
+        predicted mean and standard deviation. Use it when the points are
+        treated independently, e.g. for many samples at a single point.
+
+        Parameters
+        ----------
+        * `X` [array-like, shape = (n_samples_X, n_features)]:
+            Query points where the GP is evaluated.
+
+        * `n_samples` [int, default: 1]:
+            The number of samples drawn at each query point.
+
+        * `random_state` [int, RandomState instance or None, default: 0]:
+            Determines the random number generation to draw the samples.
+
+        Returns
+        -------
+        * `y_samples` [array, shape = (n_samples_X, [n_output_dims], n_samples)]:
+            Values of `n_samples` samples drawn at each query point.
+        """
+        rng = check_random_state(random_state)
+        y_mean, y_std = self.predict(X, return_std=True)
+        return rng.normal(
+            y_mean[..., np.newaxis], y_std[..., np.newaxis],
+            size=y_mean.shape + (n_samples,))
+
+    def sample_functions(self, n_samples=1, n_features=1000,
+                         random_state=0):
+        """Draw functions from the posterior, approximated with random
+        Fourier features of the kernel.
+
+        Each function is a linear model on the same `n_features` features,
+        so it can be evaluated, with exact gradients, at many points at a
+        cost that does not depend on the number of training points. This
+        suits Thompson sampling, where a function is drawn and minimised.
+        The kernel must be a Matern or RBF kernel, optionally scaled by a
+        ConstantKernel.
+
+        Parameters
+        ----------
+        * `n_samples` [int, default: 1]:
+            The number of functions drawn.
+
+        * `n_features` [int, default: 1000]:
+            The number of random Fourier features. More features approximate
+            the kernel better.
+
+        * `random_state` [int, RandomState instance or None, default: 0]:
+            Determines the random number generation to draw the functions.
+
+        Returns
+        -------
+        * `functions` [FourierFeatureSamples]:
+            Callable with points of shape (n_points, n_dims), returning the
+            values of the functions, shape (n_points, n_samples), and with
+            ``return_grad=True`` their gradients, shape
+            (n_points, n_samples, n_dims).
+        """
+        y = self.y_train_
+        if y.ndim > 1:
+            if y.shape[1] > 1:
+                raise ValueError(
+                    "Functions can only be drawn from a single output")
+            y = y[:, 0]
+        noise = (self.noise_ or self._white_noise_level()) + self.alpha
+        return fourier_feature_samples(
+            self.X_train_, y, self.kernel_, noise, n_samples=n_samples,
+            n_features=n_features,
+            y_mean=float(np.squeeze(self.y_train_mean_)),
+            y_std=float(np.squeeze(self.y_train_std_)),
+            random_state=random_state)
+
+    def _predict_std_bound(self, X):
+        """Return the predicted mean at `X` and an upper bound of the
+        predicted standard deviation, at about the cost of the mean.
+
+        The bound is the standard deviation conditioned on only the training
+        point that reduces it the most, as conditioning on more points can
+        only reduce the variance further."""
+        X = check_array(X)
+        # The diagonal of the kernel the model was fitted with, including
+        # the noise
+        K_diag = np.einsum("ij,ij->i", self.L_, self.L_)
+        y_mean = np.empty((X.shape[0],) + self.alpha_.shape[1:])
+        y_var = np.empty(X.shape[0])
+        for batch in self._predict_batches(X):
+            K_trans = self.kernel_(X[batch], self.X_train_)
+            y_mean[batch] = K_trans @ self.alpha_
+            y_var[batch] = self.kernel_.diag(X[batch]) - np.max(
+                K_trans ** 2 / K_diag, axis=1)
+        y_mean = self.y_train_std_ * y_mean + self.y_train_mean_
+        if y_mean.ndim > 1 and y_mean.shape[1] == 1:
+            y_mean = np.squeeze(y_mean, axis=1)
+        y_std = np.sqrt(np.maximum(y_var, 0.0)) * np.squeeze(self.y_train_std_)
+        return y_mean, y_std
+
+    def _predict_cached(self, X, cache=None):
+        """Return the predicted mean and standard deviation at `X`, and a
+        cache that makes predicting at the same `X` with a later model
+        cheaper.
+
+        The cache holds ``V = L_^-1 K(X_train_, X)``. If the model that
+        returned `cache` had the same hyperparameters, and its training
+        points are the first training points of this model, as after a fit
+        with fixed hyperparameters or `condition_on`, only the rows of `V`
+        of the new training points are computed. For m new of n training
+        points this costs O(m n) per query point instead of O(n^2)."""
+        X = check_array(X)
+        # The zeroed WhiteKernel has a log-transformed noise level of -inf
+        with np.errstate(divide="ignore"):
+            theta = self.kernel_.theta
+        n = 0
+        if (
+            cache is not None
+            and np.array_equal(cache["X"], X)
+            and np.allclose(cache["theta"], theta, rtol=0, atol=1e-10)
+        ):
+            n = len(cache["X_train"])
+            if not (
+                n <= len(self.X_train_)
+                and np.array_equal(self.X_train_[:n], cache["X_train"])
+                and np.allclose(self.L_[:n, :n], cache["L"])
+            ):
+                n = 0
+
+        # Rows of the forward substitution with the Cholesky factor, where
+        # the first n rows are those of the cached model
+        V = np.empty((len(self.X_train_), X.shape[0]))
+        if n > 0:
+            V[:n] = cache["V"]
+        if n < len(self.X_train_):
+            V[n:] = solve_triangular(
+                self.L_[n:, n:],
+                self.kernel_(self.X_train_[n:], X) - self.L_[n:, :n] @ V[:n],
+                lower=GPR_CHOLESKY_LOWER, check_finite=False)
+
+        # K_trans alpha_ = V^T L_^-1 y_train_
+        y_mean = V.T @ solve_triangular(
+            self.L_, self.y_train_, lower=GPR_CHOLESKY_LOWER,
+            check_finite=False)
+        y_mean = self.y_train_std_ * y_mean + self.y_train_mean_
+        if y_mean.ndim > 1 and y_mean.shape[1] == 1:
+            y_mean = np.squeeze(y_mean, axis=1)
+        y_var = self.kernel_.diag(X) - np.einsum("ij,ij->j", V, V)
+        y_std = np.sqrt(np.maximum(y_var, 0.0)) * np.squeeze(self.y_train_std_)
+
+        cache = {
+            "X": X, "theta": theta, "X_train": self.X_train_, "L": self.L_,
+            "V": V,
+        }
+        return y_mean, y_std, cache
+
+    def _predict_batches(self, X, return_mean_grad=False, dtype=np.float64):
+        """Split the query points `X` into batches whose kernel with the
+        training points, and its gradient, fit in `working_memory`."""
+        n_posterior = len(self._posterior_points())
+        # K_trans, the solve against the Cholesky factor and its result,
+        # and the gradient of K_trans with its temporaries. In single
+        # precision K_trans is evaluated in chunks of bounded size.
+        row_bytes = 3 * np.dtype(dtype).itemsize * n_posterior
+        if return_mean_grad:
+            row_bytes += 8 * n_posterior * 2 * X.shape[1]
+        batch_size = get_chunk_n_rows(
+            row_bytes, working_memory=self.working_memory)
+        # With at least two points per batch the gradients of each batch
+        # keep their (n_samples, n_features) shape
+        return list(gen_batches(
+            X.shape[0], max(batch_size, 2), min_batch_size=2))
+
+    def _predict_in_batches(self, X, batches, **kwargs):
+        """Return ``predict(X, **kwargs)``, computed for each batch of `X`
+        separately, in parallel threads if `n_jobs` is set."""
+        if self.n_jobs in (None, 1):
+            results = [self.predict(X[batch], **kwargs) for batch in batches]
+        else:
+            # numpy and BLAS release the GIL for the heavy lifting
+            results = Parallel(n_jobs=self.n_jobs, prefer="threads")(
+                delayed(self.predict)(X[batch], **kwargs)
+                for batch in batches)
+        if not isinstance(results[0], tuple):
+            return np.concatenate(results)
+        return tuple(np.concatenate(result) for result in zip(*results))
+
+    def joint_posterior_gradient(self, X, mean_weights, cov_weights):
+        """Gradient of a weighted sum of the joint posterior at X.
+
+        Computes the gradient with respect to the query points `X` of
+        ``sum_i mean_weights[i] * y_mean[i] + sum_ij cov_weights[i, j] *
+        y_cov[i, j]``, where `y_mean` and `y_cov` are the mean and covariance
+        returned by ``predict(X, return_cov=True)``. With the weights being
+        the gradient of a function of the joint posterior with respect to
+        `y_mean` and `y_cov`, this is the gradient of that function with
+        respect to `X`. Only implemented for stationary kernels and a single
+        output.
+
+        Parameters
+        ----------
+        * `X` [array-like, shape = (n_samples, n_features)]:
+            Query points where the GP is evaluated.
+
+        * `mean_weights` [array-like, shape = (n_samples,)]:
+            Weights of the predicted means.
+
+        * `cov_weights` [array-like, shape = (n_samples, n_samples)]:
+            Weights of the entries of the predicted covariance.
+
+        Returns
+        -------
+        * `grad` [array, shape = (n_samples, n_features)]:
+            The gradient with respect to `X`.
+        """
+        X = check_array(X)
+        y_train_std = float(np.squeeze(self.y_train_std_))
+        # Both y_cov[i, j] and y_cov[j, i] depend on X[i]
+        cov_weights = np.asarray(cov_weights)
+        cov_weights = cov_weights + cov_weights.T
+
+        X_train = self._posterior_points()
+        K_inv_K_trans = self._posterior_solve(self.kernel_(X_train, X))
+
+        # size = (n_samples, n_train_samples, n_features)
+        grad_train = self.kernel_.gradient_x(X, X_train)
+        # size = (n_samples, n_samples, n_features)
+        grad_batch = self.kernel_.gradient_x(X, X)
+        # k(x, x) is constant for stationary kernels
+        diagonal = np.arange(X.shape[0])
+        grad_batch[diagonal, diagonal] = 0.0
+        # y_mean[i] = K(X[i], X_train) alpha_
+        grad = y_train_std * np.asarray(mean_weights)[:, np.newaxis] * (
+            np.tensordot(grad_train, self.alpha_, axes=(1, 0)))
+        # y_cov[i, j] = K(X[i], X[j]) - K(X[i], X_train) K_inv K(X_train, X[j])
+        grad_batch -= np.einsum("kj,ikd->ijd", K_inv_K_trans, grad_train)
+        grad += y_train_std ** 2 * np.einsum(
+            "ij,ijd->id", cov_weights, grad_batch)
+        return grad
@@ -1,3 +1,5 @@
+import threading
+from contextlib import contextmanager
 from math import sqrt
 
 import numpy as np
@@ -15,6 +17,164 @@ from sklearn.gaussian_process.kernels import RBF as sk_RBF
 from sklearn.gaussian_process.kernels import StationaryKernelMixin as sk_StationaryKernelMixin
 from sklearn.gaussian_process.kernels import Sum as sk_Sum
 from sklearn.gaussian_process.kernels import WhiteKernel as sk_WhiteKernel
+from sklearn.gaussian_process.kernels import _check_length_scale
+
+# Largest number of elements cached for one fit by each thread: the
+# squared differences, n_samples**2 * n_features, and a kernel matrix with
+# the factor of its gradient and the scaled squared distances,
+# 3 * n_samples**2
+MAX_CACHED_DIFFERENCES = 2 ** 24
+
+# The cache of the fit running in each thread, and the kernel matrix of the
+# last length scale the thread evaluated
+_current = threading.local()
+
+
+class _DifferenceCache(object):
+    """The squared differences of the points of one fit.
+
+    The attribute is replaced as a whole, so that threads running the
+    optimizer restarts of the same fit can share the cache."""
+
+    def __init__(self):
+        # (X, D) with ``D[i, j, k] = (X[i, k] - X[j, k])**2``
+        self.differences = None
+
+
+@contextmanager
+def _cache_squared_differences(cache=None):
+    """Context in which `RBF` and `Matern` cache the per-dimension squared
+    differences of the points they are evaluated on.
+
+    While fitting a Gaussian process the kernel is evaluated on the same
+    training points for every hyperparameter value the optimizer tries.
+    Within this context the squared differences of an array `X` are computed
+    on the first call ``k(X)``, and later calls with the same array only
+    rescale them with the length scales. The kernel matrix of the last
+    length scale of each thread is kept as well, so that the
+    log-marginal-likelihood and its gradient share it.
+
+    The cache only holds the points of one fit, and is only seen by the
+    thread that entered the context, so concurrent fits do not share it.
+    A nested context uses the cache of the outer one. The cache is yielded,
+    and can be passed to the context in other threads that work on the
+    same fit.
+    """
+    previous = getattr(_current, "cache", None)
+    previous_memo = getattr(_current, "memo", None)
+    if cache is None:
+        cache = previous if previous is not None else _DifferenceCache()
+    _current.cache = cache
+    try:
+        yield cache
+    finally:
+        _current.cache = previous
+        _current.memo = previous_memo if previous is cache else None
+
+
+def _squared_differences(X):
+    """Return the array `D` with ``D[i, j, k] = (X[i, k] - X[j, k])**2``
+    from the cache, or None if caching is not active or `X` is too large."""
+    cache = getattr(_current, "cache", None)
+    if cache is None or not isinstance(X, np.ndarray):
+        return None
+    differences = cache.differences
+    # The cache holds a reference to X, so its id can not be reused
+    if differences is not None and differences[0] is X:
+        return differences[1]
+    if (
+        X.ndim != 2
+        or X.shape[0] ** 2 * (X.shape[1] + 3) > MAX_CACHED_DIFFERENCES
+    ):
+        return None
+    D = (X[:, np.newaxis, :] - X[np.newaxis, :, :]) ** 2
+    cache.differences = (X, D)
+    return D
+
+
+def _memoize(X, key, compute):
+    """Return ``compute()``, cached with the squared differences of `X`
+    under `key` until it is called with another key. The result must not
+    be modified."""
+    cache = getattr(_current, "cache", None)
+    if cache is None:
+        return compute()
+    differences = cache.differences
+    if differences is None or differences[0] is not X:
+        return compute()
+    memo = getattr(_current, "memo", None)
+    if memo is not None and memo[0] is X and memo[1] == key:
+        return memo[2]
+    result = compute()
+    _current.memo = (X, key, result)
+    return result
+
+
+def _scaled_sq_dists(kernel, X, D):
+    """Return the squared distances between the points `X` scaled by the
+    length scales of `kernel`, computed from the squared differences `D`,
+    and the inverse squared length scales per dimension."""
+    length_scale = _check_length_scale(X, kernel.length_scale)
+    inv_sq_length_scale = np.broadcast_to(length_scale ** -2.0, (X.shape[1],))
+    return D @ inv_sq_length_scale, inv_sq_length_scale
+
+
+def _length_scale_gradient(kernel, D, sq_dists, inv_sq_length_scale, factor):
+    """Return the gradient of a stationary kernel with respect to the
+    log-transformed length scales, ``factor * D_k / length_scale_k**2`` for
+    each dimension k."""
+    n_samples = D.shape[0]
+    if kernel.hyperparameter_length_scale.fixed:
+        return np.empty((n_samples, n_samples, 0))
+    if not kernel.anisotropic:
+        return (factor * sq_dists)[..., np.newaxis]
+    K_gradient = D * factor[..., np.newaxis]
+    K_gradient *= inv_sq_length_scale
+    return K_gradient
+
+
+def _length_scale_contraction(kernel, D, sq_dists, inv_sq_length_scale,
+                              factor, W):
+    """Return the contraction of `W` with the gradient returned by
+    `_length_scale_gradient`, without forming the gradient."""
+    if kernel.hyperparameter_length_scale.fixed:
+        return np.empty(0)
+    W = W * factor
+    if not kernel.anisotropic:
+        return np.array([np.sum(W * sq_dists)])
+    return inv_sq_length_scale * (W.reshape(-1) @ D.reshape(-1, D.shape[2]))
+
+
+def _gradient_contraction(kernel, X, W):
+    """Return ``sum_ij W[i, j] * K_gradient[i, j]``, where `K_gradient` is
+    the gradient of ``kernel(X)`` with respect to the hyperparameters.
+
+    This is what the gradient of the log-marginal-likelihood needs. Kernels
+    of this module compute it without forming the (n_samples, n_samples,
+    n_hyperparameters) gradient where they can.
+    """
+    if isinstance(kernel, Kernel):
+        return kernel._gradient_contraction(X, W)
+    K_gradient = kernel(X, eval_gradient=True)[1]
+    return np.tensordot(W, K_gradient, axes=2)
+
+
+def _category_codes(X, Y):
+    """Return `X` and `Y` with the categories of each feature replaced by
+    integer codes, so that categories are compared as integers. If `Y` is
+    None or `X`, the codes of `X` are returned for both."""
+    if X.dtype.kind in "iub" and (Y is None or Y.dtype.kind in "iub"):
+        return X, X if Y is None else Y
+    if Y is None or Y is X:
+        X_codes = np.empty(X.shape, dtype=np.intp)
+        for j in range(X.shape[1]):
+            X_codes[:, j] = np.unique(X[:, j], return_inverse=True)[1]
+        return X_codes, X_codes
+    codes = np.empty((X.shape[0] + Y.shape[0], X.shape[1]), dtype=np.intp)
+    for j in range(X.shape[1]):
+        codes[:, j] = np.unique(
+            np.concatenate([X[:, j], Y[:, j]]), return_inverse=True)[1]
+    return codes[:X.shape[0]], codes[X.shape[0]:]
 
 
 class Kernel(sk_Kernel):
@@ -45,43 +205,84 @@ class Kernel(sk_Kernel):
     def __pow__(self, b):
         return Exponentiation(self, b)
 
+    def _gradient_contraction(self, X, W):
+        """See `_gradient_contraction`."""
+        K_gradient = self(X, eval_gradient=True)[1]
+        return np.tensordot(W, K_gradient, axes=2)
+
     def gradient_x(self, x, X_train):
         """
         Computes gradient of K(x, X_train) with respect to x
 
         Parameters
         ----------
-        x: array-like, shape=(n_features,)
-            A single test point.
+        x: array-like, shape=(n_features,) or (n_points, n_features)
+            A single test point, or a batch of test points.
 
         Y: array-like, shape=(n_samples, n_features)
             Training data used to fit the gaussian process.
 
         Returns
         -------
-        gradient_x: array-like, shape=(n_samples, n_features)
-            Gradient of K(x, X_train) with respect to x.
+        gradient_x: array-like, shape=(n_samples, n_features) or
+            (n_points, n_samples, n_features)
+            Gradient of K(x, X_train) with respect to x, for each of the
+            test points if `x` is a batch.
         """
         raise NotImplementedError
 
 
 class RBF(Kernel, sk_RBF):
+    def __call__(self, X, Y=None, eval_gradient=False):
+        D = _squared_differences(X) if Y is None else None
+        if D is None:
+            return super(RBF, self).__call__(X, Y, eval_gradient)
+
+        # Same as sklearn, but from the cached squared differences
+        K, factor, sq_dists, inv_sq_length_scale = self._from_differences(
+            X, D)
+        if not eval_gradient:
+            return K.copy()
+        return K.copy(), _length_scale_gradient(
+            self, D, sq_dists, inv_sq_length_scale, factor)
+
+    def _gradient_contraction(self, X, W):
+        D = _squared_differences(X)
+        if D is None:
+            return super(RBF, self)._gradient_contraction(X, W)
+        K, factor, sq_dists, inv_sq_length_scale = self._from_differences(
+            X, D)
+        return _length_scale_contraction(
+            self, D, sq_dists, inv_sq_length_scale, factor, W)
+
+    def _from_differences(self, X, D):
+        """Return the kernel matrix, the factor of its gradient (see
+        `_length_scale_gradient`), the scaled squared distances and the
+        inverse squared length scales."""
+        def compute():
+            sq_dists, inv_sq_length_scale = _scaled_sq_dists(self, X, D)
+            K = np.exp(-0.5 * sq_dists)
+            return K, K, sq_dists, inv_sq_length_scale
+
+        length_scale = np.asarray(self.length_scale, dtype=float)
+        return _memoize(X, ("RBF", length_scale.tobytes()), compute)
+
     def gradient_x(self, x, X_train):
         # diff = (x - X) / length_scale
-        # size = (n_train_samples, n_dimensions)
+        # size = (..., n_train_samples, n_dimensions)
         x = np.asarray(x)
         X_train = np.asarray(X_train)
 
         length_scale = np.asarray(self.length_scale)
-        diff = x - X_train
+        diff = x[..., np.newaxis, :] - X_train
         diff /= length_scale
 
         # e = -exp(0.5 * \sum_{i=1}^d (diff ** 2))
-        # size = (n_train_samples, 1)
-        exp_diff_squared = np.sum(diff**2, axis=1)
+        # size = (..., n_train_samples, 1)
+        exp_diff_squared = np.sum(diff**2, axis=-1)
         exp_diff_squared *= -0.5
         exp_diff_squared = np.exp(exp_diff_squared, exp_diff_squared)
-        exp_diff_squared = np.expand_dims(exp_diff_squared, axis=1)
+        exp_diff_squared = np.expand_dims(exp_diff_squared, axis=-1)
         exp_diff_squared *= -1
 
         # gradient = (e * diff) / length_scale
@@ -91,25 +292,82 @@ class RBF(Kernel, sk_RBF):
 
 
 class Matern(Kernel, sk_Matern):
+    def __call__(self, X, Y=None, eval_gradient=False):
+        D = self._squared_differences(X) if Y is None else None
+        if D is None:
+            return super(Matern, self).__call__(X, Y, eval_gradient)
+
+        # Same as sklearn, but from the cached squared differences
+        K, factor, sq_dists, inv_sq_length_scale = self._from_differences(
+            X, D)
+        if not eval_gradient:
+            return K.copy()
+        return K.copy(), _length_scale_gradient(
+            self, D, sq_dists, inv_sq_length_scale, factor)
+
+    def _gradient_contraction(self, X, W):
+        D = self._squared_differences(X)
+        if D is None:
+            return super(Matern, self)._gradient_contraction(X, W)
+        K, factor, sq_dists, inv_sq_length_scale = self._from_differences(
+            X, D)
+        return _length_scale_contraction(
+            self, D, sq_dists, inv_sq_length_scale, factor, W)
+
+    def _squared_differences(self, X):
+        # The general case is left to sklearn
+        if self.nu in [0.5, 1.5, 2.5, np.inf]:
+            return _squared_differences(X)
+        return None
+
+    def _from_differences(self, X, D):
+        """Return the kernel matrix, the factor of its gradient (see
+        `_length_scale_gradient`), the scaled squared distances and the
+        inverse squared length scales."""
+        def compute():
+            sq_dists, inv_sq_length_scale = _scaled_sq_dists(self, X, D)
+            if self.nu == 0.5:
+                dists = np.sqrt(sq_dists)
+                K = np.exp(-dists)
+                factor = np.zeros_like(K)
+                np.divide(K, dists, out=factor, where=dists != 0)
+            elif self.nu == 1.5:
+                tmp = np.sqrt(3 * sq_dists)
+                exp_tmp = np.exp(-tmp)
+                K = (1.0 + tmp) * exp_tmp
+                factor = 3 * exp_tmp
+            elif self.nu == 2.5:
+                tmp = np.sqrt(5 * sq_dists)
+                exp_tmp = np.exp(-tmp)
+                K = (1.0 + tmp + tmp ** 2 / 3.0) * exp_tmp
+                factor = 5.0 / 3.0 * (tmp + 1) * exp_tmp
+            else:
+                K = np.exp(-sq_dists / 2.0)
+                factor = K
+            return K, factor, sq_dists, inv_sq_length_scale
+
+        length_scale = np.asarray(self.length_scale, dtype=float)
+        return _memoize(X, ("Matern", self.nu, length_scale.tobytes()), compute)
+
     def gradient_x(self, x, X_train):
         x = np.asarray(x)
         X_train = np.asarray(X_train)
         length_scale = np.asarray(self.length_scale)
 
         # diff = (x - X_train) / length_scale
-        # size = (n_train_samples, n_dimensions)
-        diff = x - X_train
+        # size = (..., n_train_samples, n_dimensions)
+        diff = x[..., np.newaxis, :] - X_train
         diff /= length_scale
 
         # dist_sq = \sum_{i=1}^d (diff ^ 2)
         # dist = sqrt(dist_sq)
-        # size = (n_train_samples,)
-        dist_sq = np.sum(diff**2, axis=1)
+        # size = (..., n_train_samples)
+        dist_sq = np.sum(diff**2, axis=-1)
         dist = np.sqrt(dist_sq)
 
         if self.nu == 0.5:
             # e = -np.exp(-dist) / dist
-            # size = (n_train_samples, 1)
+            # size = (..., n_train_samples, 1)
             scaled_exp_dist = -dist
             scaled_exp_dist = np.exp(scaled_exp_dist, scaled_exp_dist)
             scaled_exp_dist *= -1
@@ -120,10 +378,10 @@ class Matern(Kernel, sk_Matern):
             # 2. (x_i - y_i) / \sum_{j=1}^D (x_i - y_i)**2 approaches 1.
             # Hence the gradient when for all i in [0, D),
             # x_i equals y_i is -1 / length_scale[i].
-            gradient = -np.ones((X_train.shape[0], x.shape[0]))
+            gradient = -np.ones(diff.shape)
             mask = dist != 0.0
             scaled_exp_dist[mask] /= dist[mask]
-            scaled_exp_dist = np.expand_dims(scaled_exp_dist, axis=1)
+            scaled_exp_dist = np.expand_dims(scaled_exp_dist, axis=-1)
             gradient[mask] = scaled_exp_dist[mask] * diff[mask]
             gradient /= length_scale
             return gradient
@@ -133,7 +391,7 @@ class Matern(Kernel, sk_Matern):
             # where f = 1 + sqrt(3) * euclidean((X - Y) / length_scale)
             # where g = exp(-sqrt(3) * euclidean((X - Y) / length_scale))
             sqrt_3_dist = sqrt(3) * dist
-            f = np.expand_dims(1 + sqrt_3_dist, axis=1)
+            f = np.expand_dims(1 + sqrt_3_dist, axis=-1)
 
             # When all of x_i equals y_i, f equals 1.0, (1 - f) equals
             # zero, hence from below
@@ -145,14 +403,14 @@ class Matern(Kernel, sk_Matern):
             sqrt_3_by_dist = np.zeros_like(dist)
             nzd = dist != 0.0
             sqrt_3_by_dist[nzd] = sqrt(3) / dist[nzd]
-            dist_expand = np.expand_dims(sqrt_3_by_dist, axis=1)
+            dist_expand = np.expand_dims(sqrt_3_by_dist, axis=-1)
 
             f_grad = diff / length_scale
             f_grad *= dist_expand
 
             sqrt_3_dist *= -1
             exp_sqrt_3_dist = np.exp(sqrt_3_dist, sqrt_3_dist)
-            g = np.expand_dims(exp_sqrt_3_dist, axis=1)
+            g = np.expand_dims(exp_sqrt_3_dist, axis=-1)
             g_grad = -g * f_grad
 
             # f * g_grad + g * f_grad (where g_grad = -g * f_grad)
@@ -169,7 +427,7 @@ class Matern(Kernel, sk_Matern):
             f2 = (5.0 / 3.0) * dist_sq
             f2 += sqrt_5_dist
             f2 += 1
-            f = np.expand_dims(f2, axis=1)
+            f = np.expand_dims(f2, axis=-1)
 
             # For i in [0, D) if x_i equals y_i
             # f = 1 and g = 1
@@ -187,7 +445,7 @@ class Matern(Kernel, sk_Matern):
             dist[nzd_mask] = np.reciprocal(nzd, nzd)
 
             dist *= sqrt(5)
-            dist = np.expand_dims(dist, axis=1)
+            dist = np.expand_dims(dist, axis=-1)
             diff /= length_scale
             f1_grad = dist * diff
             f2_grad = (10.0 / 3.0) * diff
@@ -195,7 +453,7 @@ class Matern(Kernel, sk_Matern):
 
             sqrt_5_dist *= -1
             g = np.exp(sqrt_5_dist, sqrt_5_dist)
-            g = np.expand_dims(g, axis=1)
+            g = np.expand_dims(g, axis=-1)
             g_grad = -g * f1_grad
             return f * g_grad + g * f_grad
 
@@ -209,19 +467,19 @@ class RationalQuadratic(Kernel, sk_RationalQuadratic):
         length_scale = self.length_scale
 
         # diff = (x - X_train) / length_scale
-        # size = (n_train_samples, n_dimensions)
-        diff = x - X_train
+        # size = (..., n_train_samples, n_dimensions)
+        diff = x[..., np.newaxis, :] - X_train
         diff /= length_scale
 
         # dist = -(1 + (\sum_{i=1}^d (diff^2) / (2 * alpha)))** (-alpha - 1)
-        # size = (n_train_samples,)
-        scaled_dist = np.sum(diff**2, axis=1)
+        # size = (..., n_train_samples)
+        scaled_dist = np.sum(diff**2, axis=-1)
         scaled_dist /= (2 * self.alpha)
         scaled_dist += 1
         scaled_dist **= (-alpha - 1)
         scaled_dist *= -1
 
-        scaled_dist = np.expand_dims(scaled_dist, axis=1)
+        scaled_dist = np.expand_dims(scaled_dist, axis=-1)
         diff_by_ls = diff / length_scale
         return scaled_dist * diff_by_ls
 
@@ -234,8 +492,8 @@ class ExpSineSquared(Kernel, sk_ExpSineSquared):
         length_scale = self.length_scale
         periodicity = self.periodicity
 
-        diff = x - X_train
-        sq_dist = np.sum(diff**2, axis=1)
+        diff = x[..., np.newaxis, :] - X_train
+        sq_dist = np.sum(diff**2, axis=-1)
         dist = np.sqrt(sq_dist)
 
         pi_by_period = dist * (np.pi / periodicity)
@@ -254,19 +512,29 @@ class ExpSineSquared(Kernel, sk_ExpSineSquared):
         nzd = dist != 0.0
         grad_wrt_theta[nzd] = np.pi / (periodicity * dist[nzd])
         return np.expand_dims(
-            grad_wrt_theta * exp_sine_squared * grad_wrt_exp, axis=1) * diff
+            grad_wrt_theta * exp_sine_squared * grad_wrt_exp, axis=-1) * diff
 
 
 class ConstantKernel(Kernel, sk_ConstantKernel):
 
+    def _gradient_contraction(self, X, W):
+        if self.hyperparameter_constant_value.fixed:
+            return np.empty(0)
+        return np.array([self.constant_value * np.sum(W)])
+
     def gradient_x(self, x, X_train):
-        return np.zeros_like(X_train)
+        return np.zeros(np.shape(x)[:-1] + np.shape(X_train))
 
 
 class WhiteKernel(Kernel, sk_WhiteKernel):
 
+    def _gradient_contraction(self, X, W):
+        if self.hyperparameter_noise_level.fixed:
+            return np.empty(0)
+        return np.array([self.noise_level * np.trace(W)])
+
     def gradient_x(self, x, X_train):
-        return np.zeros_like(X_train)
+        return np.zeros(np.shape(x)[:-1] + np.shape(X_train))
 
 
 class Exponentiation(Kernel, sk_Exponentiation):
@@ -277,13 +545,17 @@ class Exponentiation(Kernel, sk_Exponentiation):
         expo = self.exponent
         kernel = self.kernel
 
-        K = np.expand_dims(
-            kernel(np.expand_dims(x, axis=0), X_train)[0], axis=1)
+        K = kernel(np.atleast_2d(x), X_train).reshape(x.shape[:-1] + (-1, 1))
         return expo * K ** (expo - 1) * kernel.gradient_x(x, X_train)
 
 
 class Sum(Kernel, sk_Sum):
 
+    def _gradient_contraction(self, X, W):
+        return np.append(
+            _gradient_contraction(self.k1, X, W),
+            _gradient_contraction(self.k2, X, W))
+
     def gradient_x(self, x, X_train):
         return (
             self.k1.gradient_x(x, X_train) +
@@ -293,16 +565,22 @@ class Sum(Kernel, sk_Sum):
 
 class Product(Kernel, sk_Product):
 
+    def _gradient_contraction(self, X, W):
+        return np.append(
+            _gradient_contraction(self.k1, X, W * self.k2(X)),
+            _gradient_contraction(self.k2, X, W * self.k1(X)))
+
     def gradient_x(self, x, X_train):
         x = np.asarray(x)
-        x = np.expand_dims(x, axis=0)
         X_train = np.asarray(X_train)
+        # size = (..., n_train_samples, 1)
+        shape = x.shape[:-1] + (-1, 1)
         f_ggrad = (
-            np.expand_dims(self.k1(x, X_train)[0], axis=1) *
+            self.k1(np.atleast_2d(x), X_train).reshape(shape) *
             self.k2.gradient_x(x, X_train)
         )
         fgrad_g = (
-            np.expand_dims(self.k2(x, X_train)[0], axis=1) *
+            self.k2(np.atleast_2d(x), X_train).reshape(shape) *
             self.k1.gradient_x(x, X_train)
         )
         return f_ggrad + fgrad_g
@@ -311,7 +589,8 @@ class Product(Kernel, sk_Product):
 class DotProduct(Kernel, sk_DotProduct):
 
     def gradient_x(self, x, X_train):
-        return np.asarray(X_train)
+        X_train = np.asarray(X_train)
+        return np.zeros(np.shape(x)[:-1] + X_train.shape) + X_train
 
 
 class HammingKernel(sk_StationaryKernelMixin, sk_NormalizedKernelMixin,
@@ -373,17 +652,7 @@ class HammingKernel(sk_StationaryKernelMixin, sk_NormalizedKernelMixin,
             hyperparameter of the kernel. Only returned when eval_gradient
             is True.
         """
-        length_scale = self.length_scale
-        anisotropic = np.iterable(length_scale) and len(length_scale) > 1
-
-        if np.iterable(length_scale):
-            if len(length_scale) > 1:
-                length_scale = np.asarray(length_scale, dtype=float)
-            else:
-                length_scale = float(length_scale[0])
-        else:
-            length_scale = float(length_scale)
-
+        anisotropic, length_scale = self._length_scales()
         X = np.atleast_2d(X)
         if anisotropic and X.shape[1] != len(length_scale):
             raise ValueError(
@@ -400,22 +669,65 @@ class HammingKernel(sk_StationaryKernelMixin, sk_NormalizedKernelMixin,
         else:
             Y = np.atleast_2d(Y)
 
-        indicator = np.expand_dims(X, axis=1) != Y
-        kernel_prod = np.exp(-np.sum(length_scale * indicator, axis=2))
+        X, Y = _category_codes(X, Y)
+        distance = self._distance(X, Y, length_scale)
+        kernel_prod = np.exp(-distance)
+        if not eval_gradient:
+            return kernel_prod
 
         # dK / d theta = (dK / dl) * (dl / d theta)
         # theta = log(l) => dl / d (theta) = e^theta = l
-        # dK / d theta = l * dK / dl
+        # dK / d theta = l * dK / dl = -l * I(x_1j != x_2j) * K
+        if self.hyperparameter_length_scale.fixed:
+            return kernel_prod, np.empty((n_samples, n_samples, 0))
+        if not anisotropic:
+            return kernel_prod, -(kernel_prod * distance)[..., np.newaxis]
+        # Filled one feature at a time, without a boolean indicator tensor
+        grad = np.zeros((n_samples, n_samples, n_dim))
+        for j in range(n_dim):
+            mismatch = X[:, j, np.newaxis] != Y[:, j]
+            np.multiply(kernel_prod, -length_scale[j], out=grad[:, :, j],
+                        where=mismatch)
+        return kernel_prod, grad
+
+    def _gradient_contraction(self, X, W):
+        if self.hyperparameter_length_scale.fixed:
+            return np.empty(0)
+        anisotropic, length_scale = self._length_scales()
+        X, _ = _category_codes(np.atleast_2d(X), None)
+        distance = self._distance(X, X, length_scale)
+        W = -W * np.exp(-distance)
+        if not anisotropic:
+            return np.array([np.sum(W * distance)])
+        return np.array([
+            length_scale[j] * np.sum(W, where=X[:, j, np.newaxis] != X[:, j])
+            for j in range(X.shape[1])
+        ])
+
+    def _length_scales(self):
+        """Return whether the kernel is anisotropic, and the length scale as
+        a float or an array of floats."""
+        length_scale = self.length_scale
+        anisotropic = np.iterable(length_scale) and len(length_scale) > 1
 
-        # dK / dL computation
-        if anisotropic:
-            grad = (-np.expand_dims(kernel_prod, axis=-1) *
-                    np.array(indicator, dtype=np.float32))
+        if np.iterable(length_scale):
+            if len(length_scale) > 1:
+                length_scale = np.asarray(length_scale, dtype=float)
+            else:
+                length_scale = float(length_scale[0])
         else:
-            grad = -np.expand_dims(kernel_prod * np.sum(indicator, axis=2),
-                                   axis=-1)
-
-        grad *= length_scale
-        if eval_gradient:
-            return kernel_prod, grad
-        return kernel_prod
+            length_scale = float(length_scale)
+        return anisotropic, length_scale
+
+    def _distance(self, X, Y, length_scale):
+        """Return ``sum_j ls_j * I(X_ij != Y_kj)`` for the category codes
+        `X` and `Y`.
+
+        The sum is accumulated one feature at a time, so that no array
+        larger than (n_samples_X, n_samples_Y) is formed."""
+        length_scale = np.broadcast_to(length_scale, (X.shape[1],))
+        distance = np.zeros((X.shape[0], Y.shape[0]))
+        for j in range(X.shape[1]):
+            np.add(distance, length_scale[j], out=distance,
+                   where=X[:, j, np.newaxis] != Y[:, j])
+        return distance
@@ -0,0 +1,344 @@
+import numpy as np
+from copy import copy
+
+from scipy.linalg import cholesky
+from scipy.linalg import solve_triangular
+
+from sklearn.utils import check_array
+from sklearn.utils import check_random_state
+from sklearn.utils import check_X_y
+
+from sklearn.preprocessing._data import _handle_zeros_in_scale
+
+from .gpr import GaussianProcessRegressor
+
+
+class SparseGaussianProcessRegressor(GaussianProcessRegressor):
+    """
+    Sparse GaussianProcessRegressor for large numbers of observations.
+
+    The posterior is approximated with the variational free energy (VFE)
+    approximation of Titsias (2009), in which the observations are only
+    seen by the model through a set of `m` inducing points. Fitting to `n`
+    observations then costs O(n m^2) instead of O(n^3), and predicting costs
+    O(m) per point instead of O(n).
+
+    The hyperparameters are found by fitting an exact Gaussian process to
+    a random subset of at most `subset_size` observations. The inducing
+    points are then selected from all observations by a pivoted Cholesky
+    factorisation of the kernel: each new inducing point is the observation
+    with the largest prior variance conditioned on the inducing points
+    selected so far. The selection stops early when all observations are
+    explained by the selected points. If all observations are inducing
+    points the model equals the exact Gaussian process.
+
+    Predictions, including the gradients of the mean and std, work as for
+    `GaussianProcessRegressor`.
+
+    Parameters
+    ----------
+    The parameters of `GaussianProcessRegressor`, except that `alpha` must
+    be a scalar, and:
+
+    * `n_inducing` [int, callable or None, default: None]:
+        The maximum number of inducing points. A callable is called with the
+        number of observations and returns the number of inducing points.
+        If None, ``max(100, 4 * sqrt(n_samples))`` inducing points are used.
+
+    * `subset_size` [int, default: 500]:
+        The maximum number of observations the hyperparameters are fitted
+        to.
+
+    Attributes
+    ----------
+    The attributes of `GaussianProcessRegressor`, except `L_` and `K_inv_`,
+    and:
+
+    * `inducing_points_` [array-like, shape = (n_inducing, n_features)]:
+        The inducing points, selected from ``X_train_``.
+
+    * `alpha_` [array-like, shape = (n_inducing,)]:
+        Coefficients of the inducing points in kernel space, so that the
+        predicted mean is ``K(X, inducing_points_) alpha_``.
+
+    * `L_uu_` [array-like, shape = (n_inducing, n_inducing)]:
+        Lower-triangular Cholesky decomposition of the kernel in
+        ``inducing_points_``.
+
+    * `L_B_` [array-like, shape = (n_inducing, n_inducing)]:
+        Lower-triangular Cholesky decomposition of ``I + A A^T``, where
+        ``A = L_uu_^-1 K(inducing_points_, X_train_) / sigma`` and `sigma`
+        is the standard deviation of the noise.
+
+    * `log_marginal_likelihood_value_` [float]:
+        The VFE lower bound of the log-marginal-likelihood of
+        ``self.theta_``.
+    """
+    # Whether the hyperparameters are being fitted to the subset of the
+    # observations, with the exact log-marginal-likelihood
+    _fitting_subset = False
+
+    def __init__(self, kernel=None, alpha=1e-10,
+                 optimizer="fmin_l_bfgs_b", n_restarts_optimizer=0,
+                 normalize_y=False, copy_X_train=True, random_state=None,
+                 noise=None, noise_level_bounds=(1e-5, 1e5), n_jobs=None,
+                 working_memory=None, n_inducing=None, subset_size=500):
+        self.n_inducing = n_inducing
+        self.subset_size = subset_size
+        super(SparseGaussianProcessRegressor, self).__init__(
+            kernel=kernel, alpha=alpha, optimizer=optimizer,
+            n_restarts_optimizer=n_restarts_optimizer,
+            normalize_y=normalize_y, copy_X_train=copy_X_train,
+            random_state=random_state, noise=noise,
+            noise_level_bounds=noise_level_bounds, n_jobs=n_jobs,
+            working_memory=working_memory)
+
+    def condition_on(self, X, y):
+        """Return a copy of the model conditioned on additional observations.
+
+        The hyperparameters, the normalisation of `y` and the inducing
+        points are kept fixed, so conditioning costs O(m^3) independently of
+        the number of observations.
+
+        Parameters
+        ----------
+        * `X` [array-like, shape = (n_new_samples, n_features)]:
+            Points at which to condition the model.
+
+        * `y` [array-like, shape = (n_new_samples, [n_output_dims])]:
+            Target values at `X`.
+
+        Returns
+        -------
+        * `model` [SparseGaussianProcessRegressor]:
+            The conditioned model.
+        """
+        if not hasattr(self, "X_train_"):
+            raise ValueError("The model has to be fitted before conditioning.")
+        X = check_array(X)
+        y = np.asarray(y, dtype=float).reshape(
+            (X.shape[0],) + self.y_train_.shape[1:])
+        y = (y - self.y_train_mean_) / self.y_train_std_
+
+        A = self._projection(X)
+        model = copy(self)
+        model.X_train_ = np.vstack([self.X_train_, X])
+        model.y_train_ = np.concatenate([self.y_train_, y])
+        model._A_AT = self._A_AT + A @ A.T
+        model._A_y = self._A_y + A @ y
+        model._y_y = self._y_y + np.sum(y ** 2, axis=0)
+        model._K_trace = self._K_trace + np.sum(self.kernel_.diag(X))
+        model._update_posterior()
+        return model
+
+    def _fit(self, X, y, theta=None, optimize=True):
+        if np.iterable(self.alpha):
+            raise ValueError(
+                "SparseGaussianProcessRegressor requires a scalar alpha.")
+        X, y = check_X_y(X, y, multi_output=True, y_numeric=True)
+
+        n_samples = X.shape[0]
+        if n_samples > self.subset_size:
+            rng = check_random_state(self.random_state)
+            subset = np.sort(
+                rng.choice(n_samples, self.subset_size, replace=False))
+        else:
+            subset = slice(None)
+        self._fitting_subset = True
+        try:
+            super(SparseGaussianProcessRegressor, self)._fit(
+                X[subset], y[subset], theta=theta, optimize=optimize)
+        finally:
+            self._fitting_subset = False
+        # The factorisation of the subset is replaced by the sparse posterior
+        del self.L_
+        self.__dict__.pop("_K_inv_cache", None)
+
+        if self.normalize_y:
+            self.y_train_mean_ = np.mean(y, axis=0)
+            self.y_train_std_ = _handle_zeros_in_scale(
+                np.std(y, axis=0), copy=False)
+        self.X_train_ = np.copy(X) if self.copy_X_train else X
+        self.y_train_ = (y - self.y_train_mean_) / self.y_train_std_
+
+        self.inducing_points_ = self._select_inducing_points(X)
+        self.L_uu_ = self._inducing_cholesky(self.kernel_)
+
+        A = self._projection(X)
+        self._A_AT = A @ A.T
+        self._A_y = A @ self.y_train_
+        self._y_y = np.sum(self.y_train_ ** 2, axis=0)
+        self._K_trace = np.sum(self.kernel_.diag(X))
+        self._update_posterior()
+        return self
+
+    def _select_inducing_points(self, X):
+        n_samples = X.shape[0]
+        if self.n_inducing is None:
+            n_inducing = max(100, int(4 * np.sqrt(n_samples)))
+        elif callable(self.n_inducing):
+            n_inducing = int(self.n_inducing(n_samples))
+        else:
+            n_inducing = self.n_inducing
+        n_inducing = min(n_inducing, n_samples)
+
+        # Pivoted Cholesky factorisation of K(X, X). `residual` is the
+        # variance at X conditioned on the points selected so far.
+        residual = self.kernel_.diag(X)
+        tol = 1e-8 * np.max(residual)
+        L = np.empty((n_inducing, n_samples))
+        selected = []
+        for i in range(n_inducing):
+            j = np.argmax(residual)
+            if residual[j] <= tol:
+                break
+            selected.append(j)
+            row = self.kernel_(X[j:j + 1], X)[0] - L[:i, j] @ L[:i]
+            L[i] = row / np.sqrt(residual[j])
+            residual -= L[i] ** 2
+            residual[j] = 0.0
+        return X[selected]
+
+    @property
+    def K_inv_(self):
+        raise AttributeError(
+            "SparseGaussianProcessRegressor has no exact inverse of the "
+            "kernel matrix, as its posterior is expressed in the inducing "
+            "points.")
+
+    @K_inv_.setter
+    def K_inv_(self, value):
+        GaussianProcessRegressor.K_inv_.fset(self, value)
+
+    def log_marginal_likelihood(self, theta=None, eval_gradient=False,
+                                clone_kernel=True):
+        """Return the VFE lower bound of the log-marginal likelihood of
+        `theta` for all training data, with the inducing points fixed.
+
+        This costs O(n m^2), like the fit, instead of the O(n^3) of the
+        exact log-marginal likelihood. Its gradient is not available.
+        While the hyperparameters are fitted, the exact log-marginal
+        likelihood of the subset of the observations is returned.
+        """
+        if self._fitting_subset:
+            return super(SparseGaussianProcessRegressor, self
+                         ).log_marginal_likelihood(
+                theta, eval_gradient, clone_kernel=clone_kernel)
+        if eval_gradient:
+            raise ValueError(
+                "The gradient of the VFE bound is not available.")
+        if theta is None:
+            return self.log_marginal_likelihood_value_
+
+        if clone_kernel:
+            kernel = self.kernel_.clone_with_theta(theta)
+        else:
+            kernel = self.kernel_
+            kernel.theta = theta
+        # The noise is given by the WhiteKernel in theta, and removed from
+        # the kernel of the inducing points and the diagonal
+        white = self._white_noise_level(kernel)
+        sigma2 = white + self.alpha
+        try:
+            L_uu = self._inducing_cholesky(kernel, white)
+        except np.linalg.LinAlgError:
+            return -np.inf
+        A = solve_triangular(
+            L_uu, kernel(self.inducing_points_, self.X_train_), lower=True,
+            check_finite=False) / np.sqrt(sigma2)
+        K_trace = np.sum(kernel.diag(self.X_train_)) - white * self.X_train_.shape[0]
+        try:
+            _, _, log_likelihood_dims = self._vfe_bound(
+                A @ A.T, A @ self.y_train_, np.sum(self.y_train_ ** 2, axis=0),
+                K_trace, sigma2)
+        except np.linalg.LinAlgError:
+            return -np.inf
+        return np.sum(log_likelihood_dims)
+
+    def _inducing_cholesky(self, kernel, white=0.0):
+        """Return the Cholesky factor of the kernel of the inducing points,
+        without the noise level `white` of its WhiteKernel."""
+        K_uu = kernel(self.inducing_points_)
+        K_uu[np.diag_indices_from(K_uu)] -= white
+        K_uu[np.diag_indices_from(K_uu)] += 1e-10 * np.mean(np.diag(K_uu))
+        return cholesky(K_uu, lower=True, check_finite=False)
+
+    def _noise_level(self):
+        # The WhiteKernel in `kernel_` is zeroed after fitting
+        return (self.noise_ or 0.0) + self.alpha
+
+    def _projection(self, X):
+        """Return ``A = L_uu_^-1 K(inducing_points_, X) / sigma``."""
+        K_uf = self.kernel_(self.inducing_points_, X)
+        A = solve_triangular(self.L_uu_, K_uf, lower=True, check_finite=False)
+        return A / np.sqrt(self._noise_level())
+
+    def _update_posterior(self):
+        """Compute `L_B_`, `alpha_` and the VFE bound from the sums over
+        the observations."""
+        self.L_B_, c, log_likelihood_dims = self._vfe_bound(
+            self._A_AT, self._A_y, self._y_y, self._K_trace,
+            self._noise_level())
+        self.alpha_ = solve_triangular(
+            self.L_uu_,
+            solve_triangular(
+                self.L_B_, c, lower=True, trans="T", check_finite=False),
+            lower=True, trans="T", check_finite=False)
+        self._log_likelihood_values = log_likelihood_dims
+        self.log_marginal_likelihood_value_ = np.sum(log_likelihood_dims)
+
+    def _vfe_bound(self, A_AT, A_y, y_y, K_trace, sigma2):
+        """Return `L_B_`, ``c = L_B_^-1 A y / sigma`` and the VFE bound of
+        each output from the sums over the observations."""
+        n_samples = self.X_train_.shape[0]
+        B = A_AT + np.eye(A_AT.shape[0])
+        L_B = cholesky(B, lower=True, check_finite=False)
+        c = solve_triangular(L_B, A_y, lower=True, check_finite=False)
+        c /= np.sqrt(sigma2)
+        log_likelihood_dims = (
+            -0.5 * y_y / sigma2
+            + 0.5 * np.sum(c ** 2, axis=0)
+            - np.log(np.diag(L_B)).sum()
+            - n_samples / 2 * np.log(2 * np.pi * sigma2)
+            - 0.5 * (K_trace / sigma2 - np.trace(A_AT))
+        )
+        return L_B, c, log_likelihood_dims
+
+    def _log_likelihood_dims(self):
+        return self._log_likelihood_values
+
+    def _predict_std_bound(self, X):
+        # The predicted variance is at most the prior variance
+        y_mean = self.predict(X)
+        y_std = np.sqrt(self.kernel_.diag(check_array(X)))
+        return y_mean, y_std * np.squeeze(self.y_train_std_)
+
+    def _predict_cached(self, X, cache=None):
+        # The inducing points change with every fit, so nothing is cached
+        y_mean, y_std = self.predict(X, return_std=True)
+        return y_mean, y_std, None
+
+    def _posterior_points(self):
+        return self.inducing_points_
+
+    def _posterior_solve(self, K):
+        # (K_uu^-1 - Sigma) K, with Sigma the posterior covariance of the
+        # inducing variables scaled by K_uu^-1 on both sides
+        V_uu = solve_triangular(self.L_uu_, K, lower=True, check_finite=False)
+        V_B = solve_triangular(self.L_B_, V_uu, lower=True, check_finite=False)
+        V_B = solve_triangular(
+            self.L_B_, V_B, lower=True, trans="T", check_finite=False)
+        return solve_triangular(
+            self.L_uu_, V_uu - V_B, lower=True, trans="T", check_finite=False)
+
+    def _explained_cov(self, K_trans, diag=False):
+        L_uu = self._cast("L_uu_", K_trans.dtype)
+        L_B = self._cast("L_B_", K_trans.dtype)
+        V_uu = solve_triangular(L_uu, K_trans.T, lower=True, check_finite=False)
+        V_B = solve_triangular(L_B, V_uu, lower=True, check_finite=False)
+        if diag:
+            return (
+                np.einsum("ij,ij->j", V_uu, V_uu)
+                - np.einsum("ij,ij->j", V_B, V_B)
+            )
+        return V_uu.T @ V_uu - V_B.T @ V_B
@@ -0,0 +1,186 @@
+import numpy as np
+
+
+def batch_fmin_l_bfgs_b(func, X0, bounds, m=10, factr=1e7, pgtol=1e-5,
+                        maxiter=20, max_linesearch=20):
+    """Minimize a function from several starting points at once.
+
+    Runs a projected L-BFGS from each row of `X0` in lockstep, so that the
+    function and its gradient are evaluated at the current points of all
+    starts in a single call. Variables at a bound whose gradient points out
+    of the bounds are held fixed, and the step along the L-BFGS direction is
+    projected onto the bounds and found by a backtracking line search. Each
+    start stops on its own, by the same criteria as `fmin_l_bfgs_b`.
+
+    Parameters
+    ----------
+    * `func` [callable]:
+        Called with an array of points of shape (n_points, n_dims) and
+        returns the function values, shape (n_points,), and the gradients,
+        shape (n_points, n_dims).
+
+    * `X0` [array, shape=(n_starts, n_dims)]:
+        The starting points.
+
+    * `bounds` [list of tuples, shape=(n_dims,)]:
+        The lower and upper bound of each dimension.
+
+    * `m` [int, default=10]:
+        The number of corrections kept for the inverse Hessian approximation.
+
+    * `factr` [float, default=1e7]:
+        A start stops when the relative reduction of the function is at most
+        ``factr`` times the machine precision.
+
+    * `pgtol` [float, default=1e-5]:
+        A start stops when the largest component of its projected gradient
+        is at most `pgtol`.
+
+    * `maxiter` [int, default=20]:
+        The maximum number of iterations of each start.
+
+    * `max_linesearch` [int, default=20]:
+        The maximum number of step halvings in a line search. A start whose
+        line search fails stops.
+
+    Returns
+    -------
+    * `X` [array, shape=(n_starts, n_dims)]:
+        The minima found from each start.
+
+    * `values` [array, shape=(n_starts,)]:
+        The function values at `X`.
+    """
+    X = np.array(X0, dtype=float)
+    n_starts, n_dims = X.shape
+    bounds = np.asarray(bounds, dtype=float)
+    lower, upper = bounds[:, 0], bounds[:, 1]
+    X = np.clip(X, lower, upper)
+    values, grads = func(X)
+    values = np.array(values, dtype=float)
+    grads = np.array(grads, dtype=float).reshape(n_starts, n_dims)
+
+    # The correction pairs of each start, in a ring buffer of length m
+    S = np.zeros((n_starts, m, n_dims))
+    Y = np.zeros((n_starts, m, n_dims))
+    rho = np.zeros((n_starts, m))
+    n_pairs = np.zeros(n_starts, dtype=int)
+    newest = np.full(n_starts, -1)
+
+    active = np.ones(n_starts, dtype=bool)
+    eps = np.finfo(float).eps
+    for _ in range(maxiter):
+        projected = X - np.clip(X - grads, lower, upper)
+        active &= np.max(np.abs(projected), axis=1) > pgtol
+        if not np.any(active):
+            break
+        idx = np.flatnonzero(active)
+
+        x, g = X[idx], grads[idx]
+        # Variables at a bound that the gradient pushes out of the bounds
+        fixed = ((x <= lower) & (g > 0)) | ((x >= upper) & (g < 0))
+        g_free = np.where(fixed, 0.0, g)
+        direction = -_two_loop(
+            g_free, S[idx], Y[idx], rho[idx], n_pairs[idx], newest[idx])
+        direction[fixed] = 0.0
+        # Restart from steepest descent if the direction goes uphill
+        uphill = np.einsum("ij,ij->i", direction, g) >= 0
+        direction[uphill] = -g_free[uphill]
+        n_pairs[idx[uphill]] = 0
+        # Without curvature information the first step is scaled to a
+        # length of at most 1, as in L-BFGS-B
+        step = np.ones(len(idx))
+        first = n_pairs[idx] == 0
+        step[first] = 1.0 / np.maximum(
+            np.linalg.norm(direction[first], axis=1), 1.0)
+
+        x_new, f_new, g_new, found = _backtrack(
+            func, x, values[idx], g, direction, step, lower, upper,
+            max_linesearch)
+
+        # Update the starts whose line search succeeded
+        s = x_new - x
+        y = g_new - g
+        sy = np.einsum("ij,ij->i", s, y)
+        yy = np.einsum("ij,ij->i", y, y)
+        update = found & (sy > eps * yy)
+        starts = idx[update]
+        newest[starts] = (newest[starts] + 1) % m
+        S[starts, newest[starts]] = s[update]
+        Y[starts, newest[starts]] = y[update]
+        rho[starts, newest[starts]] = 1.0 / sy[update]
+        n_pairs[starts] = np.minimum(n_pairs[starts] + 1, m)
+
+        reduction = (values[idx] - f_new) / np.maximum(
+            np.maximum(np.abs(values[idx]), np.abs(f_new)), 1.0)
+        X[idx[found]] = x_new[found]
+        values[idx[found]] = f_new[found]
+        grads[idx[found]] = g_new[found]
+        active[idx[~found]] = False
+        active[idx[found & (reduction <= factr * eps)]] = False
+
+    return X, values
+
+
+def _two_loop(g, S, Y, rho, n_pairs, newest):
+    """Return the product of the L-BFGS inverse Hessian approximation of
+    each start with its gradient `g`, by the two-loop recursion."""
+    n_starts, m, _ = S.shape
+    q = g.copy()
+    rows = np.arange(n_starts)
+    alpha = np.zeros((n_starts, m))
+    # From the newest to the oldest pair
+    for k in range(m):
+        used = k < n_pairs
+        j = (newest - k) % m
+        a = rho[rows, j] * np.einsum("ij,ij->i", S[rows, j], q)
+        a[~used] = 0.0
+        alpha[:, k] = a
+        q -= a[:, np.newaxis] * Y[rows, j]
+    # Scale by the curvature of the newest pair
+    j = newest % m
+    yy = np.einsum("ij,ij->i", Y[rows, j], Y[rows, j])
+    has_pairs = n_pairs > 0
+    gamma = np.ones(n_starts)
+    gamma[has_pairs] = 1.0 / (rho[rows, j] * yy)[has_pairs]
+    r = gamma[:, np.newaxis] * q
+    for k in reversed(range(m)):
+        used = k < n_pairs
+        j = (newest - k) % m
+        b = rho[rows, j] * np.einsum("ij,ij->i", Y[rows, j], r)
+        b[~used] = 0.0
+        r += (alpha[:, k] - b)[:, np.newaxis] * S[rows, j]
+    return r
+
+
+def _backtrack(func, x, f, g, direction, step, lower, upper, max_linesearch,
+               c1=1e-4):
+    """Find a step along the projected `direction` from each point of `x`
+    that satisfies the Armijo condition, halving the steps of the points
+    that do not. All points still searching are evaluated together."""
+    x_new = x.copy()
+    f_new = f.copy()
+    g_new = g.copy()
+    found = np.zeros(len(x), dtype=bool)
+    searching = np.arange(len(x))
+    for _ in range(max_linesearch):
+        trial = np.clip(
+            x[searching] + step[searching, np.newaxis] * direction[searching],
+            lower, upper)
+        f_trial, g_trial = func(trial)
+        f_trial = np.asarray(f_trial, dtype=float)
+        g_trial = np.asarray(g_trial, dtype=float).reshape(trial.shape)
+        # The decrease predicted by the gradient along the projected step
+        predicted = np.einsum(
+            "ij,ij->i", g[searching], trial - x[searching])
+        accept = (f_trial <= f[searching] + c1 * predicted) & (predicted < 0)
+        done = searching[accept]
+        x_new[done] = trial[accept]
+        f_new[done] = f_trial[accept]
+        g_new[done] = g_trial[accept]
+        found[done] = True
+        searching = searching[~accept]
+        if len(searching) == 0:
+            break
+        step[searching] /= 2
+    return x_new, f_new, g_new, found
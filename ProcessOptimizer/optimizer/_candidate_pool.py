@@ -0,0 +1,157 @@
+import numpy as np
+
+from scipy.stats import qmc
+
+from ..space.constraints import SumEquals
+from ..utils import get_random_generator
+
+
+class CandidatePool(object):
+    """Transformed candidate points at which an `Optimizer` evaluates the
+    acquisition function, kept between the points it suggests.
+
+    By default the whole pool is drawn anew every time candidates are
+    requested. With `refresh` < 1 only that fraction of the pool, the
+    points that have been in it the longest, is replaced, which spreads the
+    cost of sampling and transforming the points over several requests.
+    With `n_local` > 0, that many points are drawn around the incumbent on
+    every request, in addition to the `n_points` of the pool.
+
+    The pool is drawn from the space, or from the constraints passed to
+    `candidates`. It is drawn anew when the constraints change.
+
+    Parameters
+    ----------
+    * `space` [Space]:
+        The space the candidates are drawn from.
+
+    * `n_points` [int]:
+        The number of points in the pool.
+
+    * `refresh` [float, default=1.0]:
+        The fraction of the pool replaced on every request.
+
+    * `n_local` [int, default=0]:
+        The number of points drawn around the incumbent on every request.
+
+    * `local_scale` [float, default=0.1]:
+        The standard deviation of the perturbation of the incumbent, relative
+        to the width of the transformed bounds of each dimension.
+
+    * `quasi_random` [bool, default=False]:
+        Draw the points of a space without constraints from a scrambled
+        Halton sequence, which covers the space more evenly than random
+        points. The points are mapped to each dimension like in `space.rvs`,
+        and transformed one dimension at a time.
+    """
+
+    def __init__(self, space, n_points, refresh=1.0, n_local=0,
+                 local_scale=0.1, quasi_random=False):
+        if not 0 < refresh <= 1:
+            raise ValueError(
+                "Expected `refresh` to be in (0, 1], got %s" % refresh)
+        self.space = space
+        self.n_points = n_points
+        self.refresh = refresh
+        self.n_local = n_local
+        self.local_scale = local_scale
+        self.quasi_random = quasi_random
+        self.clear()
+
+    def clear(self):
+        """Remove all points from the pool."""
+        self._X = None
+        self._constraints = None
+        # The first row replaced by the next refresh
+        self._next_row = 0
+
+    def copy(self):
+        """Return a pool that is refreshed independently of this pool."""
+        pool = CandidatePool.__new__(CandidatePool)
+        # The points are never modified in place, so they can be shared
+        pool.__dict__.update(self.__dict__)
+        return pool
+
+    def candidates(self, random_state, constraints=None, incumbent=None):
+        """Return the transformed candidate points.
+
+        Parameters
+        ----------
+        * `random_state` [RandomState instance]:
+            The random state used to draw new points.
+
+        * `constraints` [Constraints or None, default=None]:
+            The constraints the points must satisfy.
+
+        * `incumbent` [array or None, default=None]:
+            The transformed point around which `n_local` points are drawn.
+
+        Returns
+        -------
+        * `X` [array, shape=(n_points + n_local, transformed_n_dims)]:
+            The candidate points. The last `n_local` points are those drawn
+            around the incumbent, if any.
+        """
+        if self._X is None or constraints is not self._constraints:
+            self._X = self._draw(self.n_points, random_state, constraints)
+            self._constraints = constraints
+            self._next_row = 0
+        elif self.refresh == 1:
+            self._X = self._draw(self.n_points, random_state, constraints)
+        else:
+            n_refresh = max(1, int(round(self.refresh * self.n_points)))
+            rows = (self._next_row + np.arange(n_refresh)) % self.n_points
+            X = self._X.copy()
+            X[rows] = self._draw(n_refresh, random_state, constraints)
+            self._X = X
+            self._next_row = (self._next_row + n_refresh) % self.n_points
+
+        if self.n_local > 0 and incumbent is not None:
+            X_local = self._draw_local(incumbent, random_state, constraints)
+            return np.vstack([self._X, X_local])
+        return self._X
+
+    def _draw(self, n_samples, random_state, constraints):
+        """Draw `n_samples` transformed points."""
+        if constraints:
+            # If the constraint is of the SumEquals type, create samples
+            # that respect this
+            if isinstance(constraints.constraints_list[0], SumEquals):
+                X = constraints.sumequal_sampling(
+                    n_samples=n_samples, random_state=random_state)
+            # For all other constraints we use random sampling
+            else:
+                X = constraints.rvs(
+                    n_samples=n_samples, random_state=random_state)
+            return self.space.transform(X)
+        if not self.quasi_random:
+            return self.space.transform(
+                self.space.rvs(n_samples=n_samples, random_state=random_state))
+
+        sampler = qmc.Halton(
+            self.space.n_dims, seed=get_random_generator(random_state))
+        points = sampler.random(n_samples)
+        # Transform each dimension without building the points in the
+        # original space
+        columns = [
+            np.asarray(dim.transform(dim.sample(points[:, j])))
+            for j, dim in enumerate(self.space.dimensions)
+        ]
+        return np.hstack([c.reshape((n_samples, -1)) for c in columns])
+
+    def _draw_local(self, incumbent, random_state, constraints):
+        """Draw `n_local` transformed points around `incumbent`."""
+        bounds = np.array(self.space.transformed_bounds, dtype=float)
+        width = bounds[:, 1] - bounds[:, 0]
+        X = incumbent + random_state.normal(
+            scale=self.local_scale * width,
+            size=(self.n_local, len(incumbent)))
+        X = np.clip(X, bounds[:, 0], bounds[:, 1])
+        # Snap the points to valid values of the Integer and Categorical
+        # dimensions
+        points = self.space.inverse_transform(X)
+        if constraints:
+            points = [p for p in points if constraints.validate_sample(p)]
+            if not points:
+                return np.empty((0, X.shape[1]))
+        return self.space.transform(points)
@@ -0,0 +1,196 @@
+import warnings
+from collections import OrderedDict
+
+import numpy as np
+
+from sklearn.base import clone
+
+from ..learning import GaussianProcessRegressor
+
+
+class _Hyperparameters(object):
+    """What is kept of a Gaussian process that has been dropped from a
+    `ModelHistory`: the number of observations it was fitted to and its
+    hyperparameters."""
+
+    def __init__(self, model):
+        self.n_samples = model.X_train_.shape[0]
+        self.theta = model.theta_
+
+    def __eq__(self, other):
+        return (
+            isinstance(other, _Hyperparameters)
+            and self.n_samples == other.n_samples
+            and np.array_equal(self.theta, other.theta)
+        )
+
+    def __ne__(self, other):
+        return not self == other
+
+
+class ModelHistory(object):
+    """List-like history of the models fitted by an `Optimizer`, which only
+    keeps the most recent models.
+
+    The last `keep_models` models are kept as they are. Of older Gaussian
+    processes only the hyperparameters are kept if `keep_hyperparameters`
+    is True, and the model is reconstructed with fixed hyperparameters from
+    the observations when it is accessed. The last `keep_models`
+    reconstructed models are cached, so that accessing the same models
+    again does not refit them. Other older models are dropped, and `None`
+    is returned in their place.
+
+    For multiobjective optimizers each element is a list with a model per
+    objective, and ``history[:, i]`` is the history of the models of
+    objective `i`.
+
+    Parameters
+    ----------
+    * `observations` [ObservationStore]:
+        The observations the models are fitted to.
+
+    * `base_estimator` [sklearn regressor]:
+        Estimator cloned when reconstructing models.
+
+    * `keep_models` [int]:
+        Number of most recent models to keep.
+
+    * `keep_hyperparameters` [bool, default=True]:
+        Whether to keep the hyperparameters of older Gaussian processes.
+    """
+
+    def __init__(self, observations, base_estimator, keep_models,
+                 keep_hyperparameters=True):
+        self.observations = observations
+        self.base_estimator = base_estimator
+        self.keep_models = keep_models
+        self.keep_hyperparameters = keep_hyperparameters
+        self._entries = []
+        self._objective = None
+        # Reconstructed models by (entry index, objective), shared with the
+        # histories of single objectives
+        self._reconstructed = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __getitem__(self, key):
+        if isinstance(key, tuple):
+            # history[:, i] selects the models of objective i
+            rows, objective = key
+            if rows != slice(None) or self._objective is not None:
+                raise IndexError("Only history[:, i] is supported.")
+            view = ModelHistory.__new__(ModelHistory)
+            view.__dict__.update(self.__dict__)
+            view._objective = objective
+            return view
+        if isinstance(key, slice):
+            return [self[i] for i in range(*key.indices(len(self)))]
+        if key < 0:
+            key += len(self)
+        if not 0 <= key < len(self):
+            raise IndexError("ModelHistory index out of range")
+        return self._model(key)
+
+    def __eq__(self, other):
+        if not isinstance(other, (ModelHistory, list)):
+            return NotImplemented
+        if isinstance(other, ModelHistory):
+            other = other._stored()
+        # Dropped models are compared by their hyperparameters, without
+        # reconstructing them
+        return len(self) == len(other) and all(
+            _same_entry(a, b) for a, b in zip(self._stored(), other))
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    def append(self, model):
+        """Add a newly fitted model, or a list of models for
+        multiobjective optimizers, and drop the oldest kept model if there
+        are more than `keep_models`."""
+        if self._objective is not None:
+            raise TypeError("Can not append to the history of one objective.")
+        self._entries.append(model)
+        old = len(self._entries) - 1 - self.keep_models
+        if old >= 0:
+            self._entries[old] = self._drop(self._entries[old])
+
+    def copy(self):
+        """Return a copy of the history, sharing the models."""
+        history = ModelHistory.__new__(ModelHistory)
+        history.__dict__.update(self.__dict__)
+        history._entries = list(self._entries)
+        history._reconstructed = OrderedDict()
+        return history
+
+    def _stored(self):
+        """Return the entries, of the selected objective if any."""
+        if self._objective is None:
+            return self._entries
+        return [
+            entry[self._objective] if isinstance(entry, list) else entry
+            for entry in self._entries
+        ]
+
+    def _drop(self, entry):
+        if isinstance(entry, list):
+            return [self._drop(model) for model in entry]
+        if (
+            self.keep_hyperparameters
+            and isinstance(entry, GaussianProcessRegressor)
+            and hasattr(entry, "theta_")
+        ):
+            return _Hyperparameters(entry)
+        return None
+
+    def _model(self, index):
+        entry = self._entries[index]
+        objective = self._objective
+        if isinstance(entry, list):
+            if objective is None:
+                return [
+                    self._cached_reconstruct(index, model, i)
+                    for i, model in enumerate(entry)
+                ]
+            entry = entry[objective]
+        return self._cached_reconstruct(index, entry, objective)
+
+    def _cached_reconstruct(self, index, entry, objective):
+        if not isinstance(entry, _Hyperparameters):
+            return entry
+        key = (index, objective)
+        cached = self._reconstructed.get(key)
+        if cached is not None and cached[0] is entry:
+            self._reconstructed.move_to_end(key)
+            return cached[1]
+        model = self._reconstruct(entry, objective)
+        self._reconstructed[key] = (entry, model)
+        while len(self._reconstructed) > self.keep_models:
+            self._reconstructed.popitem(last=False)
+        return model
+
+    def _reconstruct(self, entry, objective):
+        X = self.observations.Xt[: entry.n_samples]
+        y = self.observations.y[: entry.n_samples]
+        if objective is not None:
+            y = y[:, objective]
+        model = clone(self.base_estimator)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            return model.warm_fit(X, y, entry.theta, optimize=False)
+
+
+def _same_entry(a, b):
+    """Whether two stored entries of a history hold the same models."""
+    if isinstance(a, list) and isinstance(b, list):
+        return len(a) == len(b) and all(
+            _same_entry(x, y) for x, y in zip(a, b))
+    if isinstance(a, _Hyperparameters):
+        return a == b
+    return a is b
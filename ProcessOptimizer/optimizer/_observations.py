@@ -0,0 +1,123 @@
+import numpy as np
+
+
+class ObservationStore(object):
+    """Array-backed storage of the observations told to an `Optimizer`.
+
+    The raw points, the points in the transformed space and the objective
+    values are kept in contiguous arrays which grow geometrically. New
+    observations are transformed once, when they are added, instead of
+    transforming all points every time the design matrix is needed.
+
+    The store mirrors the `Xi` and `yi` lists of the optimizer, which remain
+    the public view of the observations. Call `sync` after the lists have
+    been appended to.
+
+    Parameters
+    ----------
+    * `space` [Space]:
+        The space used to transform the points.
+    """
+
+    def __init__(self, space):
+        self.space = space
+        self.clear()
+
+    def __len__(self):
+        return self._n
+
+    def clear(self):
+        """Remove all observations from the store."""
+        self._X = None
+        self._Xt = None
+        self._y = None
+        self._n = 0
+        self._shared = False
+
+    def fork(self):
+        """Return a store sharing the arrays of this store.
+
+        The arrays are copied by whichever of the two stores is extended
+        first, so both can be extended independently afterwards.
+        """
+        store = ObservationStore.__new__(ObservationStore)
+        store.__dict__.update(self.__dict__)
+        store._shared = self._shared = self._X is not None
+        return store
+
+    @property
+    def X(self):
+        """The raw points, shape=(n_observations, n_dims)."""
+        if self._X is None:
+            return np.empty((0, self.space.n_dims), dtype=object)
+        return self._X[: self._n]
+
+    @property
+    def Xt(self):
+        """The transformed points, shape=(n_observations,
+        transformed_n_dims)."""
+        if self._Xt is None:
+            return np.empty((0, self.space.transformed_n_dims))
+        return self._Xt[: self._n]
+
+    @property
+    def y(self):
+        """The objective values, shape=(n_observations,) or
+        (n_observations, n_objectives)."""
+        if self._y is None:
+            return np.empty(0)
+        return self._y[: self._n]
+
+    def extend(self, X, y):
+        """Append the points `X` with objective values `y`.
+
+        Parameters
+        ----------
+        * `X` [list of lists, shape=(n_points, n_dims)]:
+            Points in the original space.
+
+        * `y` [list, shape=(n_points,) or (n_points, n_objectives)]:
+            Objective values at `X`.
+        """
+        n_new = len(X)
+        if n_new == 0:
+            return
+        Xt = np.asarray(self.space.transform(X), dtype=float)
+        y = np.asarray(y, dtype=float)
+        if self._Xt is None:
+            capacity = max(16, n_new)
+            self._X = np.empty((capacity, self.space.n_dims), dtype=object)
+            self._Xt = np.empty((capacity, Xt.shape[1]))
+            self._y = np.empty((capacity,) + y.shape[1:])
+        elif self._shared or self._n + n_new > self._Xt.shape[0]:
+            capacity = self._Xt.shape[0]
+            if self._n + n_new > capacity:
+                capacity = max(2 * capacity, self._n + n_new)
+            self._X = self._resize(self._X, capacity)
+            self._Xt = self._resize(self._Xt, capacity)
+            self._y = self._resize(self._y, capacity)
+            self._shared = False
+
+        end = self._n + n_new
+        for i, x in enumerate(X):
+            self._X[self._n + i] = list(x)
+        self._Xt[self._n:end] = Xt
+        self._y[self._n:end] = y
+        self._n = end
+
+    def sync(self, X, y):
+        """Bring the store up to date with the lists `X` and `y`.
+
+        Points appended to the lists since the last call are transformed and
+        added to the store. If the lists have become shorter, the store is
+        rebuilt from scratch.
+        """
+        if len(X) < self._n:
+            self.clear()
+        if len(X) > self._n:
+            self.extend(X[self._n:], y[self._n:])
+
+    def _resize(self, array, capacity):
+        resized = np.empty((capacity,) + array.shape[1:], dtype=array.dtype)
+        resized[: self._n] = array[: self._n]
+        return resized
@@ -0,0 +1,103 @@
+import asyncio
+from functools import partial
+
+import numpy as np
+
+
+class AsyncOptimizer(object):
+    """Asyncio front end to an `Optimizer` shared by concurrent workers.
+
+    Each worker awaits `ask()` for a point, evaluates it, and awaits
+    `tell()` with the result. Points that have been asked for but not told
+    are pending. They are told to a fork of the optimizer with a lie as
+    objective value before the next point is suggested, so that concurrent
+    workers do not get the same point. With a single Gaussian process the
+    lies are fantasy observations, which do not refit the model.
+
+    The optimizer is only accessed by one coroutine at a time, and the
+    model fitting and the optimisation of the acquisition function run in
+    an executor, so the event loop is not blocked.
+
+    Parameters
+    ----------
+    * `optimizer` [Optimizer]:
+        The optimizer to suggest points and record observations.
+
+    * `strategy` [string, default=`"cl_min"`]:
+        How the pending points are told to the optimizer, one of `"cl_min"`,
+        `"cl_mean"`, `"cl_max"` or `"KB"`. See `Optimizer.ask`.
+
+    * `executor` [concurrent.futures.Executor or None, default=None]:
+        The executor to run the optimizer in. If None, the default executor
+        of the event loop is used.
+
+    Attributes
+    ----------
+    * `pending` [list]:
+        The points that have been asked for but not told yet.
+    """
+    def __init__(self, optimizer, strategy="cl_min", executor=None):
+        supported_strategies = ["cl_min", "cl_mean", "cl_max", "KB"]
+        if strategy not in supported_strategies:
+            raise ValueError(
+                "Expected strategy to be one of "
+                + str(supported_strategies)
+                + ", got %s" % strategy
+            )
+        self.optimizer = optimizer
+        self.strategy = strategy
+        self.executor = executor
+        self.pending = []
+        self._lock = None
+
+    async def ask(self):
+        """Suggest the next point to evaluate, taking the pending points
+        into account. The point is pending until it is told."""
+        async with self._get_lock():
+            x = await self._run(self._ask, list(self.pending))
+            self.pending.append(x)
+            return x
+
+    async def tell(self, x, y, fit=True):
+        """Record an observation of the objective function.
+
+        If `x` is pending it is no longer pending. See `Optimizer.tell` for
+        a description of the parameters.
+
+        Returns
+        -------
+        * `result` [`OptimizeResult`]:
+            The result of `Optimizer.tell`.
+        """
+        async with self._get_lock():
+            result = await self._run(self.optimizer.tell, x, y, fit)
+            self.cancel(x)
+            return result
+
+    def cancel(self, x):
+        """Stop treating the point `x` as pending, e.g. because its
+        evaluation failed. Does nothing if `x` is not pending."""
+        for i, pending_x in enumerate(self.pending):
+            if np.array_equal(pending_x, x):
+                del self.pending[i]
+                return
+
+    def _ask(self, pending):
+        if not pending:
+            return self.optimizer.ask()
+        opt = self.optimizer.fork(
+            random_state=self.optimizer.rng.randint(0, np.iinfo(np.int32).max)
+        )
+        for x in pending:
+            opt._tell_lie(x, self.strategy)
+        return opt.ask()
+
+    def _get_lock(self):
+        # The lock is created on first use, inside the running event loop
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    async def _run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(func, *args))
@@ -17,8 +17,12 @@ from sklearn.multioutput import MultiOutputRegressor
 from sklearn.utils import check_random_state
 
 from ..acquisition import _gaussian_acquisition
+from ..acquisition import _gaussian_acquisition_from_posterior
+from ..acquisition import _acquisition_lower_bound
 from ..acquisition import gaussian_acquisition_1D
+from ..acquisition import gaussian_batch_acquisition_1D
 from ..learning import cook_estimator, GaussianProcessRegressor, has_gradients
+from ..learning import ExtraTreesRegressor, RandomForestRegressor
 from ..space import Categorical
 from ..space import Space, normalize_dimensions
 from ..space.constraints import Constraints, SumEquals
@@ -29,6 +33,10 @@ from ..utils import is_2Dlistlike
 
 from ..learning.gaussian_process.gpr import _param_for_white_kernel_in_Sum
 from ..learning.gaussian_process.kernels import WhiteKernel
+from ._batch_lbfgs import batch_fmin_l_bfgs_b
+from ._candidate_pool import CandidatePool
+from ._model_history import ModelHistory
+from ._observations import ObservationStore
 
 
 class Optimizer(object):
@@ -66,13 +74,14 @@ class Optimizer(object):
         Note that the space is always normalised if `base_estimator` is a
         Gaussian Process regressor.
 
-    * `base_estimator` ["GP", "RF", "ET", "GBRT" or sklearn regressor, default="GP"]:
+    * `base_estimator` ["GP", "SGP", "RF", "ET", "GBRT" or sklearn regressor, default="GP"]:
         Should inherit from `sklearn.base.RegressorMixin`.
         In addition the `predict` method, should have an optional `return_std`
         argument, which returns `std(Y | x)`` along with `E[Y | x]`.
         If base_estimator is one of ["GP", "RF", "ET", "GBRT"], a default
         surrogate model of the corresponding type is used corresponding to what
-        is used in the minimize functions.
+        is used in the minimize functions. "SGP" is a sparse Gaussian process
+        for large numbers of observations.
 
     * `n_random_starts` [int, default=10]:
         DEPRECATED, use `n_initial_points` instead.
@@ -111,6 +120,12 @@ class Optimizer(object):
         - `"PIps"` for negated probability of improvement per second. The
           return type of the objective function is assumed to be similar to
           that of `"EIps
+        - `"TS"` for Thompson sampling. A function is drawn from the posterior
+          of the Gaussian process, approximated with random Fourier features
+          of its Matern or RBF kernel, and its minimum is the next point. When
+          several points are asked for, each is the minimum of an independent
+          function. The number of features is set by the `"n_features"` key of
+          `acq_func_kwargs` (default 1000).
 
     * `acq_optimizer` [string, `"sampling"` or `"lbfgs"`, default=`"auto"`]:
         Method to minimize the acquistion function. The fit model
@@ -142,7 +157,47 @@ class Optimizer(object):
         - "length_scale_bounds" [list] a list of tuples with lower and upper bound
         -  "length_scale" [list] a list of floats
         - "n_restarts_optimizer" [int]
-        - "n_jobs" [int]
+        - "n_jobs" [int] also used for the hyperparameter restarts of the
+          Gaussian process when `base_estimator` is "GP" or "SGP"
+        - "float32_screening" [bool, default=False] predict the `n_points`
+          candidates in single precision, and only predict the best
+          `n_screened` of them for each acquisition function in double
+          precision. Only used for Gaussian process and forest estimators.
+        - "n_screened" [int, default=100]
+        - "prune_candidates" [bool, default=False] predict only the mean and
+          a cheap upper bound of the standard deviation at the `n_points`
+          candidates, and discard those that can not be among the best
+          before the standard deviation is predicted at the rest. The result
+          is the same. Only used for Gaussian process estimators.
+        - "max_lattice_size" [int, default=0] if the space only has Integer
+          and Categorical dimensions, and at most this many points, the
+          acquisition function is evaluated at all points of the space
+          instead of at `n_points` random samples, and its minimum is used
+          as the next point. With a `GaussianProcessRegressor`, which is not
+          sparse, the solves of the kernel between all points and the
+          observations are kept between fits, and only extended with the new
+          observations as long as the hyperparameters are fixed, see
+          "refit_every" in `model_kwargs`. Not used with constraints or
+          several objectives.
+        - "refresh_candidates" [float, default=1.0] the fraction of the
+          `n_points` candidates that is replaced by new points every time
+          the next point is computed. The other candidates are kept from the
+          previous point. All candidates are replaced when the constraints
+          change.
+        - "n_local_candidates" [int, default=0] the number of candidates
+          drawn around the best point observed so far, in addition to the
+          `n_points` candidates, every time the next point is computed.
+        - "local_candidates_scale" [float, default=0.1] the standard
+          deviation of these candidates relative to the width of each
+          transformed dimension.
+        - "quasi_random" [bool, default=False] draw the candidates of a space
+          without constraints from a scrambled Halton sequence.
+        - "batched_lbfgs" [bool, default=False] with the "lbfgs" optimizer,
+          minimise from the `n_restarts_optimizer` starting points of each
+          acquisition function together, so that the acquisition function
+          and its gradient are computed at all starts in a single `predict`
+          call per iteration. Otherwise `fmin_l_bfgs_b` is run from each
+          start, in parallel processes if "n_jobs" is set.
 
     * `n_objectives` [int, default=1]:
         Number of objectives to be optimized.
@@ -151,15 +206,43 @@ class Optimizer(object):
     * `objective_name_list` [list[str], default ["Y"] or ["Y1","Y2",...]]:
         The names of the objetive(s).
 
+    * `model_kwargs` [dict]:
+        Additional arguments controlling how the surrogate models are fitted
+        and kept. Except for "keep_models" and "keep_hyperparameters", only
+        used when the base estimator is a `GaussianProcessRegressor`.
+        options are:
+        - "refit_every" [int, default=1] the hyperparameters are optimised
+          on every k'th fit. In between, the model is refitted with the
+          hyperparameters of the previous model kept fixed, which only costs
+          a Cholesky factorisation.
+        - "lml_threshold" [float or None, default=None] if the
+          log-marginal-likelihood per observation of a fit with fixed
+          hyperparameters drops by more than this value compared to the
+          previous model, the hyperparameters are optimised anyway.
+        - "warm_start" [bool, default=False] start the optimisation of the
+          hyperparameters from those of the previous model.
+        - "keep_models" [int or None, default=None] the number of most recent
+          models to keep in `models`. If None, all models are kept.
+        - "keep_hyperparameters" [bool, default=True] when "keep_models" is
+          set, keep the hyperparameters of older Gaussian processes, so that
+          they can be reconstructed when accessed in `models`. Otherwise, and
+          for other estimators, older models are replaced by None.
+        - "shared_kernel" [bool, default=False] with several objectives, fit
+          a single Gaussian process to all objectives, which share the
+          kernel hyperparameters, including the noise level relative to the
+          standard deviation of each objective. This costs about as much as
+          a single objective. `models` still holds a model per objective.
+
     Attributes
     ----------
     * `Xi` [list]:
         Points at which objective has been evaluated.
     * `yi` [scalar]:
         Values of objective at corresponding points in `Xi`.
-    * `models` [list]:
+    * `models` [list or ModelHistory]:
         Regression models used to fit observations and compute acquisition
-        function.
+        function. A `ModelHistory` if "keep_models" is set in
+        `model_kwargs`.
     * `space`
         An instance of `ProcessOptimizer.space.Space`. Stores parameter search space used
         to sample points, bounds, and type of parameters.
@@ -180,6 +263,7 @@ class Optimizer(object):
         acq_optimizer_kwargs=None,
         n_objectives=1,
         objective_name_list: List[str] = None,
+        model_kwargs=None,
     ):
         self.rng = check_random_state(random_state)
 
@@ -192,7 +276,9 @@ class Optimizer(object):
         self.acq_func = acq_func
         self.acq_func_kwargs = acq_func_kwargs
 
-        allowed_acq_funcs = ["gp_hedge", "EI", "LCB", "PI", "EIps", "PIps", ""]
+        allowed_acq_funcs = [
+            "gp_hedge", "EI", "LCB", "PI", "EIps", "PIps", "TS", ""
+        ]
         if self.acq_func not in allowed_acq_funcs:
             raise ValueError(
                 "expected acq_func to be in %s, got %s"
@@ -239,8 +325,48 @@ class Optimizer(object):
         self.n_restarts_optimizer = acq_optimizer_kwargs.get("n_restarts_optimizer", 5)
         n_jobs = acq_optimizer_kwargs.get("n_jobs", 1)
         self.n_jobs = n_jobs
+        self.float32_screening = acq_optimizer_kwargs.get(
+            "float32_screening", False)
+        self.n_screened = acq_optimizer_kwargs.get("n_screened", 100)
+        self.prune_candidates = acq_optimizer_kwargs.get(
+            "prune_candidates", False)
+        self.max_lattice_size = acq_optimizer_kwargs.get("max_lattice_size", 0)
+        refresh_candidates = acq_optimizer_kwargs.get("refresh_candidates", 1.0)
+        n_local_candidates = acq_optimizer_kwargs.get("n_local_candidates", 0)
+        local_candidates_scale = acq_optimizer_kwargs.get(
+            "local_candidates_scale", 0.1)
+        quasi_random = acq_optimizer_kwargs.get("quasi_random", False)
+        self.batched_lbfgs = acq_optimizer_kwargs.get("batched_lbfgs", False)
         self.acq_optimizer_kwargs = acq_optimizer_kwargs
 
+        # Configure refitting of the surrogate model
+        if model_kwargs is None:
+            model_kwargs = dict()
+        self.refit_every = model_kwargs.get("refit_every", 1)
+        if not (isinstance(self.refit_every, int) and self.refit_every > 0):
+            raise ValueError(
+                "Expected `refit_every` to be an int > 0, got %s"
+                % self.refit_every
+            )
+        self.lml_threshold = model_kwargs.get("lml_threshold", None)
+        self.warm_start = model_kwargs.get("warm_start", False)
+        self.keep_models = model_kwargs.get("keep_models", None)
+        if self.keep_models is not None and not (
+            isinstance(self.keep_models, int) and self.keep_models > 0
+        ):
+            raise ValueError(
+                "Expected `keep_models` to be None or an int > 0, got %s"
+                % self.keep_models
+            )
+        self.keep_hyperparameters = model_kwargs.get("keep_hyperparameters", True)
+        self.shared_kernel = model_kwargs.get("shared_kernel", False)
+        # The Gaussian process fitted to all objectives with "shared_kernel"
+        self._shared_model = None
+        self.model_kwargs = model_kwargs
+        # Number of fits with fixed hyperparameters since the last
+        # optimisation of the hyperparameters
+        self._n_fixed_fits = 0
+
         # Configure estimator
         self._check_length_scale_bounds(dimensions, self._length_scale_bounds)
         # build base_estimator if doesn't exist
@@ -252,6 +378,10 @@ class Optimizer(object):
                 length_scale_bounds=self._length_scale_bounds,
                 length_scale=self._length_scale,
             )
+            if isinstance(base_estimator, GaussianProcessRegressor):
+                # Run the hyperparameter restarts on the same number of
+                # threads as the acquisition optimisation
+                base_estimator.set_params(n_jobs=self.n_jobs)
 
         # check if regressor
         if not is_regressor(base_estimator) and base_estimator is not None:
@@ -264,6 +394,14 @@ class Optimizer(object):
         else:
             self.base_estimator_ = base_estimator
 
+        if self.acq_func == "TS" and not isinstance(
+            self.base_estimator_, GaussianProcessRegressor
+        ):
+            raise ValueError(
+                "Thompson sampling requires a Gaussian process surrogate, "
+                "got %s" % base_estimator
+            )
+
         # Configure optimizer
 
         # decide optimizer based on gradient information
@@ -337,9 +475,19 @@ class Optimizer(object):
 
         # Initialize storage for optimization
 
-        self.models = []
         self.Xi = []
         self.yi = []
+        # Array-backed copy of `Xi` and `yi`, including the transformed points
+        self._observations = ObservationStore(self.space)
+        if self.keep_models is None:
+            self.models = []
+        else:
+            self.models = ModelHistory(
+                self._observations,
+                self.base_estimator_,
+                self.keep_models,
+                self.keep_hyperparameters,
+            )
 
         # Initialize cache for `ask` method responses
 
@@ -347,6 +495,32 @@ class Optimizer(object):
         # return same sets of points. Reset to {} at every call to `tell` and `set_constraints`.
         self.cache_ = {}
 
+        # The next point suggested by the model, computed lazily by `ask`
+        self._next_x_value = None
+        # Fixed candidate points for the acquisition function. Only set on
+        # forks used for batch asks, otherwise candidates are sampled anew
+        # for every next point.
+        self._candidates = None
+        # The candidates kept between next points
+        self._candidate_pool = CandidatePool(
+            self.space,
+            self.n_points,
+            refresh=refresh_candidates,
+            n_local=n_local_candidates,
+            local_scale=local_candidates_scale,
+            quasi_random=quasi_random,
+        )
+        # All points of a small discrete space, which replace the candidate
+        # points when there are no constraints
+        self._lattice = None
+        if n_objectives == 1 and self.space.cardinality <= self.max_lattice_size:
+            self._lattice = self.space.transform(self.space.lattice())
+        # Points of the lattice told to a fork as fantasy observations
+        self._lattice_excluded = None
+        # Solves of the latest Gaussian process at the lattice, see
+        # `GaussianProcessRegressor._predict_cached`
+        self._lattice_cache = None
+
     def copy(self, random_state=None):
         """Create a shallow copy of an instance of the optimizer.
 
@@ -367,6 +541,7 @@ class Optimizer(object):
             acq_optimizer_kwargs=self.acq_optimizer_kwargs,
             random_state=random_state,
             n_objectives=self.n_objectives,
+            model_kwargs=self.model_kwargs,
         )
 
         # It is important to copy the constraints so that a call to '_tell()' will create a valid _next_x
@@ -382,6 +557,43 @@ class Optimizer(object):
 
         return optimizer
 
+    def fork(self, random_state=None):
+        """Create a copy of the optimizer that shares the fitted models.
+
+        Unlike `copy`, no models are refitted. The fork shares the fitted
+        models, the observations and the next point computed by the latest
+        model with this optimizer, and only copies what telling new points
+        changes. Points told to the fork do not affect this optimizer and
+        vice versa.
+
+        Note that the models themselves are shared, so methods modifying a
+        model in place, like `add_observational_noise`, affect both
+        optimizers.
+
+        Parameters
+        ----------
+        * `random_state` [int, RandomState instance, or None (default)]:
+            Set the random state of the fork.
+        """
+        optimizer = Optimizer.__new__(Optimizer)
+        optimizer.__dict__.update(self.__dict__)
+
+        optimizer.rng = check_random_state(random_state)
+        optimizer.Xi = list(self.Xi)
+        optimizer.yi = list(self.yi)
+        optimizer._observations = self._observations.fork()
+        if isinstance(self.models, ModelHistory):
+            optimizer.models = self.models.copy()
+            optimizer.models.observations = optimizer._observations
+        else:
+            optimizer.models = list(self.models)
+        optimizer._candidate_pool = self._candidate_pool.copy()
+        optimizer.cache_ = {}
+        if hasattr(self, "gains_"):
+            optimizer.gains_ = np.copy(self.gains_)
+
+        return optimizer
+
     def ask(self, n_points=None, strategy="stbr_fill"):
         """Query point or multiple points at which objective should be evaluated.
 
@@ -426,6 +638,19 @@ class Optimizer(object):
                 For use of KB, see:
                 https://www.nature.com/articles/s41586-021-03213-y
 
+            - If set to `"qEI"` or `"qLCB"`, then all points are optimised
+                jointly by maximising a Monte-Carlo estimate of the expected
+                improvement of the batch (`"qEI"`) or minimising the batch
+                lower confidence bound (`"qLCB"`). The joint posterior is
+                sampled with fixed base samples, so the estimate is smooth and
+                is optimised with lbfgs. The number of samples is set by the
+                `"n_mc_samples"` key of `acq_func_kwargs` (default 256).
+                Requires a single objective and a Gaussian process surrogate
+                with gradients, and can not be used with constraints. Until a
+                model has been fitted, the points are chosen as with
+                `"cl_min"`. For details see:
+                https://arxiv.org/abs/1712.00424
+
         """
 
         if not ((isinstance(n_points, int) and n_points > 0) or n_points is None):
@@ -460,6 +685,8 @@ class Optimizer(object):
             "stbr_fill",
             "stbr_full",
             "KB",
+            "qEI",
+            "qLCB",
         ]
 
         if strategy not in supported_strategies:
@@ -475,15 +702,61 @@ class Optimizer(object):
                 "Steinerberger (default setting) sampling can not be used with constraints,\
                 try using another strategy like 'opt.ask(n,strategy='cl_min')'"
             )
+        if strategy in ["qEI", "qLCB"]:
+            if (
+                self.n_objectives > 1
+                or "ps" in self.acq_func
+                or not isinstance(self.base_estimator_, GaussianProcessRegressor)
+                or not has_gradients(self.base_estimator_)
+            ):
+                raise ValueError(
+                    "The %s strategy requires a single objective and a "
+                    "Gaussian process surrogate with gradients" % strategy
+                )
+            if self.get_constraints() is not None:
+                raise ValueError(
+                    "The %s strategy can not be used with constraints" % strategy
+                )
         # Caching the result with n_points not None. If some new parameters
         # are provided to the ask, the cache_ is not used.
-        if (n_points, strategy) in self.cache_:
-            return self.cache_[(n_points, strategy)]
+        cache_key = (n_points, strategy)
+        if cache_key in self.cache_:
+            return self.cache_[cache_key]
+
+        if strategy in ["qEI", "qLCB"]:
+            if self.models and self._n_initial_points <= 0:
+                X = self._ask_joint(n_points, strategy)
+                self.cache_ = {cache_key: X}
+                return X
+            strategy = "cl_min"
+
+        # With Thompson sampling each point of the batch is the minimum of
+        # an independent function drawn from the posterior
+        if (
+            self.acq_func == "TS"
+            and self.n_objectives == 1
+            and self.models
+            and self._n_initial_points <= 0
+        ):
+            X = self.space.inverse_transform(
+                np.array(
+                    self._thompson_minima(
+                        self.models[-1], self._sample_candidates(), n_points
+                    )
+                )
+            )
+            self.cache_ = {cache_key: X}
+            return X
 
-        # Copy of the optimizer is made in order to manage the
-        # deletion of points with "lie" objective (the copy of
+        # The first point of the batch is the next point of this optimizer,
+        # so it is computed before forking and shared with the fork
+        if self._n_initial_points <= 0:
+            self._ensure_next_x()
+
+        # A fork of the optimizer is made in order to manage the
+        # deletion of points with "lie" objective (the fork of
         # optimizer is simply discarded)
-        opt = self.copy(random_state=self.rng.randint(0, np.iinfo(np.int32).max))
+        opt = self.fork(random_state=self.rng.randint(0, np.iinfo(np.int32).max))
 
         X = []
         for i in range(n_points):
@@ -493,58 +766,167 @@ class Optimizer(object):
                 x = opt._ask()
             X.append(x)
 
-            ti_available = "ps" in self.acq_func and len(opt.yi) > 0
-            ti = [t for (_, t) in opt.yi] if ti_available else None
+            opt._tell_lie(x, strategy)
 
-            if strategy == "KB":
-                reshaped_x = np.asarray(x).reshape(1, -1)
-                transformed_x = opt.space.transform(reshaped_x.tolist())
-                if opt.n_objectives == 1:
-                    y_lie = opt.models[-1].predict(transformed_x)[0]
-                else:
-                    y_lie = []
-                    for model in opt.models[-1]:
-                        y_lie.append(model.predict(transformed_x)[0])
-
-            elif strategy == "cl_min":
-                y_lie = (
-                    np.min(opt.yi, axis=0).tolist()
-                    if opt.yi
-                    else np.zeros(opt.n_objectives).tolist()
-                )  # CL-min lie
-                if opt.n_objectives == 1 and not opt.yi:
-                    y_lie = y_lie[0]
-                t_lie = np.min(ti) if ti is not None else log(sys.float_info.max)
-            elif strategy == "cl_mean":
-                y_lie = (
-                    np.mean(opt.yi, axis=0).tolist()
-                    if opt.yi
-                    else np.zeros(opt.n_objectives).tolist()
-                )  # CL-mean lie
-                if opt.n_objectives == 1 and not opt.yi:
-                    y_lie = y_lie[0]
-                t_lie = np.mean(ti) if ti is not None else log(sys.float_info.max)
-            else:
-                y_lie = (
-                    np.max(opt.yi, axis=0).tolist()
-                    if opt.yi
-                    else np.zeros(opt.n_objectives).tolist()
-                )  # CL-max lie
-                if opt.n_objectives == 1 and not opt.yi:
-                    y_lie = y_lie[0]
-                t_lie = np.max(ti) if ti is not None else log(sys.float_info.max)
-
-            # Lie to the optimizer.
-            if "ps" in self.acq_func:
-                # Use `_tell()` instead of `tell()` to prevent repeated
-                # log transformations of the computation times.
-                opt._tell(x, (y_lie, t_lie))
+        self.cache_ = {cache_key: X}  # cache_ the result
+
+        return X
+
+    def _ask_joint(self, n_points, strategy):
+        """Suggest `n_points` points by optimising the batch acquisition
+        function `strategy` ("qEI" or "qLCB") jointly over all points.
+
+        The batch is started from the best sampled candidates according to
+        the corresponding single point acquisition function.
+        """
+        est = self.models[-1]
+        y_opt = np.min(self._observations.y)
+        acq_func_kwargs = self.acq_func_kwargs or {}
+        n_mc_samples = acq_func_kwargs.get("n_mc_samples", 256)
+        transformed_bounds = np.array(self.space.transformed_bounds)
+
+        X = self._sample_candidates()
+        values = _gaussian_acquisition(
+            X=X,
+            model=est,
+            y_opt=y_opt,
+            acq_func=strategy[1:],
+            acq_func_kwargs=acq_func_kwargs,
+        )
+        x0 = X[np.argsort(values)[:n_points]]
+        base_samples = self.rng.normal(size=(n_mc_samples, n_points))
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            batch, _, _ = fmin_l_bfgs_b(
+                gaussian_batch_acquisition_1D,
+                x0.ravel(),
+                args=(est, y_opt, strategy, base_samples, acq_func_kwargs),
+                bounds=self.space.transformed_bounds * n_points,
+                approx_grad=False,
+                maxiter=50,
+            )
+        batch = batch.reshape(n_points, -1)
+
+        # lbfgs should handle this but just in case there are
+        # precision errors.
+        if not self.space.is_categorical:
+            batch = np.clip(
+                batch, transformed_bounds[:, 0], transformed_bounds[:, 1]
+            )
+        return self.space.inverse_transform(batch)
+
+    def _tell_lie(self, x, strategy):
+        """Tell the point `x` with a lie as objective value.
+
+        The lie is chosen according to `strategy`, one of the constant liar
+        strategies `"cl_min"`, `"cl_mean"` and `"cl_max"`, or `"KB"` for the
+        Kriging believer. Other strategies lie like `"cl_max"`. Only meant
+        for forks of the optimizer, which are discarded afterwards.
+
+        Lies told to a single Gaussian process are fantasy observations: the
+        model is conditioned on them with fixed hyperparameters instead of
+        being refitted, and the acquisition function is evaluated on the
+        same candidates for all following points.
+        """
+        fantasize = (
+            strategy in ["cl_min", "cl_mean", "cl_max", "KB"]
+            and self.n_objectives == 1
+            and "ps" not in self.acq_func
+            and isinstance(self.base_estimator_, GaussianProcessRegressor)
+            and self.models
+            and self._n_initial_points <= 0
+        )
+
+        ti_available = "ps" in self.acq_func and len(self.yi) > 0
+        ti = [t for (_, t) in self.yi] if ti_available else None
+
+        if strategy == "KB" and self.models:
+            reshaped_x = np.asarray(x).reshape(1, -1)
+            transformed_x = self.space.transform(reshaped_x.tolist())
+            if self.n_objectives == 1:
+                y_lie = self.models[-1].predict(transformed_x)[0]
             else:
-                opt._tell(x, y_lie)
+                y_lie = []
+                for model in self.models[-1]:
+                    y_lie.append(model.predict(transformed_x)[0])
+
+        elif strategy == "cl_min":
+            y_lie = (
+                np.min(self.yi, axis=0).tolist()
+                if self.yi
+                else np.zeros(self.n_objectives).tolist()
+            )  # CL-min lie
+            if self.n_objectives == 1 and not self.yi:
+                y_lie = y_lie[0]
+            t_lie = np.min(ti) if ti is not None else log(sys.float_info.max)
+        elif strategy in ["cl_mean", "KB"]:
+            # Before a model has been fitted, the Kriging believer lies with
+            # the mean of the observations
+            y_lie = (
+                np.mean(self.yi, axis=0).tolist()
+                if self.yi
+                else np.zeros(self.n_objectives).tolist()
+            )  # CL-mean lie
+            if self.n_objectives == 1 and not self.yi:
+                y_lie = y_lie[0]
+            t_lie = np.mean(ti) if ti is not None else log(sys.float_info.max)
+        else:
+            y_lie = (
+                np.max(self.yi, axis=0).tolist()
+                if self.yi
+                else np.zeros(self.n_objectives).tolist()
+            )  # CL-max lie
+            if self.n_objectives == 1 and not self.yi:
+                y_lie = y_lie[0]
+            t_lie = np.max(ti) if ti is not None else log(sys.float_info.max)
+
+        # Lie to the optimizer.
+        if fantasize:
+            self._fantasy_tell(x, y_lie)
+        elif "ps" in self.acq_func:
+            # Use `_tell()` instead of `tell()` to prevent repeated
+            # log transformations of the computation times.
+            self._tell(x, (y_lie, t_lie))
+        else:
+            self._tell(x, y_lie)
 
-        self.cache_ = {(n_points, strategy): X}  # cache_ the result
+    def _fantasy_tell(self, x, y):
+        """Tell a fantasy observation `y` at `x` without refitting the model.
 
-        return X
+        The latest Gaussian process is conditioned on the observation with
+        fixed hyperparameters. Only meant for forks of the optimizer, which
+        are discarded afterwards. The candidate points of the acquisition
+        function are fixed on the first fantasy observation.
+        """
+        # Do not suggest the same candidate again
+        xt = self.space.transform([x])
+        if self._uses_lattice():
+            # The lattice is kept whole, so that its cache stays valid
+            if self._lattice_excluded is None:
+                self._lattice_excluded = np.zeros(len(self._lattice), dtype=bool)
+            self._lattice_excluded = self._lattice_excluded | np.all(
+                np.isclose(self._lattice, xt), axis=1
+            )
+        else:
+            if self._candidates is None:
+                self._candidates = self._sample_candidates()
+            self._candidates = self._candidates[
+                ~np.all(np.isclose(self._candidates, xt), axis=1)
+            ]
+
+        self.Xi.append(x)
+        self.yi.append(y)
+        self._n_initial_points -= 1
+        self._observations.sync(self.Xi, self.yi)
+        self.cache_ = {}
+
+        est = self.models[-1].condition_on(xt, [y])
+        if hasattr(self, "next_xs_") and self.acq_func == "gp_hedge":
+            self.gains_ -= est.predict(np.vstack(self.next_xs_))
+            del self.next_xs_
+        self.models.append(est)
+        self._next_x_value = None
 
     def _ask(self):
         """Suggest next point at which to evaluate the objective.
@@ -613,8 +995,9 @@ class Optimizer(object):
         Provide values of the objective function at points suggested by `ask()`
         or other points. By default a new model will be fit to all
         observations. The new model is used to suggest the next point at
-        which to evaluate the objective. This point can be retrieved by calling
-        `ask()`.
+        which to evaluate the objective. This point is computed and returned
+        by the next call to `ask()`, so telling several observations before
+        asking only optimises the acquisition function once.
 
         To add observations without fitting a new model set `fit` to False.
 
@@ -694,150 +1077,62 @@ class Optimizer(object):
                 % (type(x), type(y), self.n_objectives)
             )
 
+        self._observations.sync(self.Xi, self.yi)
+
         # optimizer learned something new - discard cache
         self.cache_ = {}
 
         # after being "told" n_initial_points we switch from sampling
         # random points to using a surrogate model(s)
         if fit and self._n_initial_points <= 0 and self.base_estimator_ is not None:
-            transformed_bounds = np.array(self.space.transformed_bounds)
-            est = clone(self.base_estimator_)
+            Xt = self._observations.Xt
+            yt = self._observations.y
+            # Decide whether the hyperparameters are optimised in this fit
+            optimize = self._n_fixed_fits + 1 >= self.refit_every
+            refitted = False
 
             # If the problem containts multiblie objectives a model has to be fitted for each objective
-            if self.n_objectives > 1:
+            if self.n_objectives > 1 and self._fits_shared_model():
+                # fit a single estimator to all objectives, and split it into
+                # a model per objective sharing its factorisation
+                est, refitted = self._fit_model(
+                    Xt, yt, self._shared_model, optimize
+                )
+                self._shared_model = est
+                self.models.append(est.output_models())
+
+            elif self.n_objectives > 1:
                 # fit an estimator to each objective
                 obj_models = []
                 for i in range(self.n_objectives):
-                    est = clone(self.base_estimator_)
-                    y_list = [item[i] for item in self.yi]
-                    with warnings.catch_warnings():
-                        warnings.simplefilter("ignore")
-                        est.fit(self.space.transform(self.Xi), y_list)
+                    previous = self.models[-1][i] if self.models else None
+                    est, optimized = self._fit_model(
+                        Xt, yt[:, i], previous, optimize
+                    )
+                    refitted = refitted or optimized
                     obj_models.append(est)
 
                 # Append all objective functions
                 self.models.append(obj_models)
 
-                # Setting the probability of using Steinerberger for the next point (exploration)
-                # The probability for using the NSGAII algorithm is 1-prob_stbr (exploitation)
-                prob_stbr = 0.25
-
-                # Simulate a random number
-                random_uniform_number = np.random.uniform()
-
-                # The random number decides what strategy to use for the next point
-                if random_uniform_number < prob_stbr:
-                    # self._next_x is found via stbr_scipy
-                    next_x = self.stbr_scipy()
-                    self._next_x = next_x[0]
-
-                else:
-                    # The Pareto front is approximated using the NSGAII algorithm
-                    pop, logbook, front = self.NSGAII()
-
-                    # The best point in the Pareto front is found (the point furthest from existing measurements)
-                    next_x = self.best_Pareto_point(pop, front)
-                    self._next_x = self.space.inverse_transform(
-                        next_x.reshape((1, -1))
-                    )[0]
-
-            if self.n_objectives == 1:
-                with warnings.catch_warnings():
-                    warnings.simplefilter("ignore")
-                    est.fit(self.space.transform(self.Xi), self.yi)
+            else:
+                previous = self.models[-1] if self.models else None
+                est, refitted = self._fit_model(Xt, yt, previous, optimize)
 
+                # The gains are updated with the candidates proposed by the
+                # previous model. These are only used once, also if several
+                # models are fitted before the next point is computed.
                 if hasattr(self, "next_xs_") and self.acq_func == "gp_hedge":
                     self.gains_ -= est.predict(np.vstack(self.next_xs_))
+                    del self.next_xs_
                 self.models.append(est)
 
-                # even with BFGS as optimizer we want to sample a large number
-                # of points and then pick the best ones as starting points
-                if self._constraints:
-                    # If the constraint is of the SumEquals type, create samples
-                    # that respect this
-                    if isinstance(self._constraints.constraints_list[0], SumEquals):
-                        X = self.space.transform(
-                            self._constraints.sumequal_sampling(
-                                n_samples=self.n_points, random_state=self.rng
-                            )
-                        )
-                    # For all other constraints we use random sampling
-                    else:
-                        X = self.space.transform(
-                            self._constraints.rvs(
-                                n_samples=self.n_points, random_state=self.rng
-                            )
-                        )
-                else:
-                    X = self.space.transform(
-                        self.space.rvs(n_samples=self.n_points, random_state=self.rng)
-                    )
+            self._n_fixed_fits = 0 if refitted else self._n_fixed_fits + 1
 
-                self.next_xs_ = []
-                for cand_acq_func in self.cand_acq_funcs_:
-                    values = _gaussian_acquisition(
-                        X=X,
-                        model=est,
-                        y_opt=np.min(self.yi),
-                        acq_func=cand_acq_func,
-                        acq_func_kwargs=self.acq_func_kwargs,
-                    )
-                    # Find the minimum of the acquisition function by randomly
-                    # sampling points from the space. If constraints are present
-                    # we use this strategy
-                    if self.acq_optimizer == "sampling" or self._constraints:
-                        next_x = X[np.argmin(values)]
-
-                    # Use BFGS to find the mimimum of the acquisition function, the
-                    # minimization starts from `n_restarts_optimizer` different
-                    # points and the best minimum is used
-                    elif self.acq_optimizer == "lbfgs":
-                        x0 = X[np.argsort(values)[: self.n_restarts_optimizer]]
-
-                        with warnings.catch_warnings():
-                            warnings.simplefilter("ignore")
-                            results = Parallel(n_jobs=self.n_jobs)(
-                                delayed(fmin_l_bfgs_b)(
-                                    gaussian_acquisition_1D,
-                                    x,
-                                    args=(
-                                        est,
-                                        np.min(self.yi),
-                                        cand_acq_func,
-                                        self.acq_func_kwargs,
-                                    ),
-                                    bounds=self.space.transformed_bounds,
-                                    approx_grad=False,
-                                    maxiter=20,
-                                )
-                                for x in x0
-                            )
-
-                        cand_xs = np.array([r[0] for r in results])
-                        cand_acqs = np.array([r[1] for r in results])
-                        next_x = cand_xs[np.argmin(cand_acqs)]
-
-                    # lbfgs should handle this but just in case there are
-                    # precision errors.
-                    if not self.space.is_categorical:
-                        next_x = np.clip(
-                            next_x,
-                            transformed_bounds[:, 0],
-                            transformed_bounds[:, 1],
-                        )
-                    self.next_xs_.append(next_x)
-
-                if self.acq_func == "gp_hedge":
-                    logits = np.array(self.gains_)
-                    logits -= np.max(logits)
-                    exp_logits = np.exp(self.eta * logits)
-                    probs = exp_logits / np.sum(exp_logits)
-                    next_x = self.next_xs_[np.argmax(self.rng.multinomial(1, probs))]
-                else:
-                    next_x = self.next_xs_[0]
+            # The next point is computed from the new model(s) on the next
+            # call to `ask()`
+            self._next_x_value = None
 
-                # note the need for [0] at the end
-                self._next_x = self.space.inverse_transform(next_x.reshape((1, -1)))[0]
         # Pack results
 
         return create_result(
@@ -849,6 +1144,416 @@ class Optimizer(object):
             constraints=self._constraints,
         )
 
+    @property
+    def _next_x(self):
+        """The next point to evaluate according to the latest model.
+
+        The point is computed on first access after a model has been fitted,
+        so that telling several points before the next `ask()` does not
+        optimise the acquisition function in between."""
+        if self._next_x_value is None and not self.models:
+            raise AttributeError("No model has been fitted yet.")
+        self._ensure_next_x()
+        return self._next_x_value
+
+    @_next_x.setter
+    def _next_x(self, value):
+        self._next_x_value = value
+
+    def _ensure_next_x(self):
+        """Compute the next point, if a model has been fitted and the point
+        has not been computed since."""
+        if self.models and self._next_x_value is None:
+            self._next_x_value = self._compute_next_x()
+
+    def _compute_next_x(self):
+        """Find the next point to evaluate by optimising the acquisition
+        function of the latest model(s)."""
+        transformed_bounds = np.array(self.space.transformed_bounds)
+
+        if self.n_objectives > 1:
+            # Setting the probability of using Steinerberger for the next point (exploration)
+            # The probability for using the NSGAII algorithm is 1-prob_stbr (exploitation)
+            prob_stbr = 0.25
+
+            # Simulate a random number
+            random_uniform_number = np.random.uniform()
+
+            # The random number decides what strategy to use for the next point
+            if random_uniform_number < prob_stbr:
+                # The next point is found via stbr_scipy
+                next_x = self.stbr_scipy()
+                return next_x[0]
+
+            # The Pareto front is approximated using the NSGAII algorithm
+            pop, logbook, front = self.NSGAII()
+
+            # The best point in the Pareto front is found (the point furthest from existing measurements)
+            next_x = self.best_Pareto_point(pop, front)
+            return self.space.inverse_transform(next_x.reshape((1, -1)))[0]
+
+        est = self.models[-1]
+        yt = self._observations.y
+
+        # even with BFGS as optimizer we want to sample a large number
+        # of points and then pick the best ones as starting points
+        if self._candidates is not None:
+            X = self._candidates
+        else:
+            X = self._sample_candidates()
+
+        if self.acq_func == "TS":
+            self.next_xs_ = self._thompson_minima(est, X, n_samples=1)
+            return self.space.inverse_transform(
+                self.next_xs_[0].reshape((1, -1)))[0]
+
+        y_opt = np.min(yt)
+        if "ps" in self.acq_func:
+            values_list = [
+                _gaussian_acquisition(
+                    X=X,
+                    model=est,
+                    y_opt=y_opt,
+                    acq_func=cand_acq_func,
+                    acq_func_kwargs=self.acq_func_kwargs,
+                )
+                for cand_acq_func in self.cand_acq_funcs_
+            ]
+        else:
+            if self._uses_lattice() and isinstance(est, GaussianProcessRegressor):
+                mu, std, self._lattice_cache = est._predict_cached(
+                    X, self._lattice_cache
+                )
+            else:
+                if self.float32_screening:
+                    X = self._screen_candidates(est, X, y_opt)
+                if self.prune_candidates:
+                    X = self._prune_candidates(est, X, y_opt)
+                # The posterior at the candidates is predicted once and
+                # shared by all candidate acquisition functions
+                with warnings.catch_warnings():
+                    warnings.simplefilter("ignore")
+                    mu, std = est.predict(X, return_std=True)
+            values_list = [
+                _gaussian_acquisition_from_posterior(
+                    mu,
+                    std,
+                    y_opt=y_opt,
+                    acq_func=cand_acq_func,
+                    acq_func_kwargs=self.acq_func_kwargs,
+                )
+                for cand_acq_func in self.cand_acq_funcs_
+            ]
+
+        if self._uses_lattice() and self._lattice_excluded is not None:
+            values_list = [
+                np.where(self._lattice_excluded, np.inf, values)
+                for values in values_list
+            ]
+
+        # Find the minimum of the acquisition function by randomly
+        # sampling points from the space. If constraints are present
+        # we use this strategy. On a lattice this is the exact minimum.
+        if (
+            self.acq_optimizer == "sampling"
+            or self._constraints
+            or self._uses_lattice()
+        ):
+            next_xs = [X[np.argmin(values)] for values in values_list]
+
+        # Use BFGS to find the mimimum of the acquisition function, the
+        # minimization starts from `n_restarts_optimizer` different
+        # points and the best minimum is used. The restarts of all
+        # candidate acquisition functions are run in a single batch.
+        elif self.acq_optimizer == "lbfgs" and self.batched_lbfgs:
+            next_xs = []
+            for cand_acq_func, values in zip(self.cand_acq_funcs_, values_list):
+
+                def acquisition(X, acq_func=cand_acq_func):
+                    return _gaussian_acquisition(
+                        X,
+                        est,
+                        y_opt,
+                        acq_func=acq_func,
+                        return_grad=True,
+                        acq_func_kwargs=self.acq_func_kwargs,
+                    )
+
+                with warnings.catch_warnings():
+                    warnings.simplefilter("ignore")
+                    cand_xs, cand_acqs = batch_fmin_l_bfgs_b(
+                        acquisition,
+                        X[np.argsort(values)[: self.n_restarts_optimizer]],
+                        bounds=self.space.transformed_bounds,
+                        maxiter=20,
+                    )
+                next_xs.append(cand_xs[np.argmin(cand_acqs)])
+
+        elif self.acq_optimizer == "lbfgs":
+            starts = [
+                (cand_acq_func, x)
+                for cand_acq_func, values in zip(self.cand_acq_funcs_, values_list)
+                for x in X[np.argsort(values)[: self.n_restarts_optimizer]]
+            ]
+
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                results = Parallel(n_jobs=self.n_jobs)(
+                    delayed(fmin_l_bfgs_b)(
+                        gaussian_acquisition_1D,
+                        x,
+                        args=(
+                            est,
+                            y_opt,
+                            cand_acq_func,
+                            self.acq_func_kwargs,
+                        ),
+                        bounds=self.space.transformed_bounds,
+                        approx_grad=False,
+                        maxiter=20,
+                    )
+                    for cand_acq_func, x in starts
+                )
+
+            next_xs = []
+            for cand_acq_func in self.cand_acq_funcs_:
+                cand_results = [
+                    result
+                    for (func, _), result in zip(starts, results)
+                    if func == cand_acq_func
+                ]
+                cand_xs = np.array([r[0] for r in cand_results])
+                cand_acqs = np.array([r[1] for r in cand_results])
+                next_xs.append(cand_xs[np.argmin(cand_acqs)])
+
+        # lbfgs should handle this but just in case there are
+        # precision errors.
+        if not self.space.is_categorical:
+            next_xs = [
+                np.clip(
+                    next_x,
+                    transformed_bounds[:, 0],
+                    transformed_bounds[:, 1],
+                )
+                for next_x in next_xs
+            ]
+        self.next_xs_ = next_xs
+
+        if self.acq_func == "gp_hedge":
+            logits = np.array(self.gains_)
+            logits -= np.max(logits)
+            exp_logits = np.exp(self.eta * logits)
+            probs = exp_logits / np.sum(exp_logits)
+            next_x = self.next_xs_[np.argmax(self.rng.multinomial(1, probs))]
+        else:
+            next_x = self.next_xs_[0]
+
+        # note the need for [0] at the end
+        return self.space.inverse_transform(next_x.reshape((1, -1)))[0]
+
+    def _thompson_minima(self, est, X, n_samples):
+        """Return the minima of `n_samples` functions drawn from the
+        posterior of `est` with random Fourier features.
+
+        Each function is minimised like an acquisition function: over the
+        candidates `X`, or with L-BFGS from its best candidates, using the
+        exact gradients of the function. Among the candidates, each function
+        only picks points that no earlier function has picked."""
+        acq_func_kwargs = self.acq_func_kwargs or {}
+        functions = est.sample_functions(
+            n_samples=n_samples,
+            n_features=acq_func_kwargs.get("n_features", 1000),
+            random_state=self.rng,
+        )
+        values = functions(X)
+        if self._uses_lattice() and self._lattice_excluded is not None:
+            values[self._lattice_excluded] = np.inf
+
+        transformed_bounds = np.array(self.space.transformed_bounds)
+        next_xs = []
+        for j in range(n_samples):
+            if (
+                self.acq_optimizer == "sampling"
+                or self._constraints
+                or self._uses_lattice()
+            ):
+                best = np.argmin(values[:, j])
+                next_xs.append(X[best])
+                values[best] = np.inf
+                continue
+
+            def func(X, j=j):
+                sample_values, grad = functions(X, return_grad=True)
+                return sample_values[:, j], grad[:, j]
+
+            n_starts = max(self.n_restarts_optimizer, 1)
+            cand_xs, cand_values = batch_fmin_l_bfgs_b(
+                func,
+                X[np.argsort(values[:, j])[:n_starts]],
+                bounds=self.space.transformed_bounds,
+                maxiter=20,
+            )
+            next_x = cand_xs[np.argmin(cand_values)]
+            if not self.space.is_categorical:
+                next_x = np.clip(
+                    next_x, transformed_bounds[:, 0], transformed_bounds[:, 1]
+                )
+            next_xs.append(next_x)
+        return next_xs
+
+    def _screen_candidates(self, est, X, y_opt):
+        """Return the candidates among `X` that are among the best
+        `n_screened` for any of the candidate acquisition functions, with
+        the posterior predicted in single precision."""
+        if not isinstance(
+            est,
+            (GaussianProcessRegressor, RandomForestRegressor, ExtraTreesRegressor),
+        ):
+            return X
+        n_screened = max(self.n_screened, self.n_restarts_optimizer)
+        if len(X) <= n_screened:
+            return X
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            mu, std = est.predict(X, return_std=True, dtype=np.float32)
+        # A stable sort keeps the first of tied candidates, as np.argmin
+        # does on all candidates
+        screened = np.unique(np.concatenate([
+            np.argsort(
+                _gaussian_acquisition_from_posterior(
+                    mu,
+                    std,
+                    y_opt=y_opt,
+                    acq_func=cand_acq_func,
+                    acq_func_kwargs=self.acq_func_kwargs,
+                ),
+                kind="stable",
+            )[:n_screened]
+            for cand_acq_func in self.cand_acq_funcs_
+        ]))
+        return X[screened]
+
+    def _prune_candidates(self, est, X, y_opt):
+        """Return the candidates among `X` that may be among the best for
+        any of the candidate acquisition functions, where the sampling
+        optimizer uses the best candidate and lbfgs the best
+        `n_restarts_optimizer` candidates.
+
+        Whether a candidate may be among the best is decided from a lower
+        bound of its acquisition value, computed from the predicted mean and
+        an upper bound of the predicted standard deviation that costs about
+        as much as the mean. The bound is compared to the exact acquisition
+        values of the candidates with the lowest bounds."""
+        if not isinstance(est, GaussianProcessRegressor):
+            return X
+        if self.acq_optimizer == "sampling" or self._constraints:
+            n_best = 1
+        else:
+            n_best = max(self.n_restarts_optimizer, 1)
+        # Candidates whose exact values bound the values of the best
+        n_exact = 10 * n_best
+        if len(X) <= n_exact:
+            return X
+
+        mu, max_std = est._predict_std_bound(X)
+        bounds = [
+            _acquisition_lower_bound(
+                mu,
+                max_std,
+                y_opt=y_opt,
+                acq_func=cand_acq_func,
+                acq_func_kwargs=self.acq_func_kwargs,
+            )
+            for cand_acq_func in self.cand_acq_funcs_
+        ]
+        exact = np.unique(np.concatenate([
+            np.argpartition(bound, n_exact - 1)[:n_exact] for bound in bounds
+        ]))
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            exact_mu, exact_std = est.predict(X[exact], return_std=True)
+
+        keep = np.zeros(len(X), dtype=bool)
+        for cand_acq_func, bound in zip(self.cand_acq_funcs_, bounds):
+            values = _gaussian_acquisition_from_posterior(
+                exact_mu,
+                exact_std,
+                y_opt=y_opt,
+                acq_func=cand_acq_func,
+                acq_func_kwargs=self.acq_func_kwargs,
+            )
+            # The n_best'th best value of all candidates is at most the
+            # n_best'th best value of these candidates
+            threshold = np.partition(values, n_best - 1)[n_best - 1]
+            keep |= bound <= threshold
+        return X[keep]
+
+    def _uses_lattice(self):
+        """Whether the acquisition function is evaluated at all points of
+        the space instead of at sampled candidates."""
+        return self._lattice is not None and not self._constraints
+
+    def _sample_candidates(self):
+        """Return the transformed candidate points at which the acquisition
+        function is evaluated, respecting the constraints, from the
+        candidate pool, or all points of a small discrete space."""
+        if self._uses_lattice():
+            return self._lattice
+        incumbent = None
+        yt = self._observations.y
+        if len(yt) and yt.ndim == 1:
+            incumbent = self._observations.Xt[np.argmin(yt)]
+        return self._candidate_pool.candidates(
+            self.rng, constraints=self._constraints, incumbent=incumbent
+        )
+
+    def _fits_shared_model(self):
+        """Whether a single Gaussian process is fitted to all objectives."""
+        return self.shared_kernel and isinstance(
+            self.base_estimator_, GaussianProcessRegressor
+        )
+
+    def _fit_model(self, X, y, previous=None, optimize=True):
+        """Fit a clone of `base_estimator_` to the transformed points `X`.
+
+        Gaussian process regressors follow the refit schedule set by
+        `model_kwargs`: if `optimize` is False, the hyperparameters of the
+        `previous` model are kept fixed, unless the log-marginal-likelihood
+        per observation drops by more than `lml_threshold`. Other estimators
+        are always fitted from scratch.
+
+        Returns the fitted estimator and whether its hyperparameters were
+        optimised.
+        """
+        est = clone(self.base_estimator_)
+        warm = isinstance(est, GaussianProcessRegressor) and isinstance(
+            previous, GaussianProcessRegressor
+        )
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            if not warm:
+                est.fit(X, y)
+                return est, True
+
+            if not optimize:
+                est.warm_fit(X, y, previous.theta_, optimize=False)
+                if self.lml_threshold is None:
+                    return est, False
+                lml_drop = (
+                    previous.log_marginal_likelihood_value_
+                    / previous.X_train_.shape[0]
+                    - est.log_marginal_likelihood_value_ / est.X_train_.shape[0]
+                )
+                if lml_drop <= self.lml_threshold:
+                    return est, False
+                est = clone(self.base_estimator_)
+
+            if self.warm_start:
+                est.warm_fit(X, y, previous.theta_)
+            else:
+                est.fit(X, y)
+        return est, True
+
     def estimate(self, x: Collection) -> List[namedtuple]:
         """
         Estimates the objective function value(s) for the point(s) `x`.
@@ -869,10 +1574,6 @@ class Optimizer(object):
             "mean" and "std", and a field with the same name as the objective
             ("Y" by default), which in turn has the fields "mean" and "std".
         """
-        self_with_observation_noise = self.copy()
-        self_with_observation_noise.add_observational_noise()
-        self_without_observation_noise = self.copy()
-        self_without_observation_noise.remove_observational_noise()
         single_objective_estimation = namedtuple(
             "single_objective_estimation", ["mean", "std", "std_model"]
         )
@@ -891,11 +1592,14 @@ class Optimizer(object):
             # default), which in turn has the fields "mean" and "std", for
             # consistency with multiobjective. They also have the fields "mean"
             # and "std", for ease of use.
-            prediction = self_with_observation_noise.models[-1].predict(
-                transformed_x, return_std=True
-            )
-            (_, noiseless_predicted_std) = self_without_observation_noise.models[-1].predict(
-                transformed_x, return_std=True
+            # The std with and without the observational noise are computed
+            # in one pass, without modifying the kernel of the model
+            (
+                predicted_mean,
+                noiseless_predicted_std,
+                predicted_std,
+            ) = self.models[-1].predict(
+                transformed_x, return_std=True, return_noisy_std=True
             )
             # The estimate is "packed" different than sci-kit learn predictions
             # are. The predictions are a tuple of two arrays, one for the mean
@@ -912,35 +1616,32 @@ class Optimizer(object):
                     std_model
                 ) for
                 mean, std, std_model in zip(
-                    prediction[0], prediction[1], noiseless_predicted_std
+                    predicted_mean, predicted_std, noiseless_predicted_std
                 )
             ]
         else:
             estimation = namedtuple("estimation", self.objective_name_list)
             # Make a list of predictions, one for each objective. This is a
-            # list of tuples, each tuple containing two arrays, one for the
-            # mean and one for the standard deviation; each array has one
+            # list of tuples, each tuple containing three arrays, one for the
+            # mean, one for the standard deviation without and one for the
+            # standard deviation with observational noise; each array has one
             # element per x.
             predict_list = [
-                model.predict(transformed_x, return_std=True) for
-                model in self_with_observation_noise.models[-1]
+                model.predict(
+                    transformed_x, return_std=True, return_noisy_std=True
+                ) for model in self.models[-1]
             ]
-            noiseless_predict_list = [
-                model.predict(transformed_x, return_std=True) for
-                model in self_without_observation_noise.models[-1]
+            # For each x and objective, create the
+            # single_objective_estimation, and pack the estimations for each x
+            # into a namedtuple.
+            estimate_list = [
+                estimation(*[
+                    single_objective_estimation(mean, std, std_model)
+                    for mean, std_model, std in objective_predictions
+                ]) for objective_predictions in zip(*[
+                    zip(*prediction) for prediction in predict_list
+                ])
             ]
-            estimate_list = []
-            for i in range(len(x)):
-                # For each x and objective, create the
-                # single_objective_estimation and append it to the list of
-                # estimations for that x
-                estimate_list.append([single_objective_estimation(
-                            predict_list[j][0][i],
-                            predict_list[j][1][i],
-                            noiseless_predict_list[j][1][i]
-                        ) for j in range(self.n_objectives)])
-            # Packing the list of estimations for each x into a namedtuple.
-            estimate_list = [estimation(*result) for result in estimate_list]
         return estimate_list
 
     def _check_y_is_valid(self, x, y):
@@ -1053,11 +1754,11 @@ class Optimizer(object):
     def update_next(self):
         """Updates the value returned by opt.ask(). Useful if a parameter was updated after ask was called."""
         self.cache_ = {}
-        # Ask for a new next_x. Usefull if new constraints have been added or lenght_scale has been tweaked.
-        # We only need to overwrite _next_x if it exists.
-        if hasattr(self, "_next_x"):
-            opt = self.copy(random_state=self.rng)
-            self._next_x = opt._next_x
+        # Compute a new next_x. Usefull if new constraints have been added or lenght_scale has been tweaked.
+        # We only need to compute _next_x if a model has been fitted.
+        self._next_x_value = None
+        if self.models:
+            self._next_x_value = self._compute_next_x()
 
     def get_result(self):
         """Returns the same result that would be returned by opt.tell()
@@ -1122,12 +1823,13 @@ class Optimizer(object):
             n_objectives=self.n_objectives,
             n_initial_points=999,
         )
-        for i in range(len(self.Xi)):
-            if self.n_objectives == 1:
-                copy.tell(self.Xi[i], 0)
-            elif self.n_objectives > 1:
-                copy.Xi.append(self.Xi[i])
-                copy.yi.append(np.zeros(self.n_objectives).tolist())
+        if self.n_objectives == 1:
+            y_zero = 0
+        else:
+            y_zero = np.zeros(self.n_objectives).tolist()
+        copy.Xi = list(self.Xi)
+        copy.yi = [y_zero for _ in self.Xi]
+        copy._observations.sync(copy.Xi, copy.yi)
 
         # Initialize list with Steinerberger points
         X = []
@@ -1159,7 +1861,7 @@ class Optimizer(object):
                     # Make array with categories for that dimension
                     categories = dim.categories
                     # Make array with all instances of categories observed
-                    instances = np.array(copy.Xi)[:, n]
+                    instances = copy._observations.X[:, n]
                     # Calculate the number of instances of each category
                     cat_population = np.zeros(len(categories))
                     for category, i in zip(categories, range(len(categories))):
@@ -1173,6 +1875,8 @@ class Optimizer(object):
             X.append(next_X[0])
             # Append to Xi of copy optimizer
             copy.Xi.append(next_X[0])
+            copy.yi.append(y_zero)
+            copy._observations.sync(copy.Xi, copy.yi)
 
         return X
 
@@ -1180,18 +1884,13 @@ class Optimizer(object):
     def stbr_fun(self, x):
         # parameter to ensure that log argument is non-zero
         eta = 10**-8
-        # Initialize Steinerberger sum
-        stbr_sum = 0
-        # Transform initial points to [0,1]^d space
-        Xi = self.space.transform(self.Xi)
-        # for loop over all existing points
-        for i in range(len(Xi)):
-            # Calculate the factors in the Steinerberger term in each dimension
-            stbr_vector = 1 - np.log(2 * np.sin(np.pi * abs(x - Xi[i])) + eta)
-            # Calculate the Steinerberger term by multiplying factor from each dimension
-            stbr_term = np.prod(stbr_vector)
-            # Add term to Steinerberger sum
-            stbr_sum = stbr_sum + stbr_term
+        # Existing points in the [0,1]^d space
+        Xi = self._observations.Xt
+        # Calculate the factors in the Steinerberger term in each dimension
+        # for all existing points at once
+        stbr_vectors = 1 - np.log(2 * np.sin(np.pi * np.abs(x - Xi)) + eta)
+        # Multiply the factors from each dimension and sum over the points
+        stbr_sum = np.sum(np.prod(stbr_vectors, axis=1))
 
         return stbr_sum
 
@@ -1210,6 +1909,10 @@ class Optimizer(object):
         #        if y < 0:
         #            Constraints -= y
 
+        if self._fits_shared_model() and self._shared_model is not None:
+            # All objectives are predicted at once
+            return list(self._shared_model.predict(xx)[0])
+
         for i in range(self.n_objectives):
             F[i] = self.models[-1][i].predict(xx)[0]
 
@@ -1219,10 +1922,10 @@ class Optimizer(object):
     def best_Pareto_point(self, pop, front, q=0.5):
         Population = np.asarray(pop)
 
-        IndexF, FatorF = self.__LargestOfLeast(front, self.yi)
+        IndexF, FatorF = self.__LargestOfLeast(front, self._observations.y)
 
         IndexPop, FatorPop = self.__LargestOfLeast(
-            Population, self.space.transform(self.Xi).tolist()
+            Population, self._observations.Xt
         )
 
         Fator = q * FatorF + (1 - q) * FatorPop
@@ -1253,17 +1956,10 @@ class Optimizer(object):
     @staticmethod
     def __MinimalDistance(X, Y):
         Y = np.asarray(Y)
-        N = len(X)
-        Npts = len(Y)
-        DistMin = float("inf")
-        for i in range(Npts):
-            Dist = 0.0
-            for j in range(N):
-                Dist += (X[j] - Y[i, j]) ** 2
-            Dist = np.sqrt(Dist)
-            if Dist < DistMin:
-                DistMin = Dist
-        return DistMin
+        if len(Y) == 0:
+            return float("inf")
+        Dist = np.sqrt(np.sum((np.asarray(X) - Y) ** 2, axis=1))
+        return np.min(Dist)
 
     # This function calls NSGAII to estimate the Pareto Front
     def NSGAII(self, MU=40):
@@ -525,22 +525,19 @@ def dependence(
         # We sample evenly instead of randomly. This is necessary when using
         # categorical values
         xi, xi_transformed = _evenly_sample(space.dimensions[i], n_points)
-        yi = []
-        stddevs = []
-        for x_ in xi_transformed:
-            rvs_ = np.array(sample_points)  # copy
-            # We replace the values in the dimension that we want to keep fixed
-            rvs_[:, dim_locs[i] : dim_locs[i + 1]] = x_
-            # In case of `x_eval=None` rvs conists of random samples.
-            # Calculating the mean of these samples is how partial dependence
-            # is implemented.
-            funcvalue, stddev = model.predict(rvs_, return_std = True)
-            yi.append(np.mean(funcvalue))
-            stddevs.append(np.mean(stddev))
-        # Convert yi and stddevs from lists to numpy arrays
-        yi = np.array(yi)
-        stddevs = np.array(stddevs)
-        
+        # One copy of the samples per point, predicted in a single call
+        rvs_ = np.tile(sample_points, (len(xi_transformed), 1, 1))
+        # We replace the values in the dimension that we want to keep fixed
+        rvs_[:, :, dim_locs[i] : dim_locs[i + 1]] = np.reshape(
+            xi_transformed, (len(xi_transformed), 1, -1))
+        # In case of `x_eval=None` rvs conists of random samples.
+        # Calculating the mean of these samples is how partial dependence
+        # is implemented.
+        funcvalue, stddev = model.predict(
+            rvs_.reshape(-1, rvs_.shape[2]), return_std = True)
+        yi = np.mean(funcvalue.reshape(rvs_.shape[:2]), axis=1)
+        stddevs = np.mean(stddev.reshape(rvs_.shape[:2]), axis=1)
+
         return xi, yi, stddevs
 
     else:
@@ -549,24 +546,26 @@ def dependence(
 
         # stddev structure is made regardless of whether it is returned,
         # since this is cheap and makes the code simpler.
+        # One copy of the samples per point in dimension i, predicted in a
+        # single call for each point in dimension j
+        rvs_ = np.tile(sample_points, (len(yi_transformed), 1, 1))
+        rvs_[:, :, dim_locs[i] : dim_locs[i + 1]] = np.reshape(
+            yi_transformed, (len(yi_transformed), 1, -1))
         zi = []
         stddev_matrix = []
         for x_ in xi_transformed:
-            value_row = []
-            stddev_row = []
-            for y_ in yi_transformed:
-                rvs_ = np.array(sample_points)  # copy
-                rvs_[:, dim_locs[j] : dim_locs[j + 1]] = x_
-                rvs_[:, dim_locs[i] : dim_locs[i + 1]] = y_
-                funcvalue, stddev = model.predict(rvs_, return_std = True)
-                value_row.append(np.mean(funcvalue))
-                stddev_row.append(np.mean(stddev))
-            zi.append(value_row)
-            stddev_matrix.append(stddev_row)
+            rvs_[:, :, dim_locs[j] : dim_locs[j + 1]] = x_
+            funcvalue, stddev = model.predict(
+                rvs_.reshape(-1, rvs_.shape[2]), return_std = True)
+            zi.append(np.mean(funcvalue.reshape(rvs_.shape[:2]), axis=1))
+            stddev_matrix.append(
+                np.mean(stddev.reshape(rvs_.shape[:2]), axis=1))
+        zi = np.array(zi)
+        stddev_matrix = np.array(stddev_matrix)
         if return_std:
-            return xi, yi, np.array(zi).T, np.array(stddev_matrix).T
+            return xi, yi, zi.T, stddev_matrix.T
         else:
-            return xi, yi, np.array(zi).T
+            return xi, yi, zi.T
 
 
 def plot_objective(
@@ -2020,7 +2019,7 @@ def plot_expected_minimum_convergence(
         # Transform x-value into transformed space and sample n times
         # Make 95% quantiles of samples
         transformed_point = _opt.space.transform([_exp[0],])
-        samples_of_y = _result_internal.models[-1].sample_y(
+        samples_of_y = _result_internal.models[-1].sample_marginal(
             transformed_point, n_samples=10000, random_state=random_state
         )
         quants = mquantiles(samples_of_y.flatten(), [0.025, 0.975])
@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+from itertools import product
 from typing import Iterable, List, Union
 
 import numbers
@@ -188,7 +189,8 @@ class Dimension(ABC):
         if isinstance(points, (int, float)):  # If a single point is given, convert it
             # to a list.
             points = [points]
-        if any([point < 0 or point > 1 for point in points]):
+        points = np.asarray(points, dtype=float)
+        if np.any((points < 0) | (points > 1)):
             raise ValueError("Sample points must be between 0 and 1.")
         sampled_points = self._sample(points)
         if not allow_duplicates:
@@ -343,15 +345,13 @@ class Real(Dimension):
         return abs(a - b)
 
     def _sample(self, point_list: Iterable[float]) -> np.ndarray:
+        point_list = np.asarray(point_list, dtype=float)
         if self.prior == "uniform":
-            sampled_points = [
-                point * (self.high - self.low) + self.low for point in point_list
-            ]
+            sampled_points = point_list * (self.high - self.low) + self.low
         else:
-            log_sampled_points = [
-                point * np.log(self.high / self.low) + np.log(self.low)
-                for point in point_list
-            ]
+            log_sampled_points = (
+                point_list * np.log(self.high / self.low) + np.log(self.low)
+            )
             sampled_points = np.exp(log_sampled_points)
         return sampled_points
 
@@ -454,9 +454,10 @@ class Integer(Dimension):
         return abs(a - b)
 
     def _sample(self, point_list: Iterable[float]) -> np.ndarray:
-        point_list = [
-            point * (self.high + 1 - self.low) + self.low for point in point_list
-        ]
+        point_list = (
+            np.asarray(point_list, dtype=float) * (self.high + 1 - self.low)
+            + self.low
+        )
         return np.floor(point_list).astype(int)
 
 
@@ -579,8 +580,13 @@ class Categorical(Dimension):
         cummulative_prior = np.cumsum(self.prior_)
         # For each point in point_list, find the index of the first element in cummulative_prior that is greater than the point
         # This is the index of the category that the point corresponds to
-        category_index = [np.argmax(cummulative_prior > point) for point in point_list]
-        return np.array([self.categories[index] for index in category_index])
+        category_index = np.searchsorted(
+            cummulative_prior, np.asarray(point_list, dtype=float), side="right"
+        )
+        # A point beyond a cumulative prior that sums to slightly less than 1
+        # is given the first category, as np.argmax of all False
+        category_index[category_index == len(cummulative_prior)] = 0
+        return np.array(self.categories)[category_index]
 
 
 class Space(object):
@@ -732,15 +738,7 @@ class Space(object):
             columns.append(dim.sample(index_array))
 
         # Transpose
-        rows = []
-        for i in range(n_samples):
-            r = []
-            for j in range(self.n_dims):
-                r.append(columns[j][i])
-
-            rows.append(r)
-
-        return rows
+        return [list(row) for row in zip(*columns)]
 
     def transform(self, X):
         """Transform samples from the original space into a warped space.
@@ -879,6 +877,41 @@ class Space(object):
         """Space contains any categorical dimensions"""
         return any([isinstance(dim, Categorical) for dim in self.dimensions])
 
+    @property
+    def cardinality(self):
+        """The number of points in the space, or infinity if it contains any
+        Real dimensions"""
+        n_points = 1
+        for dim in self.dimensions:
+            if isinstance(dim, Integer):
+                n_points *= dim.high - dim.low + 1
+            elif isinstance(dim, Categorical):
+                n_points *= len(dim.categories)
+            else:
+                return np.inf
+        return n_points
+
+    def lattice(self):
+        """Return all points of a space without Real dimensions.
+
+        Returns
+        -------
+        * `points` [list of lists, shape=(cardinality, n_dims)]:
+            The points, in the order of `itertools.product` of the values of
+            each dimension.
+        """
+        values = []
+        for dim in self.dimensions:
+            if isinstance(dim, Integer):
+                values.append(range(dim.low, dim.high + 1))
+            elif isinstance(dim, Categorical):
+                values.append(dim.categories)
+            else:
+                raise ValueError(
+                    "Can only enumerate the points of a space without Real "
+                    "dimensions, got {}".format(dim))
+        return [list(point) for point in product(*values)]
+
     def distance(self, point_a, point_b):
         """Compute the L1 (Manhattan or taxicab) distance between two points in this space.
 
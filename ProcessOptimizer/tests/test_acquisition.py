@@ -10,6 +10,7 @@ from numpy.testing import assert_raises
 
 from ProcessOptimizer.acquisition import _gaussian_acquisition
 from ProcessOptimizer.acquisition import gaussian_acquisition_1D
+from ProcessOptimizer.acquisition import gaussian_batch_acquisition_1D
 from ProcessOptimizer.acquisition import gaussian_ei
 from ProcessOptimizer.acquisition import gaussian_lcb
 from ProcessOptimizer.acquisition import gaussian_pi
@@ -121,6 +122,67 @@ def test_acquisition_gradient():
         check_gradient_correctness(X_new, gpr, acq_func, np.max(y))
 
 
+@pytest.mark.fast_test
+@pytest.mark.parametrize("acq_func", ["LCB", "PI", "EI"])
+def test_acquisition_gradient_of_several_points(acq_func):
+    rng = np.random.RandomState(0)
+    X = rng.randn(20, 5)
+    y = rng.randn(20)
+    X_new = rng.randn(4, 5)
+    gpr = GaussianProcessRegressor(kernel=Matern() + WhiteKernel())
+    gpr.fit(X, y)
+
+    values, grad = _gaussian_acquisition(
+        X_new, gpr, np.max(y), acq_func=acq_func, return_grad=True)
+    assert grad.shape == X_new.shape
+    for x, x_value, x_grad in zip(X_new, values, grad):
+        value, expected = gaussian_acquisition_1D(x, gpr, np.max(y), acq_func)
+        assert_array_almost_equal(x_value, value)
+        assert_array_almost_equal(x_grad, expected)
+
+
+@pytest.mark.fast_test
+@pytest.mark.parametrize("acq_func", ["qEI", "qLCB"])
+def test_batch_acquisition_gradient(acq_func):
+    rng = np.random.RandomState(0)
+    X = rng.randn(20, 3)
+    y = rng.randn(20)
+    gpr = GaussianProcessRegressor(kernel=Matern(), noise="gaussian")
+    gpr.fit(X, y)
+    base_samples = rng.randn(64, 4)
+    X_new = rng.randn(4 * 3)
+
+    def batch_acq(x):
+        return gaussian_batch_acquisition_1D(
+            x, gpr, np.max(y), acq_func, base_samples)
+
+    analytic_grad = batch_acq(X_new)[1]
+    num_grad = optimize.approx_fprime(
+        X_new, lambda x: batch_acq(x)[0], 1e-6)
+    assert_array_almost_equal(analytic_grad, num_grad, 4)
+
+
+@pytest.mark.fast_test
+def test_batch_acquisition_single_point():
+    rng = np.random.RandomState(0)
+    X = rng.randn(20, 3)
+    y = rng.randn(20)
+    gpr = GaussianProcessRegressor(kernel=Matern(), noise="gaussian")
+    gpr.fit(X, y)
+    X_new = rng.randn(1, 3)
+    # For a single point the batch acquisition functions estimate the
+    # single point ones
+    base_samples = rng.randn(200000, 1)
+    for batch_acq_func, acq_func in [("qEI", "EI"), ("qLCB", "LCB")]:
+        assert_array_almost_equal(
+            gaussian_batch_acquisition_1D(
+                X_new, gpr, np.median(y), batch_acq_func, base_samples,
+                return_grad=False),
+            _gaussian_acquisition(X_new, gpr, np.median(y), acq_func)[0],
+            2,
+        )
+
+
 def test_gaussian_acquisition_check_inputs():
     model = ConstantGPRSurrogate(Space(((1.0, 9.0),)))
     with pytest.raises(ValueError) as err:
@@ -0,0 +1,67 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from numpy.testing import assert_equal
+
+from ProcessOptimizer import AsyncOptimizer, Optimizer
+from ProcessOptimizer.model_systems import get_model_system
+
+branin = get_model_system("branin_no_noise").get_score
+
+
+@pytest.mark.fast_test
+@pytest.mark.parametrize("strategy", ["cl_min", "KB"])
+def test_async_optimizer_workers(strategy):
+    optimizer = Optimizer(
+        [(-5.0, 10.0), (0.0, 15.0)], n_initial_points=4, random_state=1
+    )
+    async_optimizer = AsyncOptimizer(optimizer, strategy=strategy)
+    asked = []
+
+    async def worker(n_evaluations):
+        for _ in range(n_evaluations):
+            x = await async_optimizer.ask()
+            asked.append(x)
+            # Let the other workers ask while this point is evaluated
+            await asyncio.sleep(0.01)
+            await async_optimizer.tell(x, branin(x))
+
+    async def run():
+        await asyncio.gather(*[worker(3) for _ in range(3)])
+
+    asyncio.run(run())
+
+    assert_equal(len(optimizer.Xi), 9)
+    assert_equal(async_optimizer.pending, [])
+    # Pending points are taken into account, so all points are different
+    assert_equal(len(np.unique(asked, axis=0)), 9)
+    assert len(optimizer.models) > 0
+
+
+@pytest.mark.fast_test
+def test_async_optimizer_pending():
+    optimizer = Optimizer(
+        [(-5.0, 10.0), (0.0, 15.0)], n_initial_points=2, random_state=1
+    )
+    optimizer.tell([[0.0, 0.0], [5.0, 5.0]], [branin([0.0, 0.0]), branin([5.0, 5.0])])
+    async_optimizer = AsyncOptimizer(optimizer)
+
+    async def run():
+        x1 = await async_optimizer.ask()
+        x2 = await async_optimizer.ask()
+        return x1, x2
+
+    x1, x2 = asyncio.run(run())
+    assert_equal(x1, optimizer.ask())
+    assert x1 != x2
+    assert_equal(async_optimizer.pending, [x1, x2])
+    # The lies are only told to forks of the optimizer
+    assert_equal(len(optimizer.Xi), 2)
+
+    async_optimizer.cancel(x1)
+    assert_equal(async_optimizer.pending, [x2])
+
+    with pytest.raises(ValueError):
+        AsyncOptimizer(optimizer, strategy="stbr_fill")
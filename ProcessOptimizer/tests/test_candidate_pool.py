@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+from numpy.testing import assert_array_almost_equal
+from numpy.testing import assert_array_equal
+from numpy.testing import assert_equal
+
+from ProcessOptimizer.optimizer import Optimizer
+from ProcessOptimizer.optimizer._candidate_pool import CandidatePool
+from ProcessOptimizer.space import Categorical, Integer, Real, Space
+from ProcessOptimizer.space.constraints import Constraints, Single
+
+
+SPACE = Space([Real(0, 10), Integer(1, 5), Categorical(["a", "b", "c"])])
+
+
+@pytest.mark.fast_test
+def test_pool_draws_anew():
+    pool = CandidatePool(SPACE, 50)
+    X = pool.candidates(np.random.RandomState(1))
+    rng = np.random.RandomState(1)
+    assert_array_almost_equal(
+        X, SPACE.transform(SPACE.rvs(n_samples=50, random_state=rng)))
+    assert_array_almost_equal(
+        pool.candidates(np.random.RandomState(2)),
+        SPACE.transform(
+            SPACE.rvs(n_samples=50, random_state=np.random.RandomState(2))))
+
+
+@pytest.mark.fast_test
+def test_pool_refresh():
+    rng = np.random.RandomState(1)
+    pool = CandidatePool(SPACE, 40, refresh=0.25)
+    X = pool.candidates(rng)
+    X_next = pool.candidates(rng)
+    # The ten oldest points are replaced
+    assert_array_equal(X_next[10:], X[10:])
+    assert not np.any(np.all(X_next[:10] == X[:10], axis=1))
+    for _ in range(3):
+        X_next = pool.candidates(rng)
+    assert not np.any(np.all(X_next == X, axis=1))
+
+    # The pool is drawn anew when the constraints change
+    constraints = Constraints([Single(1, 3, "integer")], SPACE)
+    X = pool.candidates(rng, constraints=constraints)
+    assert all(
+        x[1] == 3 for x in SPACE.inverse_transform(X))
+
+
+@pytest.mark.fast_test
+def test_pool_quasi_random_and_local():
+    rng = np.random.RandomState(1)
+    pool = CandidatePool(SPACE, 64, n_local=20, quasi_random=True)
+    incumbent = SPACE.transform([[5.0, 3, "b"]])[0]
+    X = pool.candidates(rng, incumbent=incumbent)
+    assert_equal(X.shape, (84, SPACE.transformed_n_dims))
+    points = SPACE.inverse_transform(X)
+    assert all(point in SPACE for point in points)
+    # The Halton sequence covers each half of the Real dimension evenly
+    assert_equal(np.sum(X[:64, 0] < 5), 32)
+    # The local points are close to the incumbent
+    assert np.all(np.abs(X[64:, 0] - 5) < 5)
+    assert_array_equal(SPACE.transform(points[64:]), X[64:])
+
+
+@pytest.mark.fast_test
+def test_optimizer_candidate_pool():
+    opt = Optimizer(
+        SPACE, "GP", n_initial_points=3, random_state=1,
+        acq_optimizer_kwargs={
+            "n_points": 100, "refresh_candidates": 0.5,
+            "n_local_candidates": 10, "quasi_random": True},
+    )
+    for _ in range(5):
+        x = opt.ask()
+        opt.tell(x, x[0] + x[1] + (x[2] == "a"))
+    assert_equal(len(opt._sample_candidates()), 110)
+    # Forks refresh their own pool
+    X = opt._candidate_pool._X
+    opt.fork()._sample_candidates()
+    assert opt._candidate_pool._X is X
@@ -6,6 +6,7 @@ from scipy import optimize
 from numpy.testing import assert_almost_equal
 from numpy.testing import assert_array_almost_equal
 from numpy.testing import assert_array_equal
+from numpy.testing import assert_equal
 
 from ProcessOptimizer.learning import GaussianProcessRegressor
 from ProcessOptimizer.learning.gaussian_process.kernels import RBF
@@ -115,6 +116,32 @@ def test_std_gradient():
     assert_array_almost_equal(std_grad, num_grad, decimal=3)
 
 
+@pytest.mark.fast_test
+def test_batch_gradients():
+    length_scale = np.arange(1, 6)
+    X = rng.randn(10, 5)
+    y = rng.randn(10)
+    X_new = rng.randn(4, 5)
+    # A point with zero std
+    X_new[3] = X[0]
+
+    rbf = RBF(length_scale=length_scale, length_scale_bounds="fixed")
+    gpr = GaussianProcessRegressor(rbf, alpha=0.0, noise=None,
+                                   random_state=0).fit(X, y)
+
+    _, _, mean_grad, std_grad = gpr.predict(
+        X_new, return_std=True, return_mean_grad=True, return_std_grad=True)
+    assert mean_grad.shape == (4, 5)
+    assert std_grad.shape == (4, 5)
+    for x, x_mean_grad, x_std_grad in zip(X_new, mean_grad, std_grad):
+        _, _, x_mean_grad_single, x_std_grad_single = gpr.predict(
+            np.expand_dims(x, axis=0), return_std=True,
+            return_mean_grad=True, return_std_grad=True)
+        assert_array_almost_equal(x_mean_grad, x_mean_grad_single)
+        assert_array_almost_equal(x_std_grad, x_std_grad_single)
+    assert_array_equal(std_grad[3], 0.0)
+
+
 def test_gpr_handles_similar_points():
     """
     This tests whether our implementation of GPR
@@ -151,3 +178,309 @@ def test_ytrain_mean_std():
     gpr = GaussianProcessRegressor(random_state=0, normalize_y= False).fit(X, y)
     assert_almost_equal(gpr.y_train_mean_, 0)
     assert_almost_equal(gpr.y_train_std_, 1)
+
+
+@pytest.mark.fast_test
+def test_warm_fit():
+    X = rng.randn(20, 2)
+    y = np.sin(X[:, 0]) + X[:, 1]
+
+    gpr = GaussianProcessRegressor(Matern(), noise="gaussian").fit(X, y)
+    assert_array_almost_equal(
+        gpr.theta_[:-1], gpr.kernel_.theta[:-1]
+    )
+    assert_almost_equal(np.exp(gpr.theta_[-1]), gpr.noise_)
+
+    # Keeping the hyperparameters fixed reproduces the fitted model
+    fixed = GaussianProcessRegressor(Matern(), noise="gaussian").warm_fit(
+        X, y, gpr.theta_, optimize=False
+    )
+    assert_array_almost_equal(fixed.theta_, gpr.theta_)
+    assert_almost_equal(fixed.noise_, gpr.noise_)
+    assert_array_almost_equal(fixed.predict(X), gpr.predict(X))
+    assert_almost_equal(
+        fixed.log_marginal_likelihood_value_,
+        gpr.log_marginal_likelihood_value_,
+    )
+
+    # Optimising from a warm start does not end up with a worse likelihood
+    X_more = np.vstack([X, rng.randn(5, 2)])
+    y_more = np.sin(X_more[:, 0]) + X_more[:, 1]
+    warm = GaussianProcessRegressor(Matern(), noise="gaussian").warm_fit(
+        X_more, y_more, gpr.theta_
+    )
+    fixed_more = GaussianProcessRegressor(Matern(), noise="gaussian").warm_fit(
+        X_more, y_more, gpr.theta_, optimize=False
+    )
+    assert (
+        warm.log_marginal_likelihood_value_
+        >= fixed_more.log_marginal_likelihood_value_ - 1e-8
+    )
+
+
+@pytest.mark.fast_test
+def test_return_noisy_std():
+    X = rng.randn(20, 2)
+    y = np.sin(X[:, 0]) + X[:, 1] + 0.1 * rng.randn(20)
+    X_test = rng.randn(7, 2)
+
+    gpr = GaussianProcessRegressor(
+        Matern(), noise="gaussian", normalize_y=True
+    ).fit(X, y)
+    mean, std = gpr.predict(X_test, return_std=True)
+    # Add the fitted noise to the kernel, as in
+    # Optimizer.add_observational_noise
+    noisy = GaussianProcessRegressor(
+        Matern(), noise="gaussian", normalize_y=True
+    ).fit(X, y)
+    _, white_param = _param_for_white_kernel_in_Sum(noisy.kernel_)
+    noisy.kernel_.set_params(**{white_param: WhiteKernel(noisy.noise_)})
+    _, noisy_std = noisy.predict(X_test, return_std=True)
+    assert np.all(noisy_std > std)
+
+    # The result does not depend on the noise level in the kernel
+    for model in [gpr, noisy]:
+        mean_1, std_1, noisy_std_1 = model.predict(
+            X_test, return_std=True, return_noisy_std=True
+        )
+        assert_array_almost_equal(mean_1, mean)
+        assert_array_almost_equal(std_1, std)
+        assert_array_almost_equal(noisy_std_1, noisy_std)
+
+    with pytest.raises(ValueError):
+        gpr.predict(X_test, return_noisy_std=True)
+
+
+@pytest.mark.fast_test
+def test_condition_on():
+    X = rng.randn(15, 2)
+    y = np.sin(X[:, 0]) + X[:, 1] + 0.1 * rng.randn(15)
+    X_test = rng.randn(7, 2)
+
+    gpr = GaussianProcessRegressor(Matern(), noise="gaussian").fit(
+        X[:12], y[:12]
+    )
+    conditioned = gpr.condition_on(X[12:], y[12:])
+    # Refitting with the same hyperparameters gives the same model
+    refitted = GaussianProcessRegressor(Matern(), noise="gaussian").warm_fit(
+        X, y, gpr.theta_, optimize=False
+    )
+    assert_array_almost_equal(conditioned.L_, refitted.L_)
+    assert_array_almost_equal(conditioned.K_inv_, refitted.K_inv_)
+    assert_almost_equal(
+        conditioned.log_marginal_likelihood_value_,
+        refitted.log_marginal_likelihood_value_,
+    )
+    for result, expected in zip(
+        conditioned.predict(X_test, return_std=True),
+        refitted.predict(X_test, return_std=True),
+    ):
+        assert_array_almost_equal(result, expected)
+
+    # The original model is unchanged
+    assert_array_equal(gpr.X_train_, X[:12])
+    assert_equal(gpr.L_.shape, (12, 12))
+
+
+@pytest.mark.fast_test
+def test_lazy_K_inv():
+    X = rng.randn(10, 2)
+    y = np.sin(X[:, 0])
+    gpr = GaussianProcessRegressor(Matern(), noise="gaussian").fit(X, y)
+    # The inverse is not computed when fitting
+    assert "_K_inv_cache" not in gpr.__dict__
+    K = gpr.kernel_(X)
+    K[np.diag_indices_from(K)] += gpr.noise_ + gpr.alpha
+    assert_array_almost_equal(gpr.K_inv_ @ K, np.eye(10))
+    assert gpr.K_inv_ is gpr.K_inv_
+
+    # A new fit invalidates the inverse
+    gpr.fit(X[:5], y[:5])
+    assert_equal(gpr.K_inv_.shape, (5, 5))
+
+
+@pytest.mark.fast_test
+def test_parallel_restarts():
+    X = rng.randn(20, 2)
+    y = np.sin(X[:, 0]) + X[:, 1]
+    kernel = Matern(length_scale_bounds=(0.01, 10))
+    serial = GaussianProcessRegressor(
+        kernel, noise="gaussian", n_restarts_optimizer=4,
+        random_state=1).fit(X, y)
+    parallel = GaussianProcessRegressor(
+        kernel, noise="gaussian", n_restarts_optimizer=4,
+        random_state=1, n_jobs=2).fit(X, y)
+    assert_array_almost_equal(parallel.theta_, serial.theta_)
+    assert_almost_equal(
+        parallel.log_marginal_likelihood_value_,
+        serial.log_marginal_likelihood_value_)
+    assert_array_almost_equal(parallel.alpha_, serial.alpha_)
+    assert parallel.kernel == serial.kernel
+
+
+@pytest.mark.fast_test
+@pytest.mark.parametrize("kernel", [kernel1, kernel2, kernel3, kernel5])
+def test_log_marginal_likelihood_gradient(kernel):
+    X = rng.randn(15, 3)
+    y = np.column_stack([np.sin(X[:, 0]), X[:, 1]])
+    gpr = GaussianProcessRegressor(kernel, optimizer=None).fit(X, y)
+    theta = gpr.kernel_.theta + 0.3
+    lml, grad = gpr.log_marginal_likelihood(theta, eval_gradient=True)
+    assert_almost_equal(lml, gpr.log_marginal_likelihood(theta))
+
+    num_grad = optimize.approx_fprime(
+        theta, lambda theta: gpr.log_marginal_likelihood(theta), 1e-6)
+    assert_array_almost_equal(grad, num_grad, decimal=3)
+
+
+@pytest.mark.fast_test
+@pytest.mark.parametrize("n_jobs", [None, 2])
+def test_predict_in_batches(n_jobs):
+    X = rng.randn(30, 3)
+    y = np.sin(X[:, 0]) + X[:, 1]
+    X_new = rng.randn(41, 3)
+    gpr = GaussianProcessRegressor(
+        Matern(length_scale=[1.0] * 3), noise="gaussian").fit(X, y)
+    results = gpr.predict(
+        X_new, return_std=True, return_mean_grad=True, return_std_grad=True,
+        return_noisy_std=True)
+    assert len(gpr._predict_batches(X_new)) == 1
+
+    # A few KiB per batch
+    gpr.set_params(working_memory=0.005, n_jobs=n_jobs)
+    assert len(gpr._predict_batches(X_new, return_mean_grad=True)) > 2
+    batched = gpr.predict(
+        X_new, return_std=True, return_mean_grad=True, return_std_grad=True,
+        return_noisy_std=True)
+    for result, batched_result in zip(results, batched):
+        assert_array_almost_equal(batched_result, result)
+    assert_array_almost_equal(gpr.predict(X_new), results[0])
+
+
+@pytest.mark.fast_test
+def test_predict_float32():
+    X = rng.randn(30, 3)
+    y = np.sin(X[:, 0]) + X[:, 1]
+    X_new = rng.randn(20, 3)
+    gpr = GaussianProcessRegressor(
+        Matern(length_scale=[1.0] * 3), noise="gaussian").fit(X, y)
+    mean, std = gpr.predict(X_new, return_std=True)
+    mean32, std32 = gpr.predict(X_new, return_std=True, dtype=np.float32)
+    assert_array_almost_equal(mean32, mean, decimal=4)
+    assert_array_almost_equal(std32, std, decimal=4)
+    # The kernel is evaluated in chunks written into single precision
+    assert_equal(gpr._cross_kernel(X_new, np.float32).dtype, np.float32)
+    assert_array_almost_equal(
+        gpr._cross_kernel(X_new, np.float32), gpr._cross_kernel(X_new))
+    # The single-precision Cholesky factor is cast once per fit
+    L32 = gpr._cast("L_", np.float32)
+    assert gpr._cast("L_", np.float32) is L32
+    gpr.fit(X, y)
+    assert gpr._cast("L_", np.float32) is not L32
+
+    # Gradients are computed in double precision
+    results = gpr.predict(
+        X_new, return_std=True, return_mean_grad=True, return_std_grad=True)
+    results32 = gpr.predict(
+        X_new, return_std=True, return_mean_grad=True, return_std_grad=True,
+        dtype=np.float32)
+    for result, result32 in zip(results, results32):
+        assert_array_equal(result32, result)
+
+
+@pytest.mark.fast_test
+def test_sample_marginal():
+    X = rng.randn(10, 2)
+    y = np.column_stack([np.sin(X[:, 0]), X[:, 1]])
+    X_new = rng.randn(3, 2)
+    gpr = GaussianProcessRegressor(
+        Matern(), noise="gaussian", normalize_y=True).fit(X, y[:, 0])
+    samples = gpr.sample_marginal(X_new, n_samples=20000, random_state=1)
+    assert_equal(samples.shape, (3, 20000))
+    mean, std = gpr.predict(X_new, return_std=True)
+    assert_array_almost_equal(np.mean(samples, axis=1), mean, decimal=2)
+    assert_array_almost_equal(np.std(samples, axis=1), std, decimal=2)
+    assert_array_equal(
+        samples, gpr.sample_marginal(X_new, n_samples=20000, random_state=1))
+
+    gpr.fit(X, y)
+    assert_equal(gpr.sample_marginal(X_new, n_samples=5).shape, (3, 2, 5))
+    assert_equal(
+        gpr.sample_marginal(X_new).shape, gpr.sample_y(X_new).shape)
+
+
+@pytest.mark.fast_test
+def test_sample_functions():
+    X = rng.uniform(size=(15, 2))
+    y = np.sin(5 * X[:, 0]) + X[:, 1]
+    X_new = rng.uniform(size=(4, 2))
+    gpr = GaussianProcessRegressor(
+        Matern(length_scale=[0.5, 0.5]), noise="gaussian",
+        normalize_y=True).fit(X, y)
+    functions = gpr.sample_functions(
+        n_samples=5000, n_features=2000, random_state=1)
+    values = functions(X_new)
+    assert_equal(values.shape, (4, 5000))
+    # The samples approximate the posterior
+    mean, std = gpr.predict(X_new, return_std=True)
+    assert_array_almost_equal(np.mean(values, axis=1), mean, decimal=1)
+    assert_array_almost_equal(np.std(values, axis=1), std, decimal=1)
+
+    # The gradients are exact
+    values, grad = functions(X_new[:1], return_grad=True)
+    assert_equal(grad.shape, (1, 5000, 2))
+    for i in range(2):
+        step = np.zeros(2)
+        step[i] = 1e-6
+        assert_array_almost_equal(
+            (functions(X_new[:1] + step) - values) / 1e-6, grad[:, :, i],
+            decimal=3)
+
+    gpr = GaussianProcessRegressor(RBF() + Matern()).fit(X, y)
+    with pytest.raises(ValueError):
+        gpr.sample_functions()
+
+
+@pytest.mark.fast_test
+def test_predict_std_bound():
+    X = rng.randn(20, 2)
+    y = np.sin(X[:, 0]) + X[:, 1]
+    X_new = np.vstack([rng.randn(30, 2), X[:3] + 1e-3])
+    gpr = GaussianProcessRegressor(
+        Matern(), noise="gaussian", normalize_y=True).fit(X, y)
+    mean, std = gpr.predict(X_new, return_std=True)
+    bound_mean, std_bound = gpr._predict_std_bound(X_new)
+    assert_array_almost_equal(bound_mean, mean)
+    assert np.all(std_bound >= std - 1e-10)
+    # Close to the training points the bound is tight
+    assert_array_almost_equal(std_bound[-3:], std[-3:], decimal=2)
+    assert np.all(std_bound < np.sqrt(gpr.kernel_.diag(X_new)) * gpr.y_train_std_)
+
+
+@pytest.mark.fast_test
+def test_predict_cached():
+    X = rng.randn(15, 2)
+    y = np.sin(X[:, 0]) + X[:, 1] + 0.1 * rng.randn(15)
+    X_test = rng.randn(7, 2)
+
+    gpr = GaussianProcessRegressor(
+        Matern(), noise="gaussian", normalize_y=True).fit(X[:12], y[:12])
+    _, _, cache = gpr._predict_cached(X_test)
+    # Models with the same hyperparameters and more training points only
+    # compute the rows of the new points
+    refitted = GaussianProcessRegressor(
+        Matern(), noise="gaussian", normalize_y=True).warm_fit(
+        X, y, gpr.theta_, optimize=False)
+    for model in [gpr.condition_on(X[12:], y[12:]), refitted]:
+        y_mean, y_std, model_cache = model._predict_cached(X_test, cache)
+        assert_array_equal(model_cache["V"][:12], cache["V"])
+        expected_mean, expected_std = model.predict(X_test, return_std=True)
+        assert_array_almost_equal(y_mean, expected_mean)
+        assert_array_almost_equal(y_std, expected_std)
+
+    # With other hyperparameters the cache is not used
+    other = GaussianProcessRegressor(Matern(), noise="gaussian").fit(X, 2 * y)
+    y_mean, y_std, _ = other._predict_cached(X_test, cache)
+    expected_mean, expected_std = other.predict(X_test, return_std=True)
+    assert_array_almost_equal(y_mean, expected_mean)
+    assert_array_almost_equal(y_std, expected_std)
@@ -1,3 +1,5 @@
+import threading
+
 import numpy as np
 from scipy import optimize
 from scipy.spatial.distance import pdist, squareform
@@ -8,6 +10,7 @@ except ImportError:
     UseOrdinalEncoder = False
 from numpy.testing import assert_array_almost_equal
 from numpy.testing import assert_array_equal
+from numpy.testing import assert_equal
 import pytest
 
 from ProcessOptimizer.learning.gaussian_process import GaussianProcessRegressor
@@ -19,6 +22,9 @@ from ProcessOptimizer.learning.gaussian_process.kernels import Matern
 from ProcessOptimizer.learning.gaussian_process.kernels import RationalQuadratic
 from ProcessOptimizer.learning.gaussian_process.kernels import RBF
 from ProcessOptimizer.learning.gaussian_process.kernels import WhiteKernel
+from ProcessOptimizer.learning.gaussian_process import kernels
+from ProcessOptimizer.learning.gaussian_process.kernels import _cache_squared_differences
+from ProcessOptimizer.learning.gaussian_process.kernels import _gradient_contraction
 
 
 KERNELS = []
@@ -84,6 +90,84 @@ def test_gradient_correctness(kernel):
     check_gradient_correctness(kernel, X, Y)
 
 
+@pytest.mark.fast_test
+@pytest.mark.parametrize("kernel", KERNELS)
+def test_batch_gradient(kernel):
+    rng = np.random.RandomState(0)
+    X = rng.randn(4, 5)
+    Y = rng.randn(10, 5)
+    X_grad = kernel.gradient_x(X, Y)
+    assert X_grad.shape == (4, 10, 5)
+    for x, x_grad in zip(X, X_grad):
+        assert_array_almost_equal(x_grad, kernel.gradient_x(x, Y))
+
+
+@pytest.mark.fast_test
+@pytest.mark.parametrize("kernel", KERNELS + [
+    RBF(length_scale=1.0),
+    Matern(length_scale=1.0, nu=1.5),
+    Matern(length_scale=1.0, nu=0.5, length_scale_bounds="fixed"),
+    ConstantKernel(2.0) * Matern(length_scale=[1.0] * 5, nu=2.5)
+    + WhiteKernel(0.1),
+])
+def test_cached_squared_differences(kernel):
+    rng = np.random.RandomState(0)
+    X = rng.randn(8, 5)
+    W = rng.randn(8, 8)
+    K, K_gradient = kernel(X, eval_gradient=True)
+    contraction = np.tensordot(W, K_gradient, axes=2)
+
+    with _cache_squared_differences():
+        for _ in range(2):
+            assert_array_almost_equal(kernel(X), K)
+            cached_K, cached_K_gradient = kernel(X, eval_gradient=True)
+            assert_array_almost_equal(cached_K, K)
+            assert_array_almost_equal(cached_K_gradient, K_gradient)
+            assert_array_almost_equal(
+                _gradient_contraction(kernel, X, W), contraction)
+        # The cache must not leak between length scales
+        other = kernel.clone_with_theta(kernel.theta + 0.5)
+        assert_array_almost_equal(
+            other(X), other.clone_with_theta(other.theta)(X.copy()))
+    assert_array_almost_equal(_gradient_contraction(kernel, X, W), contraction)
+
+
+@pytest.mark.fast_test
+def test_squared_differences_cache_scope():
+    X = np.random.RandomState(0).randn(8, 2)
+    kernel = RBF(length_scale=[1.0, 2.0])
+    with _cache_squared_differences() as cache:
+        with _cache_squared_differences() as inner:
+            assert inner is cache
+        kernel(X)
+        assert cache.differences[0] is X
+        # Only the points of the latest call, and one kernel matrix per
+        # thread, are kept
+        X_other = X.copy()
+        kernel.clone_with_theta(kernel.theta + 1)(X_other)
+        assert cache.differences[0] is X_other
+        assert kernels._current.memo[0] is X_other
+
+        # Other threads do not see the cache unless it is passed to them
+        seen = []
+
+        def worker(cache=None):
+            with _cache_squared_differences(cache) as thread_cache:
+                seen.append(thread_cache)
+
+        for thread_cache in [None, cache]:
+            thread = threading.Thread(target=worker, args=(thread_cache,))
+            thread.start()
+            thread.join()
+        assert seen[0] is not cache
+        assert seen[1] is cache
+
+    assert kernels._current.memo is None
+    with _cache_squared_differences() as other:
+        assert other is not cache
+        assert other.differences is None
+
+
 @pytest.mark.fast_test
 @pytest.mark.parametrize("random_state", [0, 1])
 @pytest.mark.parametrize("kernel", KERNELS)
@@ -178,6 +262,32 @@ def test_kernel_gradient():
     assert_array_almost_equal(K_gradient_approx, K_gradient, 4)
 
 
+@pytest.mark.fast_test
+@pytest.mark.parametrize("length_scale", [2.0, [0.1, 2.0, 0.5]])
+def test_hamming_category_codes(length_scale):
+    rng = np.random.RandomState(0)
+    categories = np.array(["ham", "spam", "eggs", "ted"])
+    X = categories[rng.randint(0, 4, (6, 3))]
+    Y = categories[rng.randint(0, 3, (4, 3))]
+    hm = HammingKernel(length_scale=length_scale)
+
+    # Same as with the full indicator tensor
+    indicator = np.expand_dims(X, axis=1) != Y
+    assert_array_almost_equal(
+        hm(X, Y), np.exp(-np.sum(np.asarray(length_scale) * indicator, axis=2)))
+    assert_array_almost_equal(hm(X), hm(X, X))
+
+    W = rng.randn(6, 6)
+    K_gradient = hm(X, eval_gradient=True)[1]
+    assert_array_almost_equal(
+        _gradient_contraction(hm, X, W),
+        np.tensordot(W, K_gradient, axes=2))
+
+    hm = HammingKernel(length_scale=length_scale, length_scale_bounds="fixed")
+    assert_equal(hm(X, eval_gradient=True)[1].shape, (6, 6, 0))
+    assert_equal(_gradient_contraction(hm, X, W).shape, (0,))
+
+
 @pytest.mark.fast_test
 def test_Y_is_not_None():
     rng = np.random.RandomState(0)
@@ -1,11 +1,14 @@
 import pytest
 import numpy as np
 
+from numpy.testing import assert_almost_equal
+from numpy.testing import assert_array_almost_equal
 from numpy.testing import assert_raises
 from numpy.testing import assert_equal
 
 
 from ProcessOptimizer import Optimizer
+from ProcessOptimizer.learning import GaussianProcessRegressor
 
 
 @pytest.mark.fast_test
@@ -46,3 +49,37 @@ def test_Pareto_in_space():
     # Assert that Pareto points are in space
     for x in pop:
         assert_equal(opt.space.__contains__(x), True)
+
+
+@pytest.mark.fast_test
+def test_shared_kernel():
+    opt = Optimizer(
+        [[0.0, 1.0], [0.0, 1.0]], n_objectives=2, n_initial_points=5,
+        random_state=1, model_kwargs={"shared_kernel": True}
+    )
+    rng = np.random.RandomState(0)
+    X = rng.uniform(size=(8, 2))
+    y = np.column_stack([np.sin(6 * X[:, 0]), 10 * X[:, 1] ** 2 + X[:, 0]])
+    opt.tell(X.tolist(), y.tolist())
+    models = opt.models[-1]
+    assert len(models) == 2
+    assert_array_almost_equal(models[0].theta_, models[1].theta_)
+
+    # Each model predicts as a single-output model with the same kernel
+    X_new = rng.uniform(size=(5, 2))
+    Xt = opt.space.transform(X.tolist())
+    for i, model in enumerate(models):
+        single = GaussianProcessRegressor(
+            kernel=opt.base_estimator_.kernel, normalize_y=True,
+            noise="gaussian")
+        single.warm_fit(Xt, y[:, i], model.theta_, optimize=False)
+        mean, std = model.predict(X_new, return_std=True)
+        single_mean, single_std = single.predict(X_new, return_std=True)
+        assert_array_almost_equal(mean, single_mean)
+        assert_array_almost_equal(std, single_std)
+        assert_almost_equal(
+            model.log_marginal_likelihood_value_,
+            single.log_marginal_likelihood_value_)
+
+    pop, logbook, front = opt.NSGAII()
+    assert len(opt.ask()) == 2
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from numpy.testing import assert_array_almost_equal
+from numpy.testing import assert_array_equal
+from numpy.testing import assert_equal
+
+from ProcessOptimizer.optimizer import Optimizer
+from ProcessOptimizer.optimizer._observations import ObservationStore
+from ProcessOptimizer.space import Categorical, Integer, Real, Space
+
+
+SPACE = Space([Real(0, 10), Integer(1, 5), Categorical(["a", "b", "c"])])
+
+
+@pytest.mark.fast_test
+def test_store_extend():
+    store = ObservationStore(SPACE)
+    assert_equal(len(store), 0)
+    assert_equal(store.Xt.shape, (0, SPACE.transformed_n_dims))
+
+    X = SPACE.rvs(n_samples=40, random_state=1)
+    y = list(range(40))
+    store.extend(X[:3], y[:3])
+    store.extend(X[3:], y[3:])
+
+    assert_equal(len(store), 40)
+    assert_array_almost_equal(store.Xt, SPACE.transform(X))
+    assert_array_equal(store.y, y)
+    assert_equal(store.X.tolist(), [list(x) for x in X])
+
+
+@pytest.mark.fast_test
+def test_store_sync():
+    store = ObservationStore(SPACE)
+    X = SPACE.rvs(n_samples=5, random_state=1)
+    y = [[i, -i] for i in range(5)]
+    store.sync(X[:2], y[:2])
+    assert_equal(len(store), 2)
+    store.sync(X, y)
+    assert_equal(len(store), 5)
+    assert_array_equal(store.y, y)
+    # Shorter lists rebuild the store
+    store.sync(X[:1], y[:1])
+    assert_equal(len(store), 1)
+    assert_array_almost_equal(store.Xt, SPACE.transform(X[:1]))
+
+
+@pytest.mark.fast_test
+def test_optimizer_observations_follow_tell():
+    opt = Optimizer([(-2.0, 2.0), (0, 5)], n_initial_points=3)
+    opt.tell([[0.0, 1], [1.0, 2]], [1.0, 2.0])
+    opt.tell([-1.0, 3], 0.5)
+    assert_array_almost_equal(
+        opt._observations.Xt, opt.space.transform(opt.Xi)
+    )
+    assert_array_equal(opt._observations.y, opt.yi)
+
+
+@pytest.mark.fast_test
+def test_store_fork():
+    X = SPACE.rvs(n_samples=6, random_state=1)
+    store = ObservationStore(SPACE)
+    store.extend(X[:4], range(4))
+
+    fork = store.fork()
+    fork.extend(X[4:5], [4])
+    store.extend(X[5:6], [5])
+
+    assert_array_equal(fork.y, [0, 1, 2, 3, 4])
+    assert_array_equal(store.y, [0, 1, 2, 3, 5])
+    assert_array_almost_equal(fork.Xt, SPACE.transform(X[:5]))
+    assert_array_almost_equal(store.Xt, SPACE.transform(X[:4] + X[5:6]))
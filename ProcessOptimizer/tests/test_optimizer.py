@@ -3,6 +3,7 @@ import pytest
 
 from sklearn.multioutput import MultiOutputRegressor
 from numpy.testing import (
+    assert_array_almost_equal,
     assert_array_equal,
     assert_almost_equal,
     assert_equal,
@@ -12,6 +13,9 @@ from numpy.testing import (
 from math import isclose
 
 from ProcessOptimizer import gp_minimize
+from ProcessOptimizer import Integer
+from ProcessOptimizer.acquisition import _gaussian_acquisition
+from ProcessOptimizer.optimizer._batch_lbfgs import batch_fmin_l_bfgs_b
 from ProcessOptimizer.model_systems.benchmarks import bench1, bench1_with_time
 from ProcessOptimizer.model_systems import get_model_system
 from ProcessOptimizer.model_systems.model_system import ModelSystem
@@ -23,6 +27,7 @@ from ProcessOptimizer.learning import (
     )
 from ProcessOptimizer.optimizer import Optimizer
 from ProcessOptimizer.utils import expected_minimum
+from scipy import optimize
 from scipy.optimize import OptimizeResult
 
 from ..learning.gaussian_process.gpr import _param_for_white_kernel_in_Sum
@@ -65,7 +70,7 @@ def test_multiple_asks():
     )
 
     opt.run(bench1, n_iter=3)
-    # tell() computes the next point ready for the next call to ask()
+    # tell() fits a model which is used by the next call to ask()
     # hence there are three after three iterations
     assert_equal(len(opt.models), 3)
     assert_equal(len(opt.Xi), 3)
@@ -345,7 +350,7 @@ def test_exhaust_initial_calls(base_estimator):
 def test_optimizer_base_estimator_string_invalid():
     with pytest.raises(ValueError) as e:
         Optimizer([(-2.0, 2.0)], base_estimator="rtr", n_initial_points=1)
-    assert "'RF', 'ET', 'GP', 'GBRT' or 'DUMMY'" in str(e.value)
+    assert "'RF', 'ET', 'GP', 'SGP', 'GBRT' or 'DUMMY'" in str(e.value)
 
 
 @pytest.mark.fast_test
@@ -631,3 +636,353 @@ def test_estimate_named_objectives():
     estimate = opt.estimate(x)[0]
     assert_almost_equal(estimate.foo.mean, y[0])
     assert_almost_equal(estimate.bar.mean, y[1])
+
+
+@pytest.mark.fast_test
+def test_refit_every():
+    opt = Optimizer(
+        [(-2.0, 2.0), (-3.0, 3.0)],
+        n_initial_points=3,
+        random_state=1,
+        model_kwargs={"refit_every": 3},
+    )
+    opt.run(bench1, n_iter=9)
+    thetas = [model.theta_ for model in opt.models]
+    assert_equal(len(thetas), 7)
+    # Hyperparameters are optimised on the first fit and every third fit
+    # after that, and kept fixed in between.
+    for i in [1, 2, 4, 5]:
+        assert_almost_equal(thetas[i], thetas[i - 1])
+    for i in [3, 6]:
+        assert np.any(thetas[i] != thetas[i - 1])
+
+
+@pytest.mark.fast_test
+def test_refit_lml_threshold():
+    # A threshold that is always exceeded gives a refit on every tell
+    opt = Optimizer(
+        [(-2.0, 2.0), (-3.0, 3.0)],
+        n_initial_points=3,
+        random_state=1,
+        model_kwargs={"refit_every": 100, "lml_threshold": -np.inf},
+    )
+    opt.run(bench1, n_iter=6)
+    thetas = [model.theta_ for model in opt.models]
+    for i in range(1, len(thetas)):
+        assert np.any(thetas[i] != thetas[i - 1])
+
+
+@pytest.mark.fast_test
+def test_refit_every_invalid():
+    with pytest.raises(ValueError):
+        Optimizer([(-2.0, 2.0)], model_kwargs={"refit_every": 0})
+
+
+@pytest.mark.fast_test
+def test_next_x_is_lazy():
+    opt = Optimizer([(-2.0, 2.0)], n_initial_points=2, random_state=1)
+    opt.tell([[-1.0], [1.0]], [1.0, 2.0])
+    # Fitting a model does not optimise the acquisition function
+    assert opt._next_x_value is None
+    opt.tell([0.5], 1.5)
+    assert opt._next_x_value is None
+    x = opt.ask()
+    assert_equal(opt._next_x_value, x)
+    assert_equal(opt.ask(), x)
+    # A new tell invalidates the point
+    opt.tell(x, 0.0)
+    assert opt._next_x_value is None
+    # update_next computes the point explicitly
+    opt.update_next()
+    assert opt._next_x_value is not None
+    assert_equal(opt.ask(), opt._next_x_value)
+
+
+@pytest.mark.fast_test
+def test_fork():
+    opt = Optimizer([(-2.0, 2.0)], n_initial_points=2, random_state=1)
+    opt.tell([[-1.0], [1.0], [0.5]], [1.0, 2.0, 1.5])
+    x = opt.ask()
+
+    fork = opt.fork(random_state=2)
+    # The fork shares the fitted model and the next point
+    assert fork.models[-1] is opt.models[-1]
+    assert_equal(fork.ask(), x)
+
+    # Telling the fork does not change the optimizer and vice versa
+    fork.tell([0.0], 0.5)
+    assert_equal(len(opt.Xi), 3)
+    assert_equal(len(opt.models), 1)
+    assert_equal(len(opt._observations), 3)
+    opt.tell([-0.5], 0.7)
+    assert_equal(fork.Xi[-1], [0.0])
+    assert_array_equal(fork._observations.Xt[-1], opt.space.transform([[0.0]])[0])
+    assert_array_equal(opt._observations.Xt[-1], opt.space.transform([[-0.5]])[0])
+
+
+@pytest.mark.fast_test
+@pytest.mark.parametrize("strategy", ["cl_min", "KB"])
+def test_ask_batch_without_refits(monkeypatch, strategy):
+    opt = Optimizer(
+        [(-2.0, 2.0), (-3.0, 3.0)], n_initial_points=3, random_state=1
+    )
+    opt.tell([[-1.0, 0.0], [1.0, 2.0], [0.5, -1.0]], [1.0, 2.0, 1.5])
+
+    fits = []
+    fit = GaussianProcessRegressor._fit
+
+    def counting_fit(self, *args, **kwargs):
+        fits.append(1)
+        return fit(self, *args, **kwargs)
+
+    monkeypatch.setattr(GaussianProcessRegressor, "_fit", counting_fit)
+    X = opt.ask(n_points=4, strategy=strategy)
+    # The lies are fantasy observations, so no model is fitted
+    assert_equal(len(fits), 0)
+    assert_equal(len(opt.models), 1)
+    assert_equal(len(opt.Xi), 3)
+    assert_equal(len(np.unique(X, axis=0)), 4)
+    # The first point is the one suggested by the model
+    assert_equal(X[0], opt.ask())
+
+
+@pytest.mark.fast_test
+@pytest.mark.parametrize("acq_optimizer", ["sampling", "lbfgs"])
+def test_gp_hedge_shares_prediction(monkeypatch, acq_optimizer):
+    opt = Optimizer(
+        [(-2.0, 2.0), (-3.0, 3.0)],
+        n_initial_points=3,
+        acq_func="gp_hedge",
+        acq_optimizer=acq_optimizer,
+        random_state=1,
+    )
+    opt.tell([[-1.0, 0.0], [1.0, 2.0], [0.5, -1.0]], [1.0, 2.0, 1.5])
+
+    n_predicted = []
+    predict = GaussianProcessRegressor.predict
+
+    def counting_predict(self, X, *args, **kwargs):
+        n_predicted.append(len(X))
+        return predict(self, X, *args, **kwargs)
+
+    monkeypatch.setattr(GaussianProcessRegressor, "predict", counting_predict)
+    opt.ask()
+    # The candidates are predicted once for all acquisition functions
+    assert_equal(n_predicted.count(opt.n_points), 1)
+    assert_equal(len(opt.next_xs_), len(opt.cand_acq_funcs_))
+
+
+@pytest.mark.fast_test
+def test_keep_models():
+    opt = Optimizer(
+        [(-2.0, 2.0), (-3.0, 3.0)],
+        n_initial_points=3,
+        model_kwargs={"keep_models": 2},
+        random_state=1,
+    )
+    X = opt.space.rvs(n_samples=7, random_state=2)
+    fitted = []
+    for i, x in enumerate(X):
+        res = opt.tell(x, branin(x))
+        if opt.models:
+            fitted.append(opt.models[-1])
+    assert_equal(len(opt.models), 5)
+    assert_equal(len(res.models), 5)
+    # The latest models are kept as they are
+    assert opt.models[-1] is fitted[-1]
+    assert opt.models[-2] is fitted[-2]
+    # Older models are reconstructed from their hyperparameters
+    x_test = opt.space.transform(opt.space.rvs(n_samples=5, random_state=3))
+    for model, original in zip(opt.models[:3], fitted[:3]):
+        assert model is not original
+        assert_almost_equal(model.predict(x_test), original.predict(x_test))
+    assert_array_equal(opt.models[0].X_train_, fitted[0].X_train_)
+    # Reconstructed models are cached, and the history compares equal to
+    # itself and its copies without reconstructing them
+    assert opt.models[0] is opt.models[0]
+    assert opt.models == opt.models
+    assert opt.models == opt.models.copy()
+    assert opt.models != fitted
+    expected_minimum(res)
+
+    opt = Optimizer(
+        [(-2.0, 2.0), (-3.0, 3.0)],
+        n_initial_points=3,
+        model_kwargs={"keep_models": 1, "keep_hyperparameters": False},
+        random_state=1,
+    )
+    opt.tell(X, [branin(x) for x in X])
+    opt.tell([0.0, 0.0], branin([0.0, 0.0]))
+    assert_equal(len(opt.models), 2)
+    assert opt.models[0] is None
+    assert opt.models[-1] is not None
+
+    with pytest.raises(ValueError):
+        Optimizer([(-2.0, 2.0)], model_kwargs={"keep_models": 0})
+
+
+@pytest.mark.fast_test
+def test_keep_models_multiobjective():
+    opt = Optimizer(
+        [(-2.0, 2.0), (-3.0, 3.0)],
+        n_initial_points=3,
+        n_objectives=2,
+        model_kwargs={"keep_models": 1},
+        random_state=1,
+    )
+    X = opt.space.rvs(n_samples=5, random_state=2)
+    for x in X[:4]:
+        opt.tell(x, [branin(x), -branin(x)])
+    fitted = opt.models[-1]
+    res = opt.tell(X[4], [branin(X[4]), -branin(X[4])])
+    assert_equal(len(res[1].models), 3)
+    x_test = opt.space.transform(opt.space.rvs(n_samples=5, random_state=3))
+    for i in range(2):
+        assert_almost_equal(
+            res[i].models[1].predict(x_test), fitted[i].predict(x_test)
+        )
+        assert res[i].models[-1] is opt.models[-1][i]
+
+
+@pytest.mark.fast_test
+def test_n_jobs_passed_to_gp():
+    opt = Optimizer(
+        [(-2.0, 2.0)], "GP", acq_optimizer_kwargs={"n_jobs": 2}
+    )
+    assert opt.base_estimator_.n_jobs == 2
+    opt = Optimizer([(-2.0, 2.0)], "GP")
+    assert opt.base_estimator_.n_jobs == 1
+
+
+@pytest.mark.fast_test
+@pytest.mark.parametrize("base_estimator", ["GP", "RF"])
+def test_float32_screening(base_estimator):
+    # The best candidate in double precision is among the best candidates
+    # in single precision, so the same point is suggested
+    asks = []
+    for float32_screening in [False, True]:
+        opt = Optimizer(
+            [(-2.0, 2.0), (-2.0, 2.0)], base_estimator, n_initial_points=5,
+            acq_optimizer="sampling", random_state=1,
+            acq_optimizer_kwargs={
+                "n_points": 2000, "float32_screening": float32_screening},
+        )
+        for _ in range(7):
+            x = opt.ask()
+            opt.tell(x, bench1(x) + x[1] ** 2)
+        asks.append(opt.ask())
+    assert_array_equal(asks[0], asks[1])
+
+
+@pytest.mark.fast_test
+@pytest.mark.parametrize("acq_func", ["EI", "LCB", "PI", "gp_hedge"])
+@pytest.mark.parametrize("acq_optimizer", ["sampling", "lbfgs"])
+def test_prune_candidates(acq_func, acq_optimizer):
+    asks = []
+    for prune_candidates in [False, True]:
+        opt = Optimizer(
+            [(-2.0, 2.0), (-2.0, 2.0)], "GP", n_initial_points=5,
+            acq_func=acq_func, acq_optimizer=acq_optimizer, random_state=1,
+            acq_optimizer_kwargs={
+                "n_points": 2000, "prune_candidates": prune_candidates},
+        )
+        for _ in range(7):
+            x = opt.ask()
+            opt.tell(x, bench1(x) + x[1] ** 2)
+        asks.append(opt.ask())
+    assert_array_equal(asks[0], asks[1])
+
+
+@pytest.mark.fast_test
+@pytest.mark.parametrize("base_estimator", ["GP", "RF"])
+def test_lattice(base_estimator):
+    opt = Optimizer(
+        [Integer(0, 20), Integer(0, 10)], base_estimator, n_initial_points=5,
+        acq_func="EI", acq_optimizer="sampling", random_state=1,
+        acq_optimizer_kwargs={"max_lattice_size": 231},
+        model_kwargs={"refit_every": 2},
+    )
+    assert len(opt._lattice) == 231
+    for _ in range(8):
+        x = opt.ask()
+        opt.tell(x, (x[0] - 12) ** 2 + (x[1] - 3) ** 2 + np.sin(x[0]))
+    # The next point is the exact minimum of the acquisition function
+    lattice = opt.space.lattice()
+    values = _gaussian_acquisition(
+        opt.space.transform(lattice), opt.models[-1],
+        y_opt=np.min(opt.yi), acq_func="EI")
+    assert opt.ask() == lattice[np.argmin(values)]
+    if base_estimator == "GP":
+        assert len(opt._lattice_cache["X_train"]) == len(opt.yi)
+        # The lies of a batch are not suggested again
+        points = opt.ask(3, strategy="cl_min")
+        assert len(set(map(tuple, points))) == 3
+
+    # Spaces with more points are sampled
+    opt = Optimizer(
+        [Integer(0, 20), Integer(0, 11)], base_estimator,
+        acq_optimizer_kwargs={"max_lattice_size": 231},
+    )
+    assert opt._lattice is None
+
+
+@pytest.mark.fast_test
+def test_batch_fmin_l_bfgs_b():
+    def rosen(X):
+        return (
+            np.array([optimize.rosen(x) for x in X]),
+            np.array([optimize.rosen_der(x) for x in X]),
+        )
+
+    rng = np.random.RandomState(0)
+    X0 = rng.uniform(-2, 2, size=(5, 3))
+    bounds = [(-2, 2), (-2, 0.5), (-2, 2)]
+    X, values = batch_fmin_l_bfgs_b(rosen, X0, bounds, maxiter=200)
+    # The minimum within the bounds has the second coordinate at its bound
+    for x, value in zip(X, values):
+        assert_array_almost_equal(x, [0.7086, 0.5, 0.25], decimal=3)
+        assert_almost_equal(value, optimize.rosen(x))
+
+
+@pytest.mark.fast_test
+@pytest.mark.parametrize("acq_func", ["EI", "LCB", "PI"])
+def test_batched_lbfgs(acq_func):
+    next_values = []
+    for batched_lbfgs in [False, True]:
+        opt = Optimizer(
+            [(-2.0, 2.0), (-2.0, 2.0)], "GP", n_initial_points=5,
+            acq_func=acq_func, acq_optimizer="lbfgs", random_state=1,
+            acq_optimizer_kwargs={
+                "n_points": 500, "batched_lbfgs": batched_lbfgs},
+        )
+        for _ in range(8):
+            x = opt.ask()
+            opt.tell(x, bench1(x) + x[1] ** 2)
+        next_values.append(_gaussian_acquisition(
+            opt.space.transform([opt.ask()]), opt.models[-1],
+            y_opt=np.min(opt.yi), acq_func=acq_func)[0])
+    # Both find the same minimum of the acquisition function
+    assert_almost_equal(next_values[1], next_values[0], decimal=4)
+
+
+@pytest.mark.fast_test
+@pytest.mark.parametrize("acq_optimizer", ["lbfgs", "sampling"])
+def test_thompson_sampling(acq_optimizer):
+    opt = Optimizer(
+        [(-2.0, 2.0), (-2.0, 2.0)], "GP", n_initial_points=5, acq_func="TS",
+        acq_optimizer=acq_optimizer, random_state=1,
+        acq_optimizer_kwargs={"n_points": 500},
+        acq_func_kwargs={"n_features": 500},
+    )
+    for _ in range(10):
+        x = opt.ask()
+        opt.tell(x, bench1(x) + x[1] ** 2)
+    assert np.min(opt.yi) < 0.1
+    # Each point of a batch is the minimum of a different function
+    X = opt.ask(4)
+    assert_equal(len(X), 4)
+    assert_equal(len(np.unique(X, axis=0)), 4)
+    assert all(x in opt.space for x in X)
+
+    with pytest.raises(ValueError):
+        Optimizer([(-2.0, 2.0)], "RF", acq_func="TS")
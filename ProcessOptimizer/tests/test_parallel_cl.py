@@ -171,3 +171,45 @@ def test_reproducible_runs(strategy, surrogate):
         assert points[i] == x
 
         optimizer.tell(x, [branin(v) for v in x])
+
+
+@pytest.mark.fast_test
+@pytest.mark.parametrize("strategy", ["qEI", "qLCB"])
+def test_joint_batch_strategies(strategy):
+    optimizer = Optimizer(
+        dimensions=[Real(-5.0, 10.0), Real(0.0, 15.0)],
+        n_initial_points=5,
+        random_state=0,
+    )
+    # Before a model has been fitted, the constant liar strategy is used
+    x = optimizer.ask(n_points, strategy)
+    optimizer.tell(x, [branin(v) for v in x])
+    for i in range(2):
+        x = optimizer.ask(n_points, strategy)
+        assert_equal(len(x), n_points)
+        assert all(pdist(x) > 1e-3)
+        assert all(v in optimizer.space for v in x)
+        assert_equal(optimizer.ask(n_points, strategy), x)
+        optimizer.tell(x, [branin(v) for v in x])
+
+
+@pytest.mark.fast_test
+def test_joint_batch_strategies_require_gp():
+    optimizer = Optimizer(
+        base_estimator=sol.RandomForestRegressor(),
+        dimensions=[Real(-5.0, 10.0), Real(0.0, 15.0)],
+        random_state=0,
+    )
+    assert_raises(ValueError, optimizer.ask, n_points, "qEI")
+
+
+@pytest.mark.fast_test
+def test_kriging_believer_before_model():
+    optimizer = Optimizer(
+        dimensions=[Real(-5.0, 10.0), Real(0.0, 15.0)],
+        n_initial_points=3,
+        random_state=0,
+    )
+    x = optimizer.ask(5, "KB")
+    assert_equal(len(x), 5)
+    assert all(pdist(x) > 1e-3)
@@ -0,0 +1,160 @@
+import numpy as np
+import pytest
+
+from scipy import optimize
+
+from numpy.testing import assert_almost_equal
+from numpy.testing import assert_array_almost_equal
+
+from ProcessOptimizer import Optimizer
+from ProcessOptimizer.learning import cook_estimator
+from ProcessOptimizer.learning import GaussianProcessRegressor
+from ProcessOptimizer.learning import SparseGaussianProcessRegressor
+from ProcessOptimizer.learning.gaussian_process.kernels import ConstantKernel
+from ProcessOptimizer.learning.gaussian_process.kernels import Matern
+from ProcessOptimizer.space import Real
+
+
+def make_kernel():
+    return ConstantKernel(1.0) * Matern(length_scale=[0.5, 0.5], nu=2.5)
+
+
+def make_data(n_samples, random_state=0):
+    rng = np.random.RandomState(random_state)
+    X = rng.uniform(size=(n_samples, 2))
+    y = np.sin(6 * X[:, 0]) + X[:, 1] ** 2 + 0.1 * rng.randn(n_samples)
+    return X, y
+
+
+@pytest.mark.fast_test
+def test_sparse_equals_exact_with_all_points():
+    X, y = make_data(30)
+    X_new = np.random.RandomState(1).uniform(size=(10, 2))
+    gpr = GaussianProcessRegressor(
+        make_kernel(), noise="gaussian", normalize_y=True).fit(X, y)
+    sgpr = SparseGaussianProcessRegressor(
+        make_kernel(), noise="gaussian", normalize_y=True)
+    sgpr.warm_fit(X, y, gpr.theta_, optimize=False)
+    assert len(sgpr.inducing_points_) == len(X)
+
+    mean, std = gpr.predict(X_new, return_std=True)
+    sparse_mean, sparse_std = sgpr.predict(X_new, return_std=True)
+    assert_array_almost_equal(sparse_mean, mean, decimal=5)
+    assert_array_almost_equal(sparse_std, std, decimal=5)
+    _, cov = gpr.predict(X_new, return_cov=True)
+    _, sparse_cov = sgpr.predict(X_new, return_cov=True)
+    assert_array_almost_equal(sparse_cov, cov, decimal=5)
+    assert_almost_equal(
+        sgpr.log_marginal_likelihood_value_,
+        gpr.log_marginal_likelihood_value_, decimal=4)
+
+
+@pytest.mark.fast_test
+def test_sparse_log_marginal_likelihood():
+    X, y = make_data(200)
+    gpr = GaussianProcessRegressor(
+        make_kernel(), noise="gaussian", normalize_y=True).fit(X, y)
+    sgpr = SparseGaussianProcessRegressor(
+        make_kernel(), noise="gaussian", normalize_y=True, n_inducing=20,
+        subset_size=50, random_state=0).fit(X, y)
+    # The VFE bound of all observations, not the exact likelihood
+    assert_almost_equal(
+        sgpr.log_marginal_likelihood(sgpr.theta_),
+        sgpr.log_marginal_likelihood_value_)
+    assert_almost_equal(
+        sgpr.log_marginal_likelihood(), sgpr.log_marginal_likelihood_value_)
+    theta = np.copy(sgpr.theta_)
+    theta[1] += 0.5
+    assert sgpr.log_marginal_likelihood(theta) <= gpr.log_marginal_likelihood(
+        theta)
+    with pytest.raises(ValueError):
+        sgpr.log_marginal_likelihood(theta, eval_gradient=True)
+
+    with pytest.raises(AttributeError, match="no exact inverse"):
+        sgpr.K_inv_
+
+
+@pytest.mark.fast_test
+def test_sparse_inducing_points():
+    X, y = make_data(2000)
+    sgpr = SparseGaussianProcessRegressor(
+        make_kernel(), noise="gaussian", normalize_y=True, random_state=0,
+        subset_size=200, n_inducing=lambda n_samples: n_samples // 20)
+    sgpr.fit(X, y)
+    assert len(sgpr.inducing_points_) == 100
+    assert sgpr.alpha_.shape == (100,)
+    assert sgpr.X_train_.shape == X.shape
+
+    X_new = np.random.RandomState(1).uniform(size=(50, 2))
+    mean = sgpr.predict(X_new)
+    assert np.max(np.abs(
+        mean - np.sin(6 * X_new[:, 0]) - X_new[:, 1] ** 2)) < 0.1
+
+
+@pytest.mark.fast_test
+def test_sparse_gradients():
+    X, y = make_data(200)
+    sgpr = SparseGaussianProcessRegressor(
+        make_kernel(), noise="gaussian", normalize_y=True, n_inducing=20,
+        random_state=0).fit(X, y)
+    X_new = np.random.RandomState(1).uniform(size=(3, 2))
+    _, _, mean_grad, std_grad = sgpr.predict(
+        X_new, return_std=True, return_mean_grad=True, return_std_grad=True)
+    for x, x_mean_grad, x_std_grad in zip(X_new, mean_grad, std_grad):
+        for i, grad in enumerate([x_mean_grad, x_std_grad]):
+            num_grad = optimize.approx_fprime(
+                x, lambda x: sgpr.predict(
+                    np.expand_dims(x, axis=0), return_std=True)[i][0], 1e-6)
+            assert_array_almost_equal(grad, num_grad, decimal=4)
+
+
+@pytest.mark.fast_test
+def test_sparse_condition_on():
+    X, y = make_data(40)
+    sgpr = SparseGaussianProcessRegressor(
+        make_kernel(), noise="gaussian").fit(X[:30], y[:30])
+    # With the new points among the inducing points the conditioned model
+    # is the exact Gaussian process of all points
+    X[30:] = X[:10]
+    conditioned = sgpr.condition_on(X[30:], y[30:])
+    assert len(sgpr.X_train_) == 30
+    assert len(conditioned.X_train_) == 40
+
+    gpr = GaussianProcessRegressor(make_kernel(), noise="gaussian")
+    gpr.warm_fit(X, y, sgpr.theta_, optimize=False)
+    X_new = np.random.RandomState(1).uniform(size=(10, 2))
+    mean, std = gpr.predict(X_new, return_std=True)
+    conditioned_mean, conditioned_std = conditioned.predict(
+        X_new, return_std=True)
+    assert_array_almost_equal(conditioned_mean, mean, decimal=5)
+    assert_array_almost_equal(conditioned_std, std, decimal=5)
+    assert_almost_equal(
+        conditioned.log_marginal_likelihood_value_,
+        gpr.log_marginal_likelihood_value_, decimal=4)
+
+
+@pytest.mark.fast_test
+def test_sparse_optimizer():
+    assert isinstance(
+        cook_estimator("SGP", space=[(0.0, 1.0)]),
+        SparseGaussianProcessRegressor)
+    opt = Optimizer(
+        [Real(0, 1), Real(0, 1)], "SGP", n_initial_points=5, random_state=1)
+    for _ in range(8):
+        x = opt.ask()
+        opt.tell(x, float(np.sin(6 * x[0]) + x[1] ** 2))
+    assert isinstance(opt.models[-1], SparseGaussianProcessRegressor)
+    assert len(opt.ask(3, strategy="cl_min")) == 3
+
+
+@pytest.mark.fast_test
+def test_sparse_predict_std_bound():
+    X, y = make_data(100)
+    sgpr = SparseGaussianProcessRegressor(
+        make_kernel(), noise="gaussian", normalize_y=True, n_inducing=10,
+        random_state=0).fit(X, y)
+    X_new = np.random.RandomState(1).uniform(size=(20, 2))
+    mean, std = sgpr.predict(X_new, return_std=True)
+    bound_mean, std_bound = sgpr._predict_std_bound(X_new)
+    assert_array_almost_equal(bound_mean, mean)
+    assert np.all(std_bound >= std)
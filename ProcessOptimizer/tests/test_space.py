@@ -744,3 +744,19 @@ def test_lhs():
     # Asserting the the values are the same for both the lhs, even though the order is different
     for i in range(4):
         assert set([x[i] for x in lhs_one]) == set([x[i] for x in lhs_two])
+
+
+@pytest.mark.fast_test
+def test_lattice():
+    space = Space([Integer(1, 3), Categorical(list("ab")), Integer(0, 1)])
+    assert space.cardinality == 12
+    points = space.lattice()
+    assert len(points) == 12
+    assert points[:3] == [[1, "a", 0], [1, "a", 1], [1, "b", 0]]
+    assert len(set(map(tuple, points))) == 12
+    assert all(point in space for point in points)
+
+    space = Space([Integer(1, 3), Real(0, 1)])
+    assert space.cardinality == np.inf
+    with pytest.raises(ValueError):
+        space.lattice()
@@ -6,6 +6,7 @@ from numpy.testing import assert_array_equal
 from numpy.testing import assert_equal
 import numpy as np
 
+from ProcessOptimizer import forest_minimize
 from ProcessOptimizer import gp_minimize
 from ProcessOptimizer import load
 from ProcessOptimizer import dump
@@ -24,6 +25,7 @@ from ProcessOptimizer.utils import (
     point_asdict,
     point_aslist,
     dimensions_aslist,
+    y_coverage,
 )
 from ProcessOptimizer.space import normalize_dimensions
 from ProcessOptimizer.space.constraints import SumEquals
@@ -365,3 +367,14 @@ def test_use_named_args():
     # argument that is an unnamed numpy array.
     res = func(np.array(default_parameters))
     assert isinstance(res, float)
+
+
+@pytest.mark.fast_test
+@pytest.mark.parametrize("minimize", [gp_minimize, forest_minimize])
+def test_y_coverage(minimize):
+    res = minimize(bench1, [(-2.0, 2.0)], n_calls=12, random_state=1)
+    (observed_min, observed_max), (expected_min, expected_max) = y_coverage(
+        res, return_plot=True, random_state=1)
+    assert observed_min == res.func_vals.min()
+    assert observed_max == res.func_vals.max()
+    assert expected_min <= expected_max
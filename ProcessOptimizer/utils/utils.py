@@ -68,7 +68,13 @@ def create_result(Xi, yi, space=None, rng=None, specs=None, models=None, constra
         res.specs = specs
         res.constraints = constraints
         return res
-    models = np.asarray(models)
+    # A ModelHistory of the optimizer selects the models of each objective
+    # without reconstructing dropped models
+    if hasattr(models, "keep_models"):
+        n_models = len(models)
+    else:
+        models = np.asarray(models)
+        n_models = models.size
     results = []
     for i in range(yi.shape[1]):
         res = OptimizeResult()
@@ -78,7 +84,7 @@ def create_result(Xi, yi, space=None, rng=None, specs=None, models=None, constra
         res.fun = yi_single[best]
         res.func_vals = yi_single
         res.x_iters = Xi
-        if models.size == 0:
+        if n_models == 0:
             res.models = models
         else:
             res.models = models[:, i]
@@ -502,8 +508,8 @@ def y_coverage(res, return_plot=False, random_state=None, horizontal=False):
         reg = res.models[-1]
         min_x = res.space.transform([min_x])
         max_x = res.space.transform([max_x])
-        sampled_mins = reg.sample_y(min_x, n_samples=5000, random_state=random_state)[0]
-        sampled_maxs = reg.sample_y(max_x, n_samples=5000, random_state=random_state)[0]
+        sampled_mins = reg.sample_marginal(min_x, n_samples=5000, random_state=random_state)[0]
+        sampled_maxs = reg.sample_marginal(max_x, n_samples=5000, random_state=random_state)[0]
         extreme_min = sampled_mins.min()
         extreme_max = sampled_maxs.max()
         bins = np.linspace(extreme_min, extreme_max, 30)